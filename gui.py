@@ -1,8 +1,15 @@
 import dearpygui.dearpygui as dpg
 import numpy as np
-from typing import Optional
+import os
+import queue
+import threading
+import time
+import traceback
+from typing import Any, Callable, Optional
 import polynomiograpy
+from polynomiograpy.common import CancelToken, PNGWriter, RenderCancelled
 from polynomiograpy.iterations import available_methods
+from polynomiograpy.iterations.helpers import default_tile_size, iter_row_tiles
 from PIL import Image
 import subprocess
 
@@ -17,6 +24,8 @@ class Tags:
     generate_output_modal = "GenerateOutputModal"
     generate_output_modal_text = "GenerateOutputModalText"
     generate_output_modal_button = "GenerateOutputModalButton"
+    generate_output_progress = "GenerateOutputProgress"
+    generate_output_cancel_button = "GenerateOutputCancelButton"
     is_r_channel_active = "IsRChannelActive"
     is_g_channel_active = "IsGChannelActive"
     is_b_channel_active = "IsBChannelActive"
@@ -42,6 +51,247 @@ class Tags:
     filename_value = "FilenameValue"
 
 
+class PreviewWorker:
+    """
+    Renders the preview in a background thread, so editing the parameters does
+    not block the UI.
+
+    Requests are debounced: a render starts once no newer request came for
+    `debounce` seconds, and a newer request cancels the render in progress. The
+    preview is rendered at the first of `sizes`, then refined at the next ones
+    while the parameters are unchanged. The last finished render is handed to the
+    UI thread by `publish`.
+    """
+
+    def __init__(
+        self,
+        render: Callable[[dict[str, Any], CancelToken], np.ndarray],
+        sizes: tuple[int, ...] = (100,),
+        debounce: float = 0.15,
+    ):
+        """
+        Initialize the worker and start its thread.
+
+        Args:
+            render (Callable[[dict[str, Any], CancelToken], np.ndarray]):
+                Renders the preview of the parameters of a request, with the
+                `width` and `height` of the level, checking the token.
+            sizes (tuple[int, ...], optional):
+                Increasing widths and heights of the levels of the preview.
+                Defaults to `(100,)`.
+            debounce (float, optional):
+                Seconds without requests before a render starts. Defaults to 0.15.
+        """
+        self._render = render
+        self.sizes = sizes
+        self.debounce = debounce
+        self._condition = threading.Condition()
+        self._params: Optional[dict[str, Any]] = None
+        self._refine: Optional[tuple[dict[str, Any], int]] = None
+        self._requested_at = 0.0
+        self._token: Optional[CancelToken] = None
+        self._result: Optional[tuple[Optional[np.ndarray], Optional[str]]] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def request(self, params: dict[str, Any]):
+        """
+        Requests a render, cancelling the render in progress and restarting the
+        refinement at the coarsest level.
+        """
+        with self._condition:
+            self._params = params
+            self._refine = None
+            self._requested_at = time.monotonic()
+            if self._token is not None:
+                self._token.cancel()
+            self._condition.notify()
+
+    def publish(self) -> Optional[tuple[Optional[np.ndarray], Optional[str]]]:
+        """
+        Returns the image or the error message of the last finished render, once,
+        or `None` if no render finished since the last call.
+        """
+        with self._condition:
+            result, self._result = self._result, None
+        return result
+
+    def close(self):
+        """
+        Cancels the render in progress and stops the thread.
+        """
+        with self._condition:
+            self._closed = True
+            if self._token is not None:
+                self._token.cancel()
+            self._condition.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._params is None and self._refine is None:
+                    if self._closed:
+                        return
+                    self._condition.wait()
+                if self._closed:
+                    return
+                if self._params is not None:
+                    wait = self._requested_at + self.debounce - time.monotonic()
+                    if wait > 0:
+                        self._condition.wait(wait)
+                        continue
+                    params, self._params = self._params, None
+                    level = 0
+                else:
+                    (params, level), self._refine = self._refine, None
+                token = self._token = CancelToken()
+            size = self.sizes[level]
+            try:
+                result = (
+                    self._render({**params, "width": size, "height": size}, token),
+                    None,
+                )
+            except RenderCancelled:
+                continue
+            except Exception as e:
+                traceback.print_exc()
+                result = (None, str(e))
+            with self._condition:
+                # a render cancelled after it finished is stale as well
+                if not token.cancelled:
+                    self._result = result
+                    if result[1] is None and level + 1 < len(self.sizes):
+                        self._refine = (params, level + 1)
+
+
+class ExportJob:
+    """
+    An export of the full size image, rendered by an :obj:`ExportQueue`.
+    """
+
+    def __init__(self, params: dict[str, Any]):
+        """
+        Initialize a queued job.
+
+        Args:
+            params (dict[str, Any]):
+                The render parameters, with the `width`, `height` and `filename` of
+                the image.
+        """
+        self.params = params
+        self.filename: str = params["filename"]
+        self.status = "queued"
+        self.progress = 0.0
+        self.tiles = 0
+        self.error: Optional[str] = None
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.cancel_token = CancelToken()
+
+    def cancel(self):
+        """
+        Cancels the job, before or while it runs.
+        """
+        self.cancel_token.cancel()
+
+    @property
+    def remaining(self) -> Optional[float]:
+        """
+        Returns the estimated seconds left, from the progress so far.
+        """
+        if self.status != "running" or self.progress <= 0:
+            return None
+        elapsed = time.monotonic() - self.started
+        return elapsed * (1 - self.progress) / self.progress
+
+    def describe(self) -> str:
+        """
+        Returns the status of the job for display.
+        """
+        if self.status == "running":
+            remaining = self.remaining
+            eta = "estimating" if remaining is None else f"about {remaining:.0f} s left"
+            return f"{self.filename}: {self.progress:.0%}, {self.tiles} tiles, {eta}"
+        if self.status == "done":
+            seconds = self.finished - self.started
+            return f"Done. Saved to {self.filename} in {seconds:.1f} s"
+        if self.status == "failed":
+            return f"{self.filename}: Error: {self.error}"
+        return f"{self.filename}: {self.status}"
+
+
+class ExportQueue:
+    """
+    Runs exports one after another in a background thread, so the UI stays
+    responsive and more exports can be queued meanwhile.
+    """
+
+    def __init__(self, export: Callable[[ExportJob], None]):
+        """
+        Initialize the queue and start its thread.
+
+        Args:
+            export (Callable[[ExportJob], None]):
+                Renders and saves the image of a job, updating its progress and
+                checking its cancel token.
+        """
+        self._export = export
+        self.jobs: list[ExportJob] = []
+        self.current: Optional[ExportJob] = None
+        self._queue: queue.Queue[Optional[ExportJob]] = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, params: dict[str, Any]) -> ExportJob:
+        """
+        Queues an export.
+        """
+        job = ExportJob(params)
+        self.jobs.append(job)
+        self._queue.put(job)
+        return job
+
+    def cancel_all(self):
+        """
+        Cancels the running and queued exports.
+        """
+        for job in self.jobs:
+            job.cancel()
+
+    def close(self):
+        """
+        Cancels the exports and stops the thread.
+        """
+        self.cancel_all()
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            if job.cancel_token.cancelled:
+                job.status = "cancelled"
+                continue
+            self.current = job
+            job.started = time.monotonic()
+            job.status = "running"
+            try:
+                self._export(job)
+                job.status = "done"
+            except RenderCancelled:
+                job.status = "cancelled"
+            except Exception as e:
+                traceback.print_exc()
+                job.error = str(e)
+                job.status = "failed"
+            job.finished = time.monotonic()
+            self.current = None
+
+
 def run():
     dpg.create_context()
     dpg.create_viewport(
@@ -60,166 +310,167 @@ def run():
     im1 = Image.open(r"pp2preview_test.png").convert("RGBA")
     data = np.asfarray(im1, dtype="f")
     # raw_data = np.true_divide(data, 255.0)
-    raw_data = np.ones((100, 100, 4), dtype=np.float32)
+    # the preview is refined up to the size it is displayed at
+    preview_sizes = (100, 200, 300)
+    raw_data = np.ones((preview_sizes[-1], preview_sizes[-1], 4), dtype=np.float32)
 
     # raw_data.resize((200, 200, 4))
-    preview_screen = np.zeros((100, 100, 3), np.uint8)
-    preview_screen_buffer = np.zeros((100, 100, 3), np.complex128)
 
-    def update_dynamic_texture(sender, app_data: str, user_data: Optional[list[int]]):
-        try:
-            coefs_raw_str = dpg.get_value(Tags.polynomial_raw_str)
-            coefs = (
-                user_data if user_data else [float(x) for x in coefs_raw_str.split()]
-            )
-            max_imag = float(dpg.get_value(Tags.max_imag_value))
-            min_imag = float(dpg.get_value(Tags.min_imag_value))
-            max_real = float(dpg.get_value(Tags.max_real_value))
-            min_real = float(dpg.get_value(Tags.min_real_value))
-            width = 100
-            height = 100
-            scale_x = (max_real - min_real) / width
-            scale_y = (max_imag - min_imag) / height
-            shift_x = (max_real + min_real) / 2
-            shift_y = (max_imag + min_imag) / 2
-            # channels = {
-            #     "red": 0,
-            #     "green": 1,
-            #     "blue": 2,
-            # }
-            # channel = channels[dpg.get_value(Tags.color_value)]
-            preview_screen_buffer.fill(0)
-            active = [
+    def render_preview(params: dict[str, Any], token: CancelToken) -> np.ndarray:
+        width = params["width"]
+        height = params["height"]
+        screen = np.zeros((height, width, 3), np.uint8)
+        screen_buffer = np.zeros((height, width, 3), np.int64)
+        for channel in [0, 1, 2]:
+            if params["active"][channel]:
+                polynomiograpy.compute_screen_for_single_poly(
+                    params["method"],
+                    polynomiograpy.Polynomial(coeffs=params["coefs"]),
+                    delta=params["deltas"][channel],
+                    width=width,
+                    height=height,
+                    screen=screen,
+                    screen_buffer=screen_buffer,
+                    max_value=params["max_iters"][channel],
+                    scale_x=(params["max_real"] - params["min_real"]) / width,
+                    scale_y=(params["max_imag"] - params["min_imag"]) / height,
+                    shift_x=(params["max_real"] + params["min_real"]) / 2,
+                    shift_y=(params["max_imag"] + params["min_imag"]) / 2,
+                    channel=channel,
+                    reverse_color=params["reversed"][channel],
+                    cancel_token=token,
+                )
+        return screen
+
+    preview_worker = PreviewWorker(render_preview, preview_sizes)
+
+    def show_preview(screen: Optional[np.ndarray], error: Optional[str]):
+        if error is None:
+            # nearest neighbour scaling of the coarser levels to the texture
+            rows = np.arange(raw_data.shape[0]) * screen.shape[0] // raw_data.shape[0]
+            cols = np.arange(raw_data.shape[1]) * screen.shape[1] // raw_data.shape[1]
+            raw_data[:, :, :3] = np.true_divide(screen[rows][:, cols], 255.0)
+            dpg.set_value(Tags.error_field, "")
+        else:
+            raw_data.fill(1)
+            dpg.set_value(Tags.error_field, error)
+
+    def read_params(coefs: Optional[list[float]] = None) -> dict[str, Any]:
+        if not coefs:
+            coefs = [float(x) for x in dpg.get_value(Tags.polynomial_raw_str).split()]
+        return {
+            "coefs": coefs,
+            "method": dpg.get_value(Tags.method_value),
+            "max_imag": float(dpg.get_value(Tags.max_imag_value)),
+            "min_imag": float(dpg.get_value(Tags.min_imag_value)),
+            "max_real": float(dpg.get_value(Tags.max_real_value)),
+            "min_real": float(dpg.get_value(Tags.min_real_value)),
+            "active": [
                 dpg.get_value(Tags.is_r_channel_active),
                 dpg.get_value(Tags.is_g_channel_active),
                 dpg.get_value(Tags.is_b_channel_active),
-            ]
-            deltas = [
+            ],
+            "deltas": [
                 float(dpg.get_value(Tags.delta_r_value)),
                 float(dpg.get_value(Tags.delta_g_value)),
                 float(dpg.get_value(Tags.delta_b_value)),
-            ]
-            max_iters = [
+            ],
+            "max_iters": [
                 int(dpg.get_value(Tags.max_iter_r_value)),
                 int(dpg.get_value(Tags.max_iter_g_value)),
                 int(dpg.get_value(Tags.max_iter_b_value)),
-            ]
-            reversed = [
+            ],
+            "reversed": [
                 dpg.get_value(Tags.is_r_channel_reversed),
                 dpg.get_value(Tags.is_g_channel_reversed),
                 dpg.get_value(Tags.is_b_channel_reversed),
-            ]
-            for channel in [0, 1, 2]:
-                if active[channel]:
-                    polynomiograpy.compute_screen_for_single_poly(
-                        dpg.get_value(Tags.method_value),
-                        polynomiograpy.Polynomial(coeffs=coefs),
-                        delta=deltas[channel],
-                        width=width,
-                        height=height,
-                        screen=preview_screen,
-                        screen_buffer=preview_screen_buffer,
-                        max_value=max_iters[channel],
-                        scale_x=scale_x,
-                        scale_y=scale_y,
-                        shift_x=shift_x,
-                        shift_y=shift_y,
-                        channel=channel,
-                        reverse_color=reversed[channel],
-                    )
-            raw_data[:, :, :3] = np.true_divide(preview_screen, 255.0)
-            dpg.set_value(Tags.error_field, "")
-        except ValueError as e:
-            raw_data.fill(1)
-            dpg.set_value(Tags.error_field, str(e))
-            import traceback
+            ],
+        }
 
-            traceback.print_exc()
+    def update_dynamic_texture(sender, app_data: str, user_data: Optional[list[int]]):
+        try:
+            params = read_params(user_data)
+            # rendered in the background, the result is shown by the render loop
+            preview_worker.request(params)
         except Exception as e:
-            raw_data.fill(1)
-            dpg.set_value(Tags.error_field, str(e))
-            import traceback
-
+            show_preview(None, str(e))
             traceback.print_exc()
 
+    def export_image(job: ExportJob):
+        params = job.params
+        width = params["width"]
+        height = params["height"]
+        channels = [channel for channel in [0, 1, 2] if params["active"][channel]]
+        total_rows = height * max(len(channels), 1)
+        try:
+            with PNGWriter(job.filename, width, height) as writer:
+                for row_start, row_stop in iter_row_tiles(
+                    height, default_tile_size(width)
+                ):
+                    output_screen = np.zeros((row_stop - row_start, width, 3), np.uint8)
+                    output_screen_buffer = np.zeros(
+                        (row_stop - row_start, width, 3), np.int64
+                    )
+                    for index, channel in enumerate(channels):
+                        rows_before = row_start * len(channels) + index * (
+                            row_stop - row_start
+                        )
+
+                        def on_tile(rows: int, _: int):
+                            job.tiles += 1
+                            job.progress = (rows_before + rows) / total_rows
+
+                        polynomiograpy.compute_screen_for_single_poly(
+                            params["method"],
+                            polynomiograpy.Polynomial(coeffs=params["coefs"]),
+                            delta=params["deltas"][channel],
+                            width=width,
+                            height=height,
+                            screen=output_screen,
+                            screen_buffer=output_screen_buffer,
+                            max_value=params["max_iters"][channel],
+                            scale_x=(params["max_real"] - params["min_real"]) / width,
+                            scale_y=(params["max_imag"] - params["min_imag"]) / height,
+                            shift_x=(params["max_real"] + params["min_real"]) / 2,
+                            shift_y=(params["max_imag"] + params["min_imag"]) / 2,
+                            channel=channel,
+                            reverse_color=params["reversed"][channel],
+                            rows=(row_start, row_stop),
+                            cancel_token=job.cancel_token,
+                            on_tile=on_tile,
+                        )
+                    writer.write_rows(output_screen)
+                    job.progress = row_stop / height
+        except BaseException:
+            # no half written images
+            if os.path.exists(job.filename):
+                os.remove(job.filename)
+            raise
+        subprocess.call(("open", job.filename))
+
+    export_queue = ExportQueue(export_image)
+
     def generate_output(
         sender,
         app_data: str,
         user_data,
     ):
+        dpg.configure_item(Tags.generate_output_modal, show=True)
         try:
-            dpg.set_value(Tags.generate_output_modal_text, "Generating...")
-            dpg.configure_item(Tags.generate_output_modal_button, show=False)
-            dpg.configure_item(Tags.generate_output_modal, show=True)
-            coefs_raw_str = dpg.get_value(Tags.polynomial_raw_str)
-            coefs = [float(x) for x in coefs_raw_str.split()]
-            max_imag = float(dpg.get_value(Tags.max_imag_value))
-            min_imag = float(dpg.get_value(Tags.min_imag_value))
-            max_real = float(dpg.get_value(Tags.max_real_value))
-            min_real = float(dpg.get_value(Tags.min_real_value))
-            # delta = float(dpg.get_value(Tags.delta_value))
-            # max_iter = int(dpg.get_value(Tags.max_iter_value))
-            width = int(dpg.get_value(Tags.width_value))
-            height = int(dpg.get_value(Tags.height_value))
-            scale_x = (max_real - min_real) / width
-            scale_y = (max_imag - min_imag) / height
-            shift_x = (max_real + min_real) / 2
-            shift_y = (max_imag + min_imag) / 2
-            channels = {
-                "red": 0,
-                "green": 1,
-                "blue": 2,
-            }
-            channel = channels[dpg.get_value(Tags.color_value)]
-            output_screen = np.zeros((height, width, 3), np.uint8)
-            output_screen_buffer = np.zeros((height, width, 3), np.complex128)
-            filename = dpg.get_value(Tags.filename_value)
-            active = [
-                dpg.get_value(Tags.is_r_channel_active),
-                dpg.get_value(Tags.is_g_channel_active),
-                dpg.get_value(Tags.is_b_channel_active),
-            ]
-            deltas = [
-                float(dpg.get_value(Tags.delta_r_value)),
-                float(dpg.get_value(Tags.delta_g_value)),
-                float(dpg.get_value(Tags.delta_b_value)),
-            ]
-            max_iters = [
-                int(dpg.get_value(Tags.max_iter_r_value)),
-                int(dpg.get_value(Tags.max_iter_g_value)),
-                int(dpg.get_value(Tags.max_iter_b_value)),
-            ]
-            reversed = [
-                dpg.get_value(Tags.is_r_channel_reversed),
-                dpg.get_value(Tags.is_g_channel_reversed),
-                dpg.get_value(Tags.is_b_channel_reversed),
-            ]
-            for channel in [0, 1, 2]:
-                if active[channel]:
-                    polynomiograpy.compute_screen_for_single_poly(
-                        dpg.get_value(Tags.method_value),
-                        polynomiograpy.Polynomial(coeffs=coefs),
-                        delta=deltas[channel],
-                        width=width,
-                        height=height,
-                        screen=output_screen,
-                        screen_buffer=output_screen_buffer,
-                        max_value=max_iters[channel],
-                        scale_x=scale_x,
-                        scale_y=scale_y,
-                        shift_x=shift_x,
-                        shift_y=shift_y,
-                        channel=channel,
-                        reverse_color=reversed[channel],
-                    )
-            im = Image.fromarray(output_screen, mode="RGB")
-            im.save(filename, format="PNG")
-            dpg.set_value(Tags.generate_output_modal_text, f"Done. Saved to {filename}")
-            dpg.configure_item(Tags.generate_output_modal_button, show=True)
-            subprocess.call(("open", filename))
+            params = read_params()
+            params["width"] = int(dpg.get_value(Tags.width_value))
+            params["height"] = int(dpg.get_value(Tags.height_value))
+            params["filename"] = dpg.get_value(Tags.filename_value)
+            export_queue.submit(params)
         except Exception as e:
             dpg.set_value(Tags.generate_output_modal_text, f"Error: {e}")
-            dpg.configure_item(Tags.generate_output_modal_button, show=True)
+
+    def show_exports():
+        job = export_queue.current
+        lines = [job.describe() for job in export_queue.jobs[-8:]]
+        dpg.set_value(Tags.generate_output_modal_text, "\n".join(lines))
+        dpg.set_value(Tags.generate_output_progress, 0 if job is None else job.progress)
+        dpg.configure_item(Tags.generate_output_cancel_button, show=job is not None)
 
     def polynomial_text_field_callback(
         sender,
@@ -267,30 +518,43 @@ def run():
 
     with dpg.texture_registry(show=False):
         dpg.add_raw_texture(
-            width=100,
-            height=100,
+            width=raw_data.shape[1],
+            height=raw_data.shape[0],
             default_value=raw_data,
             format=dpg.mvFormat_Float_rgba,
             tag=Tags.preview_image,
         )
 
+    # not modal, so more exports can be queued while one runs
     with dpg.window(
-        label="Generate Output",
-        modal=True,
+        label="Exports",
         show=False,
         tag=Tags.generate_output_modal,
-        no_title_bar=True,
-        height=30,
         autosize=True,
     ):
-        dpg.add_text("Generating", tag=Tags.generate_output_modal_text)
-        dpg.add_button(
-            label="OK",
-            width=75,
-            callback=lambda: dpg.configure_item(Tags.generate_output_modal, show=False),
-            show=False,
-            tag=Tags.generate_output_modal_button,
-        )
+        dpg.add_text("", tag=Tags.generate_output_modal_text)
+        dpg.add_progress_bar(width=300, tag=Tags.generate_output_progress)
+        with dpg.group(horizontal=True):
+            dpg.add_button(
+                label="Cancel",
+                width=75,
+                callback=lambda: export_queue.current and export_queue.current.cancel(),
+                show=False,
+                tag=Tags.generate_output_cancel_button,
+            )
+            dpg.add_button(
+                label="Cancel All",
+                width=100,
+                callback=export_queue.cancel_all,
+            )
+            dpg.add_button(
+                label="OK",
+                width=75,
+                callback=lambda: dpg.configure_item(
+                    Tags.generate_output_modal, show=False
+                ),
+                tag=Tags.generate_output_modal_button,
+            )
 
     with dpg.window(tag=Tags.primary_window):
         with dpg.menu_bar():
@@ -501,7 +765,17 @@ def run():
     dpg.setup_dearpygui()
     dpg.show_viewport()
     dpg.set_primary_window(Tags.primary_window, True)
-    dpg.start_dearpygui()
+    # the previews rendered in the background are shown between frames, on the
+    # UI thread
+    while dpg.is_dearpygui_running():
+        published = preview_worker.publish()
+        if published is not None:
+            show_preview(*published)
+        if dpg.is_item_shown(Tags.generate_output_modal):
+            show_exports()
+        dpg.render_dearpygui_frame()
+    preview_worker.close()
+    export_queue.close()
     dpg.destroy_context()
 
 
@@ -1,6 +1,9 @@
 from polynomiograpy.common.polynomial import Polynomial
 from polynomiograpy.common.finite_field import FiniteField
-from polynomiograpy.iterations import compute_screen_for_single_poly
+from polynomiograpy.iterations import (
+    compute_screen_for_single_poly,
+    compute_screen_for_single_poly_async,
+)
 from polynomiograpy.roots import (
     compute_screen_for_finite_field_poly,
     compute_screen_for_finite_field_poly_multi_color,
@@ -10,6 +13,7 @@ __version__ = "0.5.0"
 
 __all__ = [
     "compute_screen_for_single_poly",
+    "compute_screen_for_single_poly_async",
     "compute_screen_for_finite_field_poly",
     "compute_screen_for_finite_field_poly_multi_color",
     "FiniteField",
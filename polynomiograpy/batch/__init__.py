@@ -0,0 +1,325 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Optional, Union
+
+from polynomiograpy.iterations.jit import available_engines
+from polynomiograpy.iterations.methods import available_methods
+from polynomiograpy.roots.symmetries import SYMMETRY_MODES
+from . import helpers
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+__all__ = [
+    "load_manifest",
+    "parse_manifest",
+    "estimate_job_cost",
+    "render_job",
+    "run_batch",
+]
+
+job_kinds = ["iterations", "roots"]
+
+_job_defaults: dict[str, Any] = {
+    "width": 1000,
+    "height": 1000,
+    "viewport": [-3, 3, -3, 3],
+    "engine": "numpy",
+    "tile_size": None,
+    # iterations
+    "coefficients": [1, 0, 0, 1],
+    "method": "newton",
+    "delta": 0.1,
+    "max_value": 16,
+    "reverse_color": False,
+    "channel": 0,
+    # roots
+    "elements": [1, 0],
+    "min_degree": 1,
+    "max_degree": 5,
+    "color_range": 8,
+    "multi_color": False,
+    "symmetry": "exact",
+    "root_cache": ".root-cache",
+}
+
+_channel_keys = ["channel", "method", "delta", "max_value", "reverse_color"]
+
+
+def _parse_job(
+    i: int, job: dict[str, Any], defaults: dict[str, Any], output_dir: str
+) -> dict[str, Any]:
+    if not isinstance(job, dict):
+        raise ValueError(f"Job {i} is not a table")
+    settings = {**_job_defaults, **defaults, **job}
+    name = str(settings.get("name", f"job{i}"))
+    kind = settings.get("kind", "iterations")
+    if kind not in job_kinds:
+        raise ValueError(f"Job {name}: unknown kind {kind!r}, expected {job_kinds}")
+    if settings["engine"] not in available_engines:
+        raise ValueError(f"Job {name}: unknown engine {settings['engine']!r}")
+    try:
+        viewport = [float(v) for v in settings["viewport"]]
+        assert len(viewport) == 4
+    except (TypeError, ValueError, AssertionError):
+        raise ValueError(
+            f"Job {name}: viewport must be [min_real, max_real, min_imag, max_imag]"
+        )
+    parsed: dict[str, Any] = {
+        "name": name,
+        "kind": kind,
+        "output": os.path.join(output_dir, settings.get("output", f"{name}.png")),
+        "width": int(settings["width"]),
+        "height": int(settings["height"]),
+        "viewport": viewport,
+        "engine": settings["engine"],
+        "tile_size": settings["tile_size"] and int(settings["tile_size"]),
+    }
+    if kind == "roots":
+        if settings["symmetry"] not in SYMMETRY_MODES:
+            raise ValueError(f"Job {name}: unknown symmetry {settings['symmetry']!r}")
+        parsed.update(
+            elements=[int(e) for e in settings["elements"]],
+            min_degree=int(settings["min_degree"]),
+            max_degree=int(settings["max_degree"]),
+            color_range=int(settings["color_range"]),
+            channel=int(settings["channel"]),
+            multi_color=bool(settings["multi_color"]),
+            symmetry=settings["symmetry"],
+            root_cache=settings["root_cache"]
+            and os.path.join(output_dir, settings["root_cache"]),
+        )
+        return parsed
+    channels = []
+    for spec in settings.get("channels", [{}]):
+        spec = {key: spec.get(key, settings[key]) for key in _channel_keys}
+        if spec["method"] not in available_methods:
+            raise ValueError(f"Job {name}: unknown method {spec['method']!r}")
+        channels.append(
+            {
+                "channel": int(spec["channel"]),
+                "method": spec["method"],
+                "delta": float(spec["delta"]),
+                "max_value": int(spec["max_value"]),
+                "reverse_color": bool(spec["reverse_color"]),
+            }
+        )
+    coefficients = list(settings["coefficients"])
+    if not coefficients or not all(
+        isinstance(c, (int, float)) and not isinstance(c, bool) for c in coefficients
+    ):
+        raise ValueError(f"Job {name}: coefficients must be a list of numbers")
+    parsed.update(coefficients=coefficients, channels=channels)
+    return parsed
+
+
+def parse_manifest(data: dict[str, Any], *, base_dir: str = ".") -> dict[str, Any]:
+    """
+    Validates a manifest and fills in the default values of its jobs.
+
+    Args:
+        data (dict[str, Any]):
+            The manifest, see :py:func:`load_manifest`.
+        base_dir (str, optional):
+            Directory a relative `output_dir` is resolved against. Defaults to the
+            current directory.
+
+    Returns:
+        dict[str, Any]:
+            The manifest with the keys `output_dir`, `workers` and `jobs`, each job
+            having all its keys.
+
+    Raises:
+        ValueError: If the manifest is not valid.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("jobs"), list):
+        raise ValueError("Manifest must have a list of jobs")
+    output_dir = os.path.join(base_dir, data.get("output_dir", "."))
+    defaults = data.get("defaults", {})
+    jobs = [
+        _parse_job(i, job, defaults, output_dir) for i, job in enumerate(data["jobs"])
+    ]
+    names = [job["name"] for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("Job names must be unique")
+    return {
+        "output_dir": output_dir,
+        "workers": data.get("workers"),
+        "jobs": jobs,
+    }
+
+
+def load_manifest(path: str) -> dict[str, Any]:
+    """
+    Loads a manifest of renders from a JSON or TOML file.
+
+    A manifest has a list of `jobs` and optionally an `output_dir`, the number of
+    `workers` and `defaults` for the keys of all jobs. A job has a `name`, a
+    `kind`, `"iterations"` or `"roots"`, an `output` file name, a `width`, a
+    `height`, a `viewport` `[min_real, max_real, min_imag, max_imag]`, an
+    `engine` and a `tile_size`.
+
+    An iterations job has the `coefficients` of the polynomial, from degree 0 to
+    degree d, a `method`, a `delta`, a `max_value`, `reverse_color` and a
+    `channel`, or a list of `channels`, each overriding these keys, to render
+    several methods into the channels of one image. A roots job has the
+    `elements` of the finite field, a `min_degree`, a `max_degree`, a
+    `color_range`, a `channel`, `multi_color`, a `symmetry` (see
+    :py:func:`polynomiograpy.roots.compute_screen_for_finite_field_poly`) and a
+    `root_cache` directory, relative to the `output_dir`, where the roots are
+    cached for the jobs of the same field, `".root-cache"` by default or `""` for
+    no cache.
+
+    Example:
+        .. code-block:: toml
+
+            output_dir = "renders"
+
+            [[jobs]]
+            name = "newton"
+            coefficients = [-1, 0, 0, 1]
+
+            [[jobs]]
+            name = "field"
+            kind = "roots"
+            elements = [-1, 0, 1]
+            max_degree = 8
+
+    Args:
+        path (str):
+            Path of the manifest, read as TOML if it ends with `.toml` and as JSON
+            otherwise.
+
+    Returns:
+        dict[str, Any]: The manifest, see :py:func:`parse_manifest`. A relative
+        `output_dir` is relative to the directory of the manifest.
+
+    Raises:
+        ValueError: If the manifest is not valid.
+    """
+    if path.endswith(".toml"):
+        if tomllib is None:
+            raise ValueError("Reading TOML manifests requires tomli on Python < 3.11")
+        with open(path, "rb") as f:
+            try:
+                data = tomllib.load(f)
+            except tomllib.TOMLDecodeError as e:
+                raise ValueError(f"Invalid manifest: {e}")
+    else:
+        with open(path) as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid manifest: {e}")
+    return parse_manifest(data, base_dir=os.path.dirname(os.path.abspath(path)))
+
+
+def estimate_job_cost(job: dict[str, Any]) -> float:
+    """
+    Estimates the time needed to render a job of a manifest, used to balance the
+    jobs between the workers.
+
+    Args:
+        job (dict[str, Any]):
+            A job of a manifest returned by :py:func:`parse_manifest`.
+
+    Returns:
+        float: The estimated cost, roughly in seconds of a single core.
+    """
+    return helpers.estimate_cost(job)
+
+
+def render_job(job: dict[str, Any]) -> dict[str, Any]:
+    """
+    Renders a job of a manifest in this process.
+
+    Grids of the same viewport are cached by this process and roots of the same
+    finite field in the `root_cache` of the job, so rendering jobs sharing them
+    one after another computes them once.
+
+    Args:
+        job (dict[str, Any]):
+            A job of a manifest returned by :py:func:`parse_manifest`.
+
+    Returns:
+        dict[str, Any]: The result of the job, see :py:func:`run_batch`.
+    """
+    return helpers.run_task([job])[0]
+
+
+def run_batch(
+    manifest: Union[str, dict[str, Any]],
+    *,
+    workers: Optional[int] = None,
+    summary_path: Optional[str] = "summary.json",
+) -> dict[str, Any]:
+    """
+    Renders all jobs of a manifest with a pool of processes.
+
+    Jobs sharing a viewport or a finite field are sent to the same worker, which
+    computes their grids or roots once, unless this would unbalance the workers.
+    The most expensive tasks are started first, so cheap jobs fill the workers at
+    the end. A failing job does not stop the others.
+
+    Args:
+        manifest (str | dict[str, Any]):
+            Path of a manifest, or a manifest returned by :py:func:`load_manifest`.
+        workers (Optional[int], optional):
+            Number of processes. Defaults to the `workers` of the manifest or the
+            number of CPUs. With one worker the jobs are rendered in this process.
+        summary_path (Optional[str], optional):
+            File name of the summary written to the `output_dir`, or `None` to not
+            write it. Defaults to `"summary.json"`.
+
+    Returns:
+        dict[str, Any]:
+            The summary, with the `output_dir`, the number of `workers`, the
+            `wall_seconds` of the batch, the `cpu_seconds` summed over the jobs,
+            the number of `failed` jobs and the results of the `jobs` in the order
+            of the manifest. A result has the `name`, `kind`, `output`, `status`
+            (`"ok"` or `"error"`, with the `error`), `seconds`,
+            `estimated_cost`, `megapixels` and the `pid` of the worker.
+    """
+    if isinstance(manifest, str):
+        manifest = load_manifest(manifest)
+    jobs = manifest["jobs"]
+    if workers is None:
+        workers = manifest.get("workers") or os.cpu_count() or 1
+    workers = max(1, min(int(workers), len(jobs) or 1))
+    start = time.perf_counter()
+    tasks = helpers.schedule_jobs(jobs, workers)
+    results: list[Optional[dict[str, Any]]] = [None] * len(jobs)
+    if workers == 1:
+        for task in tasks:
+            for i, result in zip(task, helpers.run_task([jobs[i] for i in task])):
+                results[i] = result
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                (task, executor.submit(helpers.run_task, [jobs[i] for i in task]))
+                for task in tasks
+            ]
+            for task, future in futures:
+                for i, result in zip(task, future.result()):
+                    results[i] = result
+    summary = {
+        "output_dir": manifest["output_dir"],
+        "workers": workers,
+        "wall_seconds": time.perf_counter() - start,
+        "cpu_seconds": sum(r["seconds"] for r in results),
+        "megapixels": sum(r["megapixels"] for r in results),
+        "failed": len([r for r in results if r["status"] != "ok"]),
+        "jobs": results,
+    }
+    if summary_path is not None:
+        os.makedirs(manifest["output_dir"], exist_ok=True)
+        with open(os.path.join(manifest["output_dir"], summary_path), "w") as f:
+            json.dump(summary, f, indent=2)
+    return summary
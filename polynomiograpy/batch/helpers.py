@@ -0,0 +1,254 @@
+import os
+import time
+import traceback
+from typing import Any
+
+import numpy as np
+
+from polynomiograpy.common.finite_field import FiniteField
+from polynomiograpy.common.png import PNGWriter, save_png
+from polynomiograpy.common.polynomial import Polynomial
+from polynomiograpy.iterations import compute_screen_for_single_poly
+from polynomiograpy.iterations.helpers import (
+    GridCache,
+    default_tile_size,
+    iter_row_tiles,
+)
+from polynomiograpy.roots import (
+    compute_screen_for_finite_field_poly,
+    compute_screen_for_finite_field_poly_multi_color,
+)
+from polynomiograpy.roots.helpers import RootCache, default_colors
+
+# Rough cost of one iteration step of one pixel per polynomial coefficient, and of
+# finding the roots of one polynomial, in seconds. Only their ratio matters for
+# balancing the jobs.
+ITERATION_STEP_COST = 3e-8
+ROOTS_COST = 3e-5
+PIXEL_COST = 1e-8
+
+# Relative cost of the methods, which evaluate the polynomial a different number
+# of times per step.
+METHOD_COST = {
+    "newton": 2,
+    "halley": 3,
+    "inverse_interpolation": 3,
+    "mullers": 4,
+    "secant": 2,
+    "steffensen": 2,
+}
+
+# Grids shared by the jobs run by this process.
+_grid_cache = GridCache()
+
+
+def estimate_cost(job: dict[str, Any]) -> float:
+    """
+    Estimates the time needed to render a job.
+
+    Args:
+        job (dict[str, Any]):
+            A job of a manifest, see :py:func:`polynomiograpy.batch.load_manifest`.
+
+    Returns:
+        float: The estimated cost, roughly in seconds of a single core.
+    """
+    pixels = job["width"] * job["height"]
+    if job["kind"] == "roots":
+        field_size = len(job["elements"])
+        leading = len([e for e in job["elements"] if e != 0])
+        polys = sum(
+            leading * field_size**degree
+            for degree in range(job["min_degree"], job["max_degree"] + 1)
+        )
+        return polys * ROOTS_COST + pixels * PIXEL_COST
+    cost = pixels * PIXEL_COST
+    for spec in job["channels"]:
+        method = spec["method"].replace("old_", "")
+        # the not vectorized methods are much slower
+        factor = 100 if spec["method"].startswith("old") else 1
+        cost += (
+            pixels
+            * spec["max_value"]
+            * len(job["coefficients"])
+            * METHOD_COST.get(method, 2)
+            * factor
+            * ITERATION_STEP_COST
+        )
+    return cost
+
+
+def share_key(job: dict[str, Any]) -> tuple:
+    """
+    Returns the key of the cached values a job shares with other jobs: the grids
+    of its viewport, or the roots of its finite field in the `root_cache`.
+    """
+    if job["kind"] == "roots":
+        return ("roots", tuple(job["elements"]))
+    return (
+        "grid",
+        job["width"],
+        job["height"],
+        tuple(job["viewport"]),
+        job["tile_size"],
+    )
+
+
+def schedule_jobs(jobs: list[dict[str, Any]], workers: int) -> list[list[int]]:
+    """
+    Splits jobs into tasks for a pool of workers.
+
+    Jobs sharing cached values are put in the same task, so a worker computes the
+    values once, unless the task would take more than a fair share of the total
+    time. The tasks are ordered from the most to the least expensive, so the
+    pool, which hands the next task to the first idle worker, schedules the
+    longest tasks first.
+
+    Args:
+        jobs (list[dict[str, Any]]):
+            The jobs of a manifest.
+        workers (int):
+            Number of workers.
+
+    Returns:
+        list[list[int]]: The indices of the jobs of each task.
+    """
+    costs = [estimate_cost(job) for job in jobs]
+    share = sum(costs) / max(workers, 1)
+    groups: dict[tuple, list[int]] = {}
+    for i, job in enumerate(jobs):
+        groups.setdefault(share_key(job), []).append(i)
+    tasks: list[list[int]] = []
+    for indices in groups.values():
+        task: list[int] = []
+        task_cost = 0.0
+        for i in sorted(indices, key=lambda i: -costs[i]):
+            if task and task_cost + costs[i] > share:
+                tasks.append(task)
+                task, task_cost = [], 0.0
+            task.append(i)
+            task_cost += costs[i]
+        tasks.append(task)
+    tasks.sort(key=lambda task: -sum(costs[i] for i in task))
+    return tasks
+
+
+def _viewport(job: dict[str, Any]) -> dict[str, float]:
+    min_real, max_real, min_imag, max_imag = job["viewport"]
+    return {
+        "scale_x": (max_real - min_real) / job["width"],
+        "scale_y": (max_imag - min_imag) / job["height"],
+        "shift_x": (max_real + min_real) / 2,
+        "shift_y": (max_imag + min_imag) / 2,
+    }
+
+
+def render_iterations(job: dict[str, Any]) -> dict[str, Any]:
+    width, height = job["width"], job["height"]
+    poly = Polynomial(coeffs=job["coefficients"])
+    viewport = _viewport(job)
+    tile_size = job["tile_size"] or default_tile_size(width)
+    with PNGWriter(job["output"], width, height) as writer:
+        for row_start, row_stop in iter_row_tiles(height, tile_size):
+            screen = np.zeros([row_stop - row_start, width, 3], dtype=np.uint8)
+            screen_buffer = np.zeros([row_stop - row_start, width, 3], dtype=np.int64)
+            for spec in job["channels"]:
+                compute_screen_for_single_poly(
+                    spec["method"],
+                    poly,
+                    spec["delta"],
+                    width,
+                    height,
+                    screen,
+                    screen_buffer,
+                    **viewport,
+                    max_value=spec["max_value"],
+                    reverse_color=spec["reverse_color"],
+                    channel=spec["channel"],
+                    rows=(row_start, row_stop),
+                    engine=job["engine"],
+                    grid_cache=_grid_cache,
+                )
+            writer.write_rows(screen)
+    return {}
+
+
+def render_roots(job: dict[str, Any]) -> dict[str, Any]:
+    width, height = job["width"], job["height"]
+    ff = FiniteField(elements=job["elements"])
+    screen = np.zeros([height, width, 3], dtype=np.uint8)
+    screen_buffer = np.zeros([height, width, 3], dtype=np.int64)
+    options = {
+        "symmetry": job["symmetry"],
+        "root_cache": job["root_cache"] and RootCache(job["root_cache"]),
+    }
+    if job["multi_color"]:
+        compute_screen_for_finite_field_poly_multi_color(
+            ff,
+            job["min_degree"],
+            job["max_degree"],
+            width,
+            height,
+            screen,
+            screen_buffer,
+            **_viewport(job),
+            color_range=job["color_range"],
+            colors=default_colors,
+            **options,
+        )
+    else:
+        compute_screen_for_finite_field_poly(
+            ff,
+            job["min_degree"],
+            job["max_degree"],
+            width,
+            height,
+            screen,
+            screen_buffer,
+            **_viewport(job),
+            color_range=job["color_range"],
+            channel=job["channel"],
+            **options,
+        )
+    save_png(job["output"], screen)
+    degrees = range(job["min_degree"], job["max_degree"] + 1)
+    return {"roots": sum(ff.count_polynomials(d) * d for d in degrees)}
+
+
+def run_task(jobs: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Renders the jobs of a task, in a worker process of the pool.
+
+    Args:
+        jobs (list[dict[str, Any]]):
+            The jobs of the task.
+
+    Returns:
+        list[dict[str, Any]]: The result of each job, see
+        :py:func:`polynomiograpy.batch.run_batch`.
+    """
+    results = []
+    for job in jobs:
+        start = time.perf_counter()
+        result: dict[str, Any] = {
+            "name": job["name"],
+            "kind": job["kind"],
+            "output": job["output"],
+            "estimated_cost": estimate_cost(job),
+            "pid": os.getpid(),
+        }
+        try:
+            os.makedirs(os.path.dirname(job["output"]) or ".", exist_ok=True)
+            if job["kind"] == "roots":
+                result.update(render_roots(job))
+            else:
+                result.update(render_iterations(job))
+            result["status"] = "ok"
+        except Exception as e:
+            result["status"] = "error"
+            result["error"] = f"{type(e).__name__}: {e}"
+            result["traceback"] = traceback.format_exc()
+        result["seconds"] = time.perf_counter() - start
+        result["megapixels"] = job["width"] * job["height"] / 1e6
+        results.append(result)
+    return results
@@ -1,15 +1,31 @@
+import argparse
+import json
+import os
+import sys
+from typing import Optional
+
 import numpy as np
-from PIL import Image
+from polynomiograpy.batch import load_manifest, run_batch
+from polynomiograpy.common.archive import load_raw_render
+from polynomiograpy.common.colorize import palettes
 from polynomiograpy.common.finite_field import FiniteField
 from polynomiograpy.common.polynomial import Polynomial
+from polynomiograpy.iterations.jit import available_engines
 from polynomiograpy.iterations.methods import available_methods
-from polynomiograpy.iterations import compute_screen_for_single_poly
-from polynomiograpy.roots import (
-    compute_screen_for_finite_field_poly,
-    compute_screen_for_finite_field_poly_multi_color,
-)
+from polynomiograpy.roots.solvers import DEFAULT_CHUNK_SIZE
+from polynomiograpy.roots.symmetries import SYMMETRY_MODES
+from polynomiograpy.roots.tone_mapping import TONE_MAPPERS
+from polynomiograpy.server import serve
+from . import bench, helpers
 
-__all__ = ["run", "run_iter", "run_root"]
+__all__ = [
+    "run",
+    "run_iter",
+    "run_root",
+    "run_recolor",
+    "run_manifest",
+    "build_parser",
+]
 
 
 def input_with_default(prompt, default):
@@ -19,14 +35,18 @@ def input_with_default(prompt, default):
     return res
 
 
-def run():
+def run(argv: Optional[list[str]] = None):
     """
-    Runs the interactive program for generating visualizations using iterative
-    methods or polynomials over a finite field.
+    Runs the program for generating visualizations using iterative methods or
+    polynomials over a finite field.
+
+    When arguments are given, they are parsed by :py:func:`build_parser()` and the
+    selected subcommand runs without prompts. Otherwise the interactive menu is
+    displayed.
 
-    The function displays a menu with two options: "Iterative methods" and
-    "Poly over finite field". The user is prompted to choose an option by
-    entering the corresponding number.
+    The menu has four options: "Iterative methods", "Poly over finite field",
+    "Recolor a saved render" and "Run a batch manifest". The user is prompted to
+    choose an option by entering the corresponding number.
 
     - If "Iterative methods" is selected (option 1), the function calls the
       :py:func:`run_iter()` function to generate visualizations for a single polynomial
@@ -34,18 +54,37 @@ def run():
     - If "Poly over finite field" is selected (option 2), the function calls
       the :py:func:`run_root()` function to generate visualizations for polynomials over
       a finite field.
+    - If "Recolor a saved render" is selected (option 3), the function calls the
+      :py:func:`run_recolor()` function to colorize a raw render archive again.
+    - If "Run a batch manifest" is selected (option 4), the function calls the
+      :py:func:`run_manifest()` function to render all jobs of a manifest.
 
     The function continuously prompts the user to choose an option until a valid
     option is selected. If an invalid option is entered, an error message is
     displayed.
 
+    Args:
+        argv (Optional[list[str]], optional):
+            Command line arguments. Defaults to `sys.argv[1:]`.
+
     Note: The :py:func:`run_iter()` and :py:func:`run_root()` functions handle the
     configuration and generation of visualizations for specific modes, and their
     respective docstrings provide further details about their functionalities.
     """
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv:
+        args = build_parser().parse_args(argv)
+        if args.profile is not None:
+            helpers.profiled(lambda: args.func(args), args.profile or None)
+        else:
+            args.func(args)
+        return
     while True:
         print("1. Iterative methods")
         print("2. Poly over finite field")
+        print("3. Recolor a saved render")
+        print("4. Run a batch manifest")
         opt = input_with_default("Which tool do you want to use (1): ", "1")
         if opt == "1":
             run_iter()
@@ -53,6 +92,12 @@ def run():
         elif opt == "2":
             run_root()
             return
+        elif opt == "3":
+            run_recolor()
+            return
+        elif opt == "4":
+            run_manifest()
+            return
         else:
             print("Wrong usage")
 
@@ -95,50 +140,29 @@ def run_root():
     )
     color_range = int(input_with_default("Color range (8): ", "8"))
     output_filename = input_with_default("Output (out.png): ", "out.png")
+    archive_path = ""
+    if not multi_color:
+        archive_path = input_with_default("Raw render archive (skip): ", "")
 
     print(
         f"Generating the output for all polynomials over {finite_field} "
         f"from degree {min_degree} to degree {max_degree}"
     )
-    screen = np.zeros([height, width, 3], dtype=np.uint8)
-    screen_buffer = np.zeros([height, width, 3], dtype=np.int64)
-
-    scale_x = (max_real - min_real) / width
-    scale_y = (max_imag - min_imag) / height
-    shift_x = (max_real + min_real) / 2
-    shift_y = (max_imag + min_imag) / 2
-    if multi_color:
-        compute_screen_for_finite_field_poly_multi_color(
-            finite_field,
-            min_degree,
-            max_degree,
-            width,
-            height,
-            screen,
-            screen_buffer,
-            scale_x=scale_x,
-            scale_y=scale_y,
-            shift_x=shift_x,
-            shift_y=shift_y,
-            color_range=color_range,
-        )
-    else:
-        compute_screen_for_finite_field_poly(
-            finite_field,
-            min_degree,
-            max_degree,
-            width,
-            height,
-            screen,
-            screen_buffer,
-            scale_x=scale_x,
-            scale_y=scale_y,
-            shift_x=shift_x,
-            shift_y=shift_y,
-            color_range=color_range,
-        )
-    im = Image.fromarray(screen, mode="RGB")
-    im.save(output_filename, format="PNG")
+    helpers.render_root(
+        parsed_elements,
+        min_degree,
+        max_degree,
+        width,
+        height,
+        output_filename,
+        min_real=min_real,
+        max_real=max_real,
+        min_imag=min_imag,
+        max_imag=max_imag,
+        color_range=color_range,
+        multi_color=multi_color,
+        archive_path=archive_path,
+    )
     print(f"Saved to {output_filename}")
 
 
@@ -178,30 +202,486 @@ def run_iter():
     height = int(input_with_default("Height (1000): ", "1000"))
     reverse_color = input_with_default("Reverse Colors (y/N): ", "n") == "y"
     output_filename = input_with_default("Output (out.png): ", "out.png")
+    archive_path = input_with_default("Raw render archive (skip): ", "")
 
     print(f"Generating the output for polynomial {poly} using {method} method")
-    screen = np.zeros([height, width, 3], dtype=np.uint8)
-    screen_buffer = np.zeros([height, width, 3], dtype=np.complex128)
-
-    scale_x = (max_real - min_real) / width
-    scale_y = (max_imag - min_imag) / height
-    shift_x = (max_real + min_real) / 2
-    shift_y = (max_imag + min_imag) / 2
-    compute_screen_for_single_poly(
+    helpers.render_iter(
+        parsed_coeffs,
         method,
-        poly,
         delta,
+        max_iter,
         width,
         height,
-        screen,
-        screen_buffer,
-        scale_x=scale_x,
-        scale_y=scale_y,
-        shift_x=shift_x,
-        shift_y=shift_y,
-        max_value=max_iter,
+        output_filename,
+        min_real=min_real,
+        max_real=max_real,
+        min_imag=min_imag,
+        max_imag=max_imag,
+        reverse_color=reverse_color,
+        archive_path=archive_path,
+    )
+    print(f"Saved to {output_filename}")
+
+
+def run_recolor():
+    """
+    Runs the program to colorize a raw render archive again.
+
+    The function prompts the user for an archive saved by :py:func:`run_iter()` or
+    :py:func:`run_root()`, the values to colorize, a palette, gamma, reversal and an
+    optional crop. The archive is memory-mapped and colorized band by band, so
+    nothing is computed again and archives larger than memory can be used. The
+    resulting image is saved to a file specified by the user.
+    """
+    print("** Raw Render **")
+    archive_path = input_with_default("Archive (out.raw): ", "out.raw")
+    raw = load_raw_render(archive_path)
+    print(f"Render of {raw.width}x{raw.height}: {raw.metadata}")
+    modes = ["counts"]
+    if raw.smooth is not None:
+        modes.append("smooth")
+    if raw.basins is not None:
+        modes.append("basins")
+    mode = input_with_default(f"Values {modes} (counts): ", "counts")
+    print("** Colors **")
+    print(f"Available palettes: {list(palettes)}")
+    palette = input_with_default("Palette (none): ", "none")
+    gamma = float(input_with_default("Gamma (1): ", "1"))
+    default_reverse = "y" if raw.metadata.get("reverse_color") else "n"
+    reverse_color = (
+        input_with_default(
+            f"Reverse Colors (y/n, default {default_reverse}): ", default_reverse
+        )
+        == "y"
+    )
+    crop = input_with_default("Crop left,top,right,bottom (full): ", "")
+    output_filename = input_with_default("Output (out.png): ", "out.png")
+
+    helpers.recolor(
+        archive_path,
+        output_filename,
+        mode=mode,
+        palette=None if palette == "none" else palette,
+        gamma=gamma,
         reverse_color=reverse_color,
+        crop=tuple(int(e) for e in crop.split(",")) if crop else None,
     )
-    im = Image.fromarray(screen, mode="RGB")
-    im.save(output_filename, format="PNG")
     print(f"Saved to {output_filename}")
+
+
+def run_manifest():
+    """
+    Runs the program to render all jobs of a batch manifest.
+
+    The function prompts the user for a JSON or TOML manifest, see
+    :py:func:`polynomiograpy.batch.load_manifest`, and the number of worker
+    processes. The jobs are rendered by :py:func:`polynomiograpy.batch.run_batch`,
+    which writes a summary next to the images, and the time of each job is printed.
+    """
+    print("** Batch **")
+    manifest_path = input_with_default("Manifest (manifest.json): ", "manifest.json")
+    manifest = load_manifest(manifest_path)
+    default_workers = str(manifest["workers"] or os.cpu_count() or 1)
+    workers = int(input_with_default(f"Workers ({default_workers}): ", default_workers))
+    _run_manifest(manifest, workers)
+
+
+def _run_manifest(manifest: dict, workers: Optional[int]):
+    print(f"Rendering {len(manifest['jobs'])} jobs")
+    summary = run_batch(manifest, workers=workers)
+    for result in summary["jobs"]:
+        status = "ok" if result["status"] == "ok" else result["error"]
+        print(f"{result['name']}: {result['seconds']:.2f}s {status}")
+    print(
+        f"Rendered {len(summary['jobs']) - summary['failed']} of "
+        f"{len(summary['jobs'])} jobs with {summary['workers']} workers in "
+        f"{summary['wall_seconds']:.2f}s to {summary['output_dir']}"
+    )
+
+
+def _parse_list(cast):
+    def parse(value: str) -> list:
+        try:
+            return [cast(e) for e in value.split(",")]
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid list: {value!r}")
+
+    return parse
+
+
+def _add_polynomial_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--coefficients",
+        type=_parse_list(int),
+        default=[1, 0, 0, 1],
+        help="coefficients from degree d to 0 (default: 1,0,0,1)",
+    )
+    parser.add_argument("--method", choices=available_methods, default="newton")
+    parser.add_argument(
+        "--delta", type=float, default=0.1, help="convergence threshold"
+    )
+    parser.add_argument("--max-iter", type=int, default=16)
+    parser.add_argument("--reverse-color", action="store_true")
+
+
+def _add_viewport_arguments(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("complex plane")
+    group.add_argument("--min-real", type=float, default=-3)
+    group.add_argument("--max-real", type=float, default=3)
+    group.add_argument("--min-imag", type=float, default=-3)
+    group.add_argument("--max-imag", type=float, default=3)
+
+
+def _add_output_arguments(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("output")
+    group.add_argument("--width", type=int, default=1000)
+    group.add_argument("--height", type=int, default=1000)
+    group.add_argument("-o", "--output", default="out.png")
+
+
+def _add_performance_arguments(
+    parser: argparse.ArgumentParser,
+    *,
+    engine: bool = False,
+    tiles: bool = False,
+    jobs_help: str = "number of processes (default: 1)",
+):
+    group = parser.add_argument_group("performance")
+    if engine:
+        group.add_argument(
+            "--engine",
+            choices=available_engines,
+            default="numpy",
+            help="engine computing the iteration counts (default: numpy)",
+        )
+        group.add_argument(
+            "--dtype",
+            choices=["complex128", "complex64"],
+            default="complex128",
+            help="complex dtype of the computed points (default: complex128)",
+        )
+    if tiles:
+        group.add_argument(
+            "--tile-size",
+            type=int,
+            default=None,
+            help="rows computed at once (default: bands of about one megapixel)",
+        )
+    group.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help=jobs_help,
+    )
+    group.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="FILE",
+        help="profile the command, printing the statistics or saving them to FILE",
+    )
+    return group
+
+
+def _command_iter(args: argparse.Namespace):
+    coefficients = list(reversed(args.coefficients))
+    print(
+        f"Generating the output for polynomial {Polynomial(coeffs=coefficients)} "
+        f"using {args.method} method"
+    )
+    timer = helpers.Timer()
+    helpers.render_iter(
+        coefficients,
+        args.method,
+        args.delta,
+        args.max_iter,
+        args.width,
+        args.height,
+        args.output,
+        min_real=args.min_real,
+        max_real=args.max_real,
+        min_imag=args.min_imag,
+        max_imag=args.max_imag,
+        reverse_color=args.reverse_color,
+        archive_path=args.archive,
+        engine=args.engine,
+        jobs=args.jobs,
+        tile_size=args.tile_size,
+        dtype=np.dtype(args.dtype),
+        timer=timer,
+    )
+    print(f"Saved to {args.output}")
+    print(timer.summary(megapixels=args.width * args.height / 1e6))
+
+
+def _command_root(args: argparse.Namespace):
+    print(
+        f"Generating the output for all polynomials over "
+        f"{FiniteField(elements=args.elements)} "
+        f"from degree {args.min_degree} to degree {args.max_degree}"
+    )
+    timer = helpers.Timer()
+    root_count = helpers.render_root(
+        args.elements,
+        args.min_degree,
+        args.max_degree,
+        args.width,
+        args.height,
+        args.output,
+        min_real=args.min_real,
+        max_real=args.max_real,
+        min_imag=args.min_imag,
+        max_imag=args.max_imag,
+        color_range=args.color_range,
+        multi_color=args.multi_color,
+        archive_path=args.archive,
+        jobs=args.jobs,
+        chunk_size=args.chunk_size,
+        symmetry=args.symmetry,
+        root_cache=args.root_cache,
+        tone_mapping=args.tone_mapping,
+        timer=timer,
+    )
+    print(f"Saved to {args.output}")
+    print(timer.summary(roots=root_count))
+
+
+def _command_recolor(args: argparse.Namespace):
+    timer = helpers.Timer()
+    raw = helpers.recolor(
+        args.archive,
+        args.output,
+        mode=args.mode,
+        palette=None if args.palette == "none" else args.palette,
+        gamma=args.gamma,
+        reverse_color=args.reverse_color,
+        crop=args.crop and tuple(args.crop),
+        tile_size=args.tile_size,
+        tone_mapping=args.tone_mapping,
+        timer=timer,
+    )
+    print(f"Saved to {args.output}")
+    print(timer.summary(megapixels=raw.width * raw.height / 1e6))
+
+
+def _command_batch(args: argparse.Namespace):
+    _run_manifest(load_manifest(args.manifest), args.jobs)
+
+
+def _command_bench(args: argparse.Namespace):
+    results = bench.run_bench(
+        engine=args.engine,
+        dtype=args.dtype,
+        jobs=args.jobs,
+        repeat=args.repeat,
+        scale=args.scale,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(
+            f"{results['megapixels_per_second']:.3f} megapixels/s, "
+            f"{results['roots_per_second']:.0f} roots/s with the "
+            f"{results['selected_engine']} engine, saved to {args.output}"
+        )
+    else:
+        print(json.dumps(results, indent=2))
+
+
+def _command_serve(args: argparse.Namespace):
+    serve(
+        Polynomial(coeffs=list(reversed(args.coefficients))),
+        args.method,
+        host=args.host,
+        port=args.port,
+        delta=args.delta,
+        max_value=args.max_iter,
+        reverse_color=args.reverse_color,
+        palette=None if args.palette == "none" else args.palette,
+        engine=args.engine,
+        dtype=np.dtype(args.dtype),
+        viewport=(args.min_real, args.max_real, args.min_imag, args.max_imag),
+        tile_size=args.tile_size,
+        cache_bytes=args.cache_mb << 20,
+        workers=args.jobs,
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the parser of the command line arguments.
+
+    The subcommands `iter`, `root`, `recolor` and `batch` take the settings
+    prompted by :py:func:`run_iter()`, :py:func:`run_root()`,
+    :py:func:`run_recolor()` and :py:func:`run_manifest()` as flags with the same
+    defaults, and print a summary of the time spent in each phase. The
+    performance flags are `--engine`, `--dtype`, `--tile-size`, `--jobs` and
+    `--profile`. The `bench` subcommand measures the throughput of the host, see
+    :py:func:`polynomiograpy.cli.bench.run_bench`, and prints it as JSON. The
+    `serve` subcommand runs a :py:class:`polynomiograpy.server.TileServer`.
+
+    Example:
+        .. code-block:: console
+
+            polynomiograpy_cli iter --coefficients 1,0,0,-1 --method halley \\
+                --width 4000 --height 4000 --engine jit --jobs 4 -o out.png
+
+    Returns:
+        :obj:`argparse.ArgumentParser`: The parser. The parsed arguments have a
+        `func` attribute running the subcommand.
+    """
+    parser = argparse.ArgumentParser(
+        prog="polynomiograpy_cli",
+        description="Polynomiography renders. Runs interactively without arguments.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    iter_parser = subparsers.add_parser(
+        "iter", help="render a polynomial with an iterative method"
+    )
+    _add_polynomial_arguments(iter_parser)
+    iter_parser.add_argument("--archive", help="raw render archive to save")
+    _add_viewport_arguments(iter_parser)
+    _add_output_arguments(iter_parser)
+    _add_performance_arguments(iter_parser, engine=True, tiles=True)
+    iter_parser.set_defaults(func=_command_iter)
+
+    root_parser = subparsers.add_parser(
+        "root", help="render the roots of all polynomials over a finite field"
+    )
+    root_parser.add_argument(
+        "--elements",
+        type=_parse_list(int),
+        default=[1, 0],
+        help="finite field elements (default: 1,0)",
+    )
+    root_parser.add_argument("--min-degree", type=int, default=1)
+    root_parser.add_argument("--max-degree", type=int, default=5)
+    root_parser.add_argument("--color-range", type=int, default=8)
+    root_parser.add_argument(
+        "--multi-color",
+        action="store_true",
+        help="use a different color for each degree (at most 10 degrees)",
+    )
+    root_parser.add_argument(
+        "--tone-mapping",
+        choices=list(TONE_MAPPERS),
+        default="linear",
+        help="mapping of the root counts to intensities (single color only, "
+        "default: linear)",
+    )
+    root_parser.add_argument(
+        "--archive", help="raw render archive to save (single color only)"
+    )
+    _add_viewport_arguments(root_parser)
+    _add_output_arguments(root_parser)
+    root_performance = _add_performance_arguments(
+        root_parser,
+        jobs_help="number of processes solving shards of the polynomials "
+        "(default: 1)",
+    )
+    root_performance.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="polynomials solved at once (default: %(default)s)",
+    )
+    root_performance.add_argument(
+        "--symmetry",
+        choices=list(SYMMETRY_MODES),
+        default="exact",
+        help="symmetries used to solve fewer polynomials (default: exact)",
+    )
+    root_performance.add_argument(
+        "--root-cache",
+        metavar="DIR",
+        help="directory caching the roots between renders",
+    )
+    root_parser.set_defaults(func=_command_root)
+
+    recolor_parser = subparsers.add_parser(
+        "recolor", help="colorize a raw render archive again"
+    )
+    recolor_parser.add_argument("archive", help="raw render archive")
+    recolor_parser.add_argument(
+        "--mode", choices=["counts", "smooth", "basins"], default="counts"
+    )
+    recolor_parser.add_argument(
+        "--palette", choices=["none", *palettes], default="none"
+    )
+    recolor_parser.add_argument("--gamma", type=float, default=1.0)
+    recolor_parser.add_argument(
+        "--tone-mapping",
+        choices=list(TONE_MAPPERS),
+        help="mapping of the root counts of a roots archive to intensities "
+        "(default: as rendered)",
+    )
+    recolor_parser.add_argument(
+        "--reverse-color",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="reverse the colors (default: as rendered)",
+    )
+    recolor_parser.add_argument(
+        "--crop",
+        type=_parse_list(int),
+        metavar="LEFT,TOP,RIGHT,BOTTOM",
+        help="part of the render to colorize",
+    )
+    recolor_parser.add_argument("-o", "--output", default="out.png")
+    _add_performance_arguments(recolor_parser, tiles=True)
+    recolor_parser.set_defaults(func=_command_recolor)
+
+    batch_parser = subparsers.add_parser(
+        "batch", help="render all jobs of a JSON or TOML manifest"
+    )
+    batch_parser.add_argument("manifest", help="path of the manifest")
+    _add_performance_arguments(
+        batch_parser,
+        jobs_help="number of processes (default: the workers of the manifest or "
+        "the number of CPUs)",
+    )
+    batch_parser.set_defaults(func=_command_batch, jobs=None)
+
+    bench_parser = subparsers.add_parser(
+        "bench", help="measure the throughput of this host, printed as JSON"
+    )
+    bench_parser.add_argument(
+        "--repeat", type=int, default=3, help="timed runs of each render (default: 3)"
+    )
+    bench_parser.add_argument(
+        "--scale", type=float, default=1.0, help="factor of the image sizes"
+    )
+    bench_parser.add_argument("-o", "--output", help="JSON file to save the results")
+    _add_performance_arguments(
+        bench_parser,
+        engine=True,
+        jobs_help="number of processes rendering at once (default: 1)",
+    )
+    bench_parser.set_defaults(func=_command_bench)
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="serve /{z}/{x}/{y}.png tiles of a polynomial on localhost"
+    )
+    _add_polynomial_arguments(serve_parser)
+    serve_parser.add_argument("--palette", choices=["none", *palettes], default="none")
+    _add_viewport_arguments(serve_parser)
+    group = serve_parser.add_argument_group("server")
+    group.add_argument("--host", default="127.0.0.1")
+    group.add_argument("--port", type=int, default=8000)
+    group.add_argument(
+        "--tile-size", type=int, default=256, help="tile width and height in pixels"
+    )
+    group.add_argument(
+        "--cache-mb", type=int, default=64, help="size of the tile cache in MiB"
+    )
+    _add_performance_arguments(
+        serve_parser,
+        engine=True,
+        jobs_help="number of worker processes (default: the number of CPUs)",
+    )
+    serve_parser.set_defaults(func=_command_serve, jobs=None)
+
+    return parser
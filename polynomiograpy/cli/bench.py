@@ -0,0 +1,220 @@
+import os
+import platform
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Optional
+
+import numpy as np
+
+import polynomiograpy
+from polynomiograpy.common.finite_field import FiniteField
+from polynomiograpy.common.polynomial import Polynomial
+from polynomiograpy.iterations import compute_counts_for_single_poly
+from polynomiograpy.iterations.jit import is_jit_available
+from polynomiograpy.roots.helpers import compute_screen_for_roots
+from polynomiograpy.roots.solvers import finite_field_roots
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+__all__ = ["BENCH_RENDERS", "BENCH_FIELD", "run_bench"]
+
+BENCH_VERSION = 1
+
+# Representative renders: cheap and expensive methods, low and high degrees, small
+# and large images. Sizes are multiplied by the `scale` of the benchmark.
+BENCH_RENDERS: list[dict[str, Any]] = [
+    {"method": "newton", "coefficients": [-1, 0, 0, 1], "size": 512},
+    {"method": "halley", "coefficients": [-1, 0, 0, 1], "size": 512},
+    {"method": "secant", "coefficients": [-1, 0, 0, 1], "size": 512},
+    {"method": "steffensen", "coefficients": [1, 0, -2, 0, 0, 1], "size": 1024},
+    {"method": "newton", "coefficients": [-1, 0, 0, 0, 0, 0, 0, 0, 1], "size": 256},
+    {"method": "mullers", "coefficients": [-1, 0, 0, 0, 0, 0, 0, 0, 1], "size": 256},
+]
+
+# Finite field root job: all polynomials over {-1, 0, 1} up to degree 8.
+BENCH_FIELD: dict[str, Any] = {
+    "elements": [-1, 0, 1],
+    "min_degree": 1,
+    "max_degree": 8,
+    "size": 1000,
+}
+
+
+def _warm_up(engine: str):
+    if engine == "jit":
+        is_jit_available()
+
+
+def _time_render(case: dict[str, Any], size: int, engine: str, dtype: str) -> float:
+    start = time.perf_counter()
+    with np.errstate(all="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        compute_counts_for_single_poly(
+            case["method"],
+            Polynomial(coeffs=case["coefficients"]),
+            0.1,
+            size,
+            size,
+            scale_x=6 / size,
+            scale_y=6 / size,
+            max_value=16,
+            engine=engine,
+            dtype=np.dtype(dtype),
+        )
+    return time.perf_counter() - start
+
+
+def _peak_rss() -> Optional[int]:
+    if resource is None:
+        return None
+    # kilobytes on Linux, bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    return unit * max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+
+
+def _machine() -> dict[str, Any]:
+    try:
+        import numba
+
+        numba_version: Optional[str] = numba.__version__
+    except ImportError:
+        numba_version = None
+    return {
+        "hostname": platform.node(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "numba": numba_version,
+        "polynomiograpy": polynomiograpy.__version__,
+    }
+
+
+def run_bench(
+    *,
+    engine: str = "numpy",
+    dtype: str = "complex128",
+    jobs: int = 1,
+    repeat: int = 3,
+    scale: float = 1.0,
+) -> dict[str, Any]:
+    """
+    Runs the fixed set of benchmark renders, :py:data:`BENCH_RENDERS` and
+    :py:data:`BENCH_FIELD`, and measures the throughput of this host.
+
+    Every render runs once to warm up, which compiles the JIT kernels, then
+    `repeat` times, and the fastest run is kept. With several `jobs`, each run
+    renders the case in `jobs` processes at once and reports their combined
+    throughput. The finite field job runs in this process.
+
+    Args:
+        engine (str, optional):
+            Requested engine of the iteration renders. Defaults to `"numpy"`.
+        dtype (str, optional):
+            Complex dtype of the computed points. Defaults to `"complex128"`.
+        jobs (int, optional):
+            Number of processes rendering at once. Defaults to 1.
+        repeat (int, optional):
+            Number of timed runs of each render. Defaults to 3.
+        scale (float, optional):
+            Factor applied to the image sizes. Defaults to 1.
+
+    Returns:
+        dict[str, Any]:
+            The results, which can be dumped as JSON: the `machine`, the
+            requested `engine` and the `selected_engine`, the time and
+            `megapixels_per_second` of each render, the `roots_per_second` of the
+            finite field job, the overall `megapixels_per_second` and the
+            `peak_rss_bytes` of this process and its workers (`None` where
+            unavailable).
+    """
+    selected = "jit" if engine == "jit" and is_jit_available() else "numpy"
+    executor = None
+    if jobs > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=jobs, initializer=_warm_up, initargs=(selected,)
+        )
+
+    def best_time(case: dict[str, Any], size: int) -> float:
+        args = (case, size, selected, dtype)
+        if executor is None:
+            _time_render(*args)
+            return min(_time_render(*args) for _ in range(repeat))
+        list(executor.map(_time_render, *zip(*[args] * jobs)))
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(executor.map(_time_render, *zip(*[args] * jobs)))
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    renders = []
+    try:
+        for case in BENCH_RENDERS:
+            size = max(16, int(case["size"] * scale))
+            seconds = best_time(case, size)
+            megapixels = jobs * size * size / 1e6
+            renders.append(
+                {
+                    "method": case["method"],
+                    "degree": len(case["coefficients"]) - 1,
+                    "width": size,
+                    "height": size,
+                    "seconds": seconds,
+                    "megapixels_per_second": megapixels / seconds,
+                }
+            )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    elements = tuple(BENCH_FIELD["elements"])
+    degrees = range(BENCH_FIELD["min_degree"], BENCH_FIELD["max_degree"] + 1)
+    start = time.perf_counter()
+    ff = FiniteField(elements=list(elements))
+    roots = np.concatenate([finite_field_roots(ff, d) for d in degrees])
+    roots_seconds = time.perf_counter() - start
+    size = max(16, int(BENCH_FIELD["size"] * scale))
+    screen = np.zeros([size, size, 3], dtype=np.uint8)
+    screen_buffer = np.zeros([size, size, 3], dtype=np.int64)
+    start = time.perf_counter()
+    compute_screen_for_roots(
+        roots, size, size, screen, screen_buffer, scale_x=6 / size, scale_y=6 / size
+    )
+    plot_seconds = time.perf_counter() - start
+
+    render_seconds = sum(r["seconds"] for r in renders)
+    render_megapixels = sum(r["megapixels_per_second"] * r["seconds"] for r in renders)
+    return {
+        "bench_version": BENCH_VERSION,
+        "machine": _machine(),
+        "engine": engine,
+        "selected_engine": selected,
+        "dtype": dtype,
+        "jobs": jobs,
+        "repeat": repeat,
+        "scale": scale,
+        "renders": renders,
+        "roots": {
+            "elements": list(elements),
+            "min_degree": BENCH_FIELD["min_degree"],
+            "max_degree": BENCH_FIELD["max_degree"],
+            "roots": len(roots),
+            "seconds": roots_seconds,
+            "roots_per_second": len(roots) / roots_seconds,
+            "plot_seconds": plot_seconds,
+            "plotted_roots_per_second": len(roots) / plot_seconds,
+        },
+        "megapixels_per_second": render_megapixels / render_seconds,
+        "roots_per_second": len(roots) / roots_seconds,
+        "peak_rss_bytes": _peak_rss(),
+    }
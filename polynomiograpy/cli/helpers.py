@@ -0,0 +1,513 @@
+import contextlib
+import cProfile
+import pstats
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterator, Optional
+
+import numpy as np
+
+from polynomiograpy.common.archive import (
+    create_raw_render_archive,
+    load_raw_render,
+    save_raw_render,
+)
+from polynomiograpy.common.finite_field import FiniteField
+from polynomiograpy.common.png import PNGWriter, save_png
+from polynomiograpy.common.polynomial import Polynomial
+from polynomiograpy.common.raw_render import RawRender
+from polynomiograpy.iterations import compute_screen_for_single_poly
+from polynomiograpy.iterations.helpers import default_tile_size, iter_row_tiles
+from polynomiograpy.roots import (
+    compute_screen_for_finite_field_poly,
+    compute_screen_for_finite_field_poly_multi_color,
+)
+from polynomiograpy.roots.helpers import RootCache, default_colors
+from polynomiograpy.roots.solvers import DEFAULT_CHUNK_SIZE
+from polynomiograpy.roots.tone_mapping import tone_map, tone_map_options
+
+__all__ = ["Timer", "profiled", "render_iter", "render_root", "recolor"]
+
+
+class Timer:
+    """
+    Measures the time spent in the phases of a render.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases: dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Adds the time spent in the `with` block to the phase `name`.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + (
+                time.perf_counter() - start
+            )
+
+    @property
+    def total(self) -> float:
+        """
+        Returns the time since the timer was created.
+        """
+        return time.perf_counter() - self.start
+
+    def summary(self, **rates: float) -> str:
+        """
+        Returns a one line summary of the phases and the total time.
+
+        Args:
+            **rates (float):
+                Amounts processed during the render, such as `megapixels` or
+                `roots`, reported per second of total time.
+
+        Returns:
+            str: The summary.
+        """
+        total = self.total
+        parts = [f"{name} {seconds:.3f}s" for name, seconds in self.phases.items()]
+        parts.append(f"total {total:.3f}s")
+        for name, amount in rates.items():
+            parts.append(f"{amount / max(total, 1e-9):.3f} {name}/s")
+        return "Timing: " + ", ".join(parts)
+
+
+def profiled(func: Callable[[], Any], path: Optional[str] = None) -> Any:
+    """
+    Calls a function under :py:mod:`cProfile`.
+
+    Args:
+        func (Callable[[], Any]):
+            The function to call.
+        path (Optional[str], optional):
+            File to dump the statistics to, for example for `snakeviz`. Defaults to
+            `None`, which prints the 25 functions with the highest cumulative time.
+
+    Returns:
+        Any: The result of the function.
+    """
+    profile = cProfile.Profile()
+    try:
+        return profile.runcall(func)
+    finally:
+        if path:
+            profile.dump_stats(path)
+            print(f"Profile saved to {path}")
+        else:
+            pstats.Stats(profile).sort_stats("cumulative").print_stats(25)
+
+
+def _render_iter_band(
+    settings: dict[str, Any], row_start: int, row_stop: int
+) -> tuple[np.ndarray, np.ndarray]:
+    screen = np.zeros([row_stop - row_start, settings["width"], 3], dtype=np.uint8)
+    screen_buffer = np.zeros(
+        [row_stop - row_start, settings["width"], 3], dtype=np.int64
+    )
+    compute_screen_for_single_poly(
+        settings["method"],
+        Polynomial(coeffs=settings["coefficients"]),
+        settings["delta"],
+        settings["width"],
+        settings["height"],
+        screen,
+        screen_buffer,
+        scale_x=settings["scale_x"],
+        scale_y=settings["scale_y"],
+        shift_x=settings["shift_x"],
+        shift_y=settings["shift_y"],
+        max_value=settings["max_value"],
+        reverse_color=settings["reverse_color"],
+        rows=(row_start, row_stop),
+        engine=settings["engine"],
+        dtype=settings["dtype"],
+    )
+    return screen, screen_buffer[:, :, 0]
+
+
+def _map_ordered(
+    func: Callable, items: list[tuple], jobs: int
+) -> Iterator[tuple[tuple, Any]]:
+    """
+    Yields `(item, func(*item))` in the order of `items`, computing them with a
+    pool of `jobs` processes. At most `2 * jobs` results are pending at once, so
+    a slow consumer does not keep the whole image in memory.
+    """
+    if jobs <= 1:
+        for item in items:
+            yield item, func(*item)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending: list = []
+        for item in items:
+            pending.append((item, executor.submit(func, *item)))
+            if len(pending) >= 2 * jobs:
+                item_, future = pending.pop(0)
+                yield item_, future.result()
+        for item_, future in pending:
+            yield item_, future.result()
+
+
+def render_iter(
+    coefficients: list,
+    method: str,
+    delta: float,
+    max_value: int,
+    width: int,
+    height: int,
+    output: str,
+    *,
+    min_real: float = -3,
+    max_real: float = 3,
+    min_imag: float = -3,
+    max_imag: float = 3,
+    reverse_color: bool = False,
+    archive_path: Optional[str] = None,
+    engine: str = "numpy",
+    jobs: int = 1,
+    tile_size: Optional[int] = None,
+    dtype=np.complex128,
+    timer: Optional[Timer] = None,
+):
+    """
+    Renders a polynomial with an iterative method to a PNG file.
+
+    The image is computed and written band by band, so only a few bands are kept
+    in memory while the previous ones are being compressed.
+
+    Args:
+        coefficients (list):
+            Coefficients of the polynomial, from degree 0 to degree d.
+        method (str):
+            The method to use for computation.
+        delta (float):
+            The tolerance value used by the method for convergence.
+        max_value (int):
+            Maximum iteration count.
+        width (int):
+            Width of the image.
+        height (int):
+            Height of the image.
+        output (str):
+            Path of the PNG file.
+        min_real, max_real, min_imag, max_imag (float, optional):
+            Viewport of the complex plane. Defaults to [-3, 3] x [-3, 3].
+        reverse_color (bool, optional):
+            Flag to reverse the color mapping. Defaults to False.
+        archive_path (Optional[str], optional):
+            Path of a raw render archive to save the counts to. Defaults to `None`.
+        engine (str, optional):
+            Engine computing the counts. Defaults to `"numpy"`.
+        jobs (int, optional):
+            Number of processes computing bands in parallel. Defaults to 1.
+        tile_size (Optional[int], optional):
+            Number of rows of a band. Defaults to bands of about one megapixel.
+        dtype (optional):
+            Complex dtype of the computed points. Defaults to `numpy.complex128`.
+        timer (Optional[:obj:`Timer`], optional):
+            Timer to record the phases in. Defaults to `None`.
+    """
+    timer = Timer() if timer is None else timer
+    settings = {
+        "coefficients": coefficients,
+        "method": method,
+        "delta": delta,
+        "width": width,
+        "height": height,
+        "scale_x": (max_real - min_real) / width,
+        "scale_y": (max_imag - min_imag) / height,
+        "shift_x": (max_real + min_real) / 2,
+        "shift_y": (max_imag + min_imag) / 2,
+        "max_value": max_value,
+        "reverse_color": reverse_color,
+        "engine": engine,
+        "dtype": dtype,
+    }
+    archive = None
+    if archive_path:
+        archive = create_raw_render_archive(
+            archive_path,
+            width,
+            height,
+            max_value,
+            metadata={
+                "kind": "iterations",
+                **{k: v for k, v in settings.items() if k not in ("engine", "dtype")},
+                "channel": 0,
+            },
+        )
+    bands = list(iter_row_tiles(height, tile_size or default_tile_size(width)))
+    with PNGWriter(output, width, height) as writer:
+        results = _map_ordered(_render_iter_band, [(settings, *b) for b in bands], jobs)
+        while True:
+            with timer.phase("compute"):
+                result = next(results, None)
+            if result is None:
+                break
+            (_, row_start, row_stop), (screen, counts) = result
+            with timer.phase("write"):
+                writer.write_rows(screen)
+                if archive is not None:
+                    archive.counts[row_start:row_stop] = counts
+        with timer.phase("write"):
+            if archive is not None:
+                archive.counts.flush()
+    if archive is not None:
+        print(f"Raw render saved to {archive_path}")
+
+
+def render_root(
+    elements: list[int],
+    min_degree: int,
+    max_degree: int,
+    width: int,
+    height: int,
+    output: str,
+    *,
+    min_real: float = -3,
+    max_real: float = 3,
+    min_imag: float = -3,
+    max_imag: float = 3,
+    color_range: int = 8,
+    multi_color: bool = False,
+    archive_path: Optional[str] = None,
+    jobs: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    symmetry: str = "exact",
+    root_cache: Optional[str] = None,
+    tone_mapping: str = "linear",
+    timer: Optional[Timer] = None,
+) -> int:
+    """
+    Renders the roots of all polynomials over a finite field to a PNG file.
+
+    Args:
+        elements (list[int]):
+            Elements of the finite field.
+        min_degree (int):
+            Minimum degree of the polynomials.
+        max_degree (int):
+            Maximum degree of the polynomials.
+        width (int):
+            Width of the image.
+        height (int):
+            Height of the image.
+        output (str):
+            Path of the PNG file.
+        min_real, max_real, min_imag, max_imag (float, optional):
+            Viewport of the complex plane. Defaults to [-3, 3] x [-3, 3].
+        color_range (int, optional):
+            Number of color shades to represent the roots. Defaults to 8.
+        multi_color (bool, optional):
+            Flag to use a different color for each degree. Defaults to False.
+        archive_path (Optional[str], optional):
+            Path of a raw render archive to save the hits to, for single color
+            renders. Defaults to `None`.
+        jobs (int, optional):
+            Number of processes computing the roots of shards of the polynomials.
+            Defaults to 1.
+        chunk_size (int, optional):
+            Number of polynomials whose roots are computed and counted at once.
+            Defaults to `DEFAULT_CHUNK_SIZE`.
+        symmetry (str, optional):
+            Symmetries used to solve fewer polynomials, see
+            :py:func:`polynomiograpy.roots.compute_screen_for_finite_field_poly`.
+            Defaults to "exact".
+        root_cache (Optional[str], optional):
+            Directory of a cache of the roots on disk, so renders of the same
+            field with another viewport or colors do not solve the polynomials
+            again. Defaults to no cache.
+        tone_mapping (str, optional):
+            Tone mapper turning the root counts into intensities, for single color
+            renders, see :py:mod:`polynomiograpy.roots.tone_mapping`. Defaults to
+            "linear".
+        timer (Optional[:obj:`Timer`], optional):
+            Timer to record the phases in. Defaults to `None`.
+
+    Returns:
+        int: The number of roots.
+
+    Note:
+        The archive keeps the raw root counts, which :py:func:`recolor` tone maps
+        again, with the `tone_mapping` of the render or another one.
+    """
+    timer = Timer() if timer is None else timer
+    ff = FiniteField(elements=elements)
+    viewport = {
+        "scale_x": (max_real - min_real) / width,
+        "scale_y": (max_imag - min_imag) / height,
+        "shift_x": (max_real + min_real) / 2,
+        "shift_y": (max_imag + min_imag) / 2,
+    }
+    options = {
+        "chunk_size": chunk_size,
+        "workers": jobs,
+        "symmetry": symmetry,
+        "root_cache": root_cache and RootCache(root_cache),
+    }
+    screen = np.zeros([height, width, 3], dtype=np.uint8)
+    screen_buffer = np.zeros([height, width, 3], dtype=np.int64)
+    # the roots are solved and counted in chunks, so both phases are one
+    with timer.phase("roots"):
+        if multi_color:
+            compute_screen_for_finite_field_poly_multi_color(
+                ff,
+                min_degree,
+                max_degree,
+                width,
+                height,
+                screen,
+                screen_buffer,
+                **viewport,
+                color_range=color_range,
+                colors=default_colors,
+                **options,
+            )
+        else:
+            compute_screen_for_finite_field_poly(
+                ff,
+                min_degree,
+                max_degree,
+                width,
+                height,
+                screen,
+                screen_buffer,
+                **viewport,
+                color_range=color_range,
+                tone_mapping=tone_mapping,
+                **options,
+            )
+    with timer.phase("write"):
+        if archive_path and not multi_color:
+            metadata = {
+                "kind": "roots",
+                "elements": elements,
+                "min_degree": min_degree,
+                "max_degree": max_degree,
+                "color_range": color_range,
+                "tone_mapping": tone_mapping,
+                "width": width,
+                "height": height,
+                **viewport,
+                "channel": 0,
+            }
+            counts = screen_buffer[:, :, 0]
+            save_raw_render(
+                archive_path,
+                RawRender(counts, int(counts.max(initial=0)), metadata=metadata),
+            )
+            print(f"Raw render saved to {archive_path}")
+        save_png(output, screen)
+    return sum(ff.count_polynomials(d) * d for d in range(min_degree, max_degree + 1))
+
+
+def _tone_map_options(raw: RawRender, tone_mapping: str) -> dict:
+    """
+    Returns the options tone mapping the bands of the root counts of a raw render
+    of roots like the whole render, see
+    :py:func:`polynomiograpy.roots.tone_mapping.tone_map_options`.
+    """
+    options = {}
+    if tone_mapping == "linear":
+        options["color_range"] = raw.metadata["color_range"]
+    return tone_map_options(raw.counts, tone_mapping, **options)
+
+
+def recolor(
+    archive_path: str,
+    output: str,
+    *,
+    mode: str = "counts",
+    palette: Optional[str] = None,
+    gamma: float = 1.0,
+    reverse_color: Optional[bool] = None,
+    crop: Optional[tuple[int, int, int, int]] = None,
+    tile_size: Optional[int] = None,
+    tone_mapping: Optional[str] = None,
+    timer: Optional[Timer] = None,
+) -> RawRender:
+    """
+    Colorizes a raw render archive again and writes it to a PNG file band by band.
+
+    Args:
+        archive_path (str):
+            Path of the raw render archive.
+        output (str):
+            Path of the PNG file.
+        mode (str, optional):
+            Values to colorize, see :py:meth:`polynomiograpy.common.RawRender.colorize`.
+            Defaults to `"counts"`.
+        palette (Optional[str], optional):
+            Palette to use. Defaults to `None`, which writes the intensities to the
+            channel of the render.
+        gamma (float, optional):
+            Gamma applied to the normalized values. Defaults to 1.
+        reverse_color (Optional[bool], optional):
+            Flag to reverse the color mapping. Defaults to the reversal of the
+            render.
+        crop (Optional[tuple[int, int, int, int]], optional):
+            Part `(left, top, right, bottom)` of the render to colorize. Defaults to
+            the whole render.
+        tile_size (Optional[int], optional):
+            Number of rows of a band. Defaults to bands of about one megapixel.
+        tone_mapping (Optional[str], optional):
+            Tone mapper turning the root counts of a roots archive into
+            intensities, see :py:mod:`polynomiograpy.roots.tone_mapping`.
+            Defaults to the tone mapping of the render.
+        timer (Optional[:obj:`Timer`], optional):
+            Timer to record the phases in. Defaults to `None`.
+
+    Returns:
+        :obj:`polynomiograpy.common.RawRender`: The colorized (cropped) render.
+
+    Raises:
+        AssertionError: If a tone mapping is given for an archive without raw root
+        counts.
+
+    Note:
+        The root counts are tone mapped band by band with the statistics of the
+        whole render, so a crop keeps the shades of the full image.
+    """
+    timer = Timer() if timer is None else timer
+    raw = load_raw_render(archive_path)
+    tone_options = None
+    if "tone_mapping" in raw.metadata:
+        tone_mapping = tone_mapping or raw.metadata["tone_mapping"]
+        with timer.phase("tone map"):
+            tone_options = _tone_map_options(raw, tone_mapping)
+        raw.metadata["tone_mapping"] = tone_mapping
+    else:
+        assert tone_mapping is None, "The archive has no raw root counts"
+    if crop is not None:
+        raw = raw.crop(*crop)
+    if reverse_color is None:
+        reverse_color = bool(raw.metadata.get("reverse_color"))
+    channel = raw.metadata.get("channel", 0)
+    with PNGWriter(output, raw.width, raw.height) as writer:
+        for row_start, row_stop in iter_row_tiles(
+            raw.height, tile_size or default_tile_size(raw.width)
+        ):
+            screen = np.zeros([row_stop - row_start, raw.width, 3], dtype=np.uint8)
+            band = raw.crop(0, row_start, raw.width, row_stop)
+            if tone_options is not None:
+                with timer.phase("tone map"):
+                    intensities = tone_map(band.counts, tone_mapping, **tone_options)
+                band = RawRender(intensities, 255, metadata=band.metadata)
+            with timer.phase("colorize"):
+                band.colorize(
+                    mode=mode,
+                    palette=palette,
+                    gamma=gamma,
+                    reverse=reverse_color,
+                    out=screen,
+                    channel=channel if palette is None and mode != "basins" else None,
+                )
+            with timer.phase("write"):
+                writer.write_rows(screen)
+    return raw
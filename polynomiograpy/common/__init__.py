@@ -1,7 +1,24 @@
+from .archive import create_raw_render_archive, load_raw_render, save_raw_render
+from .cancel import CancelToken, DeadlineExceeded, RenderCancelled, RenderProgress
 from .finite_field import FiniteField
+from .png import PNGWriter, save_png
 from .polynomial import Polynomial
+from .raw_render import RawRender
+from .screen import create_memmap_screen, open_memmap_screen
 
 __all__ = [
+    "CancelToken",
+    "DeadlineExceeded",
     "FiniteField",
+    "PNGWriter",
     "Polynomial",
+    "RawRender",
+    "RenderCancelled",
+    "RenderProgress",
+    "create_memmap_screen",
+    "create_raw_render_archive",
+    "load_raw_render",
+    "open_memmap_screen",
+    "save_raw_render",
+    "save_png",
 ]
@@ -0,0 +1,195 @@
+import json
+import os
+from typing import Any, Optional
+
+import numpy as np
+
+from .raw_render import RawRender
+
+__all__ = ["create_raw_render_archive", "save_raw_render", "load_raw_render"]
+
+ARCHIVE_FORMAT = "polynomiograpy-raw-render"
+ARCHIVE_VERSION = 1
+METADATA_FILENAME = "metadata.json"
+
+# Number of pixels copied at once when saving a raw render.
+TILE_PIXELS = 1 << 20
+
+
+def _counts_dtype(max_value: int) -> np.dtype:
+    return np.min_scalar_type(max(int(max_value), 0))
+
+
+def _json_default(value: Any):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, complex):
+        return [value.real, value.imag]
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def _write_metadata(path: str, raw: RawRender, arrays: list[str]):
+    with open(os.path.join(path, METADATA_FILENAME), "w") as f:
+        json.dump(
+            {
+                "format": ARCHIVE_FORMAT,
+                "version": ARCHIVE_VERSION,
+                "max_value": raw.max_value,
+                "arrays": arrays,
+                "metadata": raw.metadata,
+            },
+            f,
+            indent=2,
+            default=_json_default,
+        )
+
+
+def create_raw_render_archive(
+    path: str,
+    width: int,
+    height: int,
+    max_value: int,
+    *,
+    with_basins: bool = False,
+    with_smooth: bool = False,
+    metadata: Optional[dict[str, Any]] = None,
+) -> RawRender:
+    """
+    Creates an empty raw render archive whose arrays are memory-mapped for writing.
+
+    Args:
+        path (str):
+            Directory of the archive. It is created if needed; existing archive
+            files in it are overwritten.
+        width (int):
+            Width of the render.
+        height (int):
+            Height of the render.
+        max_value (int):
+            Maximum iteration count (or intensity) of the render.
+        with_basins (bool, optional):
+            Flag to add a basin index array. Defaults to False.
+        with_smooth (bool, optional):
+            Flag to add a smooth count array. Defaults to False.
+        metadata (Optional[dict[str, Any]], optional):
+            JSON serializable parameters of the render. Defaults to an empty dict.
+
+    Returns:
+        :obj:`RawRender`:
+            Raw render whose arrays are :obj:`numpy.memmap` arrays backed by the
+            archive. The arrays can be filled tile by tile, for example by
+            passing them to
+            :py:func:`polynomiograpy.iterations.compute_counts_for_single_poly`.
+
+    Note:
+        - The counts use the smallest unsigned integer type that holds
+          `max_value`, basins are stored as `int16` and smooth counts as
+          `float32`.
+    """
+    os.makedirs(path, exist_ok=True)
+    shape = (height, width)
+    arrays = ["counts"]
+    counts = np.lib.format.open_memmap(
+        os.path.join(path, "counts.npy"),
+        mode="w+",
+        dtype=_counts_dtype(max_value),
+        shape=shape,
+    )
+    basins = None
+    if with_basins:
+        arrays.append("basins")
+        basins = np.lib.format.open_memmap(
+            os.path.join(path, "basins.npy"), mode="w+", dtype=np.int16, shape=shape
+        )
+    smooth = None
+    if with_smooth:
+        arrays.append("smooth")
+        smooth = np.lib.format.open_memmap(
+            os.path.join(path, "smooth.npy"),
+            mode="w+",
+            dtype=np.float32,
+            shape=shape,
+        )
+    raw = RawRender(counts, max_value, basins=basins, smooth=smooth, metadata=metadata)
+    _write_metadata(path, raw, arrays)
+    return raw
+
+
+def save_raw_render(path: str, raw: RawRender, *, tile_size: Optional[int] = None):
+    """
+    Saves a raw render to an archive.
+
+    Args:
+        path (str):
+            Directory of the archive. It is created if needed; existing archive
+            files in it are overwritten.
+        raw (:obj:`RawRender`):
+            The raw render to save. Its arrays may be :obj:`numpy.memmap` arrays
+            or views of a complex `screen_buffer`.
+        tile_size (Optional[int], optional):
+            Number of rows copied at once. Defaults to tiles of about one
+            megapixel.
+
+    Note:
+        - Counts are clipped to `[0, max_value]` when they are stored.
+    """
+    archive = create_raw_render_archive(
+        path,
+        raw.width,
+        raw.height,
+        raw.max_value,
+        with_basins=raw.basins is not None,
+        with_smooth=raw.smooth is not None,
+        metadata=raw.metadata,
+    )
+    if tile_size is None:
+        tile_size = max(1, TILE_PIXELS // max(raw.width, 1))
+    for row_start in range(0, raw.height, tile_size):
+        rows = slice(row_start, row_start + tile_size)
+        archive.counts[rows] = np.clip(np.real(raw.counts[rows]), 0, raw.max_value)
+        if raw.basins is not None:
+            archive.basins[rows] = raw.basins[rows]
+        if raw.smooth is not None:
+            archive.smooth[rows] = raw.smooth[rows]
+    for array in (archive.counts, archive.basins, archive.smooth):
+        if array is not None:
+            array.flush()
+
+
+def load_raw_render(path: str, *, mmap_mode: Optional[str] = "r") -> RawRender:
+    """
+    Loads a raw render from an archive.
+
+    Args:
+        path (str):
+            Directory of the archive.
+        mmap_mode (Optional[str], optional):
+            Memory mapping mode of the arrays, `"r"` for read-only, `"r+"` to
+            modify them in place, or `None` to read them into memory. Defaults to
+            `"r"`, which opens archives of any size instantly.
+
+    Returns:
+        :obj:`RawRender`: The raw render with its metadata.
+
+    Raises:
+        ValueError: If the directory is not a raw render archive.
+    """
+    with open(os.path.join(path, METADATA_FILENAME)) as f:
+        header = json.load(f)
+    if header.get("format") != ARCHIVE_FORMAT:
+        raise ValueError(f"{path} is not a raw render archive")
+    if header.get("version", 0) > ARCHIVE_VERSION:
+        raise ValueError(f"Unsupported archive version {header['version']}")
+    arrays = {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in header["arrays"]
+    }
+    return RawRender(
+        arrays["counts"],
+        header["max_value"],
+        basins=arrays.get("basins"),
+        smooth=arrays.get("smooth"),
+        metadata=header["metadata"],
+    )
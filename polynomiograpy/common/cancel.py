@@ -0,0 +1,114 @@
+import threading
+import time
+from typing import Optional
+
+__all__ = ["CancelToken", "DeadlineExceeded", "RenderCancelled", "RenderProgress"]
+
+
+class RenderCancelled(Exception):
+    """
+    Raised by a render whose :obj:`CancelToken` was cancelled.
+    """
+
+
+class DeadlineExceeded(RenderCancelled):
+    """
+    Raised by a render whose :obj:`CancelToken` ran out of time.
+    """
+
+
+class CancelToken:
+    """
+    Flag shared between a render and the code that may cancel it.
+
+    The render checks the token between tiles (and between rows for the not
+    vectorized methods) and raises :obj:`RenderCancelled` once it is cancelled, so
+    an obsolete render stops using CPU within one tile. The token can be
+    cancelled from any thread. A token with a time budget also cancels the render
+    once its deadline has passed.
+    """
+
+    def __init__(self, *, time_budget: Optional[float] = None):
+        """
+        Initialize a token that is not cancelled.
+
+        Args:
+            time_budget (Optional[float], optional):
+                Seconds from now after which the token expires. Defaults to `None`,
+                which never expires.
+        """
+        self._event = threading.Event()
+        self.deadline: Optional[float] = (
+            None if time_budget is None else time.monotonic() + time_budget
+        )
+
+    def cancel(self):
+        """
+        Cancels the renders using this token.
+        """
+        self._event.set()
+
+    @property
+    def expired(self) -> bool:
+        """
+        Returns whether the deadline of the token, a :py:func:`time.monotonic`
+        time, has passed.
+        """
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        Returns whether the token was cancelled or has expired.
+        """
+        return self._event.is_set() or self.expired
+
+    def raise_if_cancelled(self):
+        """
+        Raises :obj:`RenderCancelled` if the token was cancelled, or
+        :obj:`DeadlineExceeded` if it has expired.
+
+        Raises:
+            RenderCancelled: If the token was cancelled.
+            DeadlineExceeded: If the token has expired.
+        """
+        if self._event.is_set():
+            raise RenderCancelled("Render cancelled")
+        if self.expired:
+            raise DeadlineExceeded("Render deadline exceeded")
+
+
+class RenderProgress:
+    """
+    Tells how far a render bounded in time got.
+    """
+
+    def __init__(self, level: Optional[int], completed: float, elapsed: float):
+        """
+        Initialize the progress.
+
+        Args:
+            level (Optional[int]):
+                Pixel stride of the finest level computed for the whole image, 1
+                for full resolution, or `None` if no level was finished.
+            completed (float):
+                Fraction of the pixels computed at full resolution, in [0, 1].
+            elapsed (float):
+                Duration of the render in seconds.
+        """
+        self.level = level
+        self.completed = completed
+        self.elapsed = elapsed
+
+    @property
+    def complete(self) -> bool:
+        """
+        Returns whether the whole image was computed at full resolution.
+        """
+        return self.level == 1
+
+    def __repr__(self) -> str:
+        return (
+            f"RenderProgress(level={self.level}, completed={self.completed:.3f}, "
+            f"elapsed={self.elapsed:.3f})"
+        )
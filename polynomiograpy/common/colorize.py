@@ -0,0 +1,319 @@
+from typing import Optional, Union
+
+import numpy as np
+
+__all__ = [
+    "palettes",
+    "get_palette",
+    "build_lut",
+    "colorize_counts",
+    "colorize_smooth",
+    "colorize_basins",
+]
+
+# Control colors of the named palettes, interpolated linearly from the first color
+# (value 0) to the last color (max value).
+palettes: dict[str, np.ndarray] = {
+    "gray": np.array([[0, 0, 0], [255, 255, 255]], dtype=np.uint8),
+    "fire": np.array(
+        [[0, 0, 0], [128, 0, 0], [255, 96, 0], [255, 224, 64], [255, 255, 255]],
+        dtype=np.uint8,
+    ),
+    "ocean": np.array(
+        [[0, 0, 32], [0, 64, 128], [0, 160, 192], [160, 240, 255]],
+        dtype=np.uint8,
+    ),
+    "rainbow": np.array(
+        [
+            [255, 0, 0],
+            [255, 160, 0],
+            [255, 255, 0],
+            [0, 255, 0],
+            [0, 160, 255],
+            [0, 0, 255],
+            [160, 0, 255],
+        ],
+        dtype=np.uint8,
+    ),
+}
+
+# Number of entries of the lookup table used for continuous values.
+SMOOTH_LUT_SIZE = 1024
+
+# Number of pixels colorized at once for memory-mapped arrays.
+TILE_PIXELS = 1 << 20
+
+Palette = Union[str, np.ndarray, None]
+
+
+def get_palette(palette: Palette) -> Optional[np.ndarray]:
+    """
+    Resolves a palette.
+
+    Args:
+        palette (str | :obj:`numpy.ndarray` | None):
+            Name of one of the `palettes`, an array of control colors of shape
+            `(n, 3)`, or `None` for a single channel intensity mapping.
+
+    Returns:
+        Optional[:obj:`numpy.ndarray`]: Control colors of shape `(n, 3)` or `None`.
+
+    Raises:
+        KeyError: If the palette name is unknown.
+    """
+    if palette is None:
+        return None
+    if isinstance(palette, str):
+        return palettes[palette]
+    palette = np.asarray(palette)
+    assert palette.ndim == 2 and palette.shape[1] == 3, "Wrong shape for palette"
+    return palette
+
+
+def build_lut(
+    max_value: int,
+    *,
+    palette: Palette = None,
+    gamma: float = 1.0,
+    reverse: bool = False,
+    size: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Builds a lookup table mapping values from 0 to `max_value` to colors.
+
+    Args:
+        max_value (int):
+            Value mapped to the last color of the palette, or to 255 without a
+            palette.
+        palette (str | :obj:`numpy.ndarray` | None, optional):
+            Palette to use, see :py:func:`get_palette`. Defaults to `None`.
+        gamma (float, optional):
+            Gamma applied to the normalized values before the lookup. Defaults to
+            1.
+        reverse (bool, optional):
+            Flag to reverse the color mapping. Defaults to False.
+        size (Optional[int], optional):
+            Number of entries of the table. Defaults to `max_value + 1`, one entry
+            per integer value.
+
+    Returns:
+        :obj:`numpy.ndarray`:
+            Table of shape `(size,)` without a palette, `(size, 3)` otherwise, with
+            `numpy.uint8` colors.
+
+    Note:
+        - Without a palette and with `gamma` 1 the table reproduces the historical
+          mapping `value / max_value * 255`.
+    """
+    assert max_value > 0, "max_value must be positive"
+    if size is None:
+        levels = np.arange(int(max_value) + 1)
+    else:
+        levels = np.linspace(0, max_value, size)
+    values = levels / max_value
+    if gamma != 1.0:
+        values = values**gamma
+    if reverse:
+        values = values[::-1]
+    colors = get_palette(palette)
+    if colors is None:
+        return (values * 255).astype(np.uint8)
+    positions = np.linspace(0, 1, len(colors))
+    lut = np.empty((len(values), 3), dtype=np.uint8)
+    for c in range(3):
+        lut[:, c] = np.interp(values, positions, colors[:, c]).astype(np.uint8)
+    return lut
+
+
+def _as_indices(values: np.ndarray) -> np.ndarray:
+    if np.iscomplexobj(values):
+        values = values.real
+    if values.dtype.kind not in "iu":
+        values = values.astype(np.int64)
+    return values
+
+
+def _resolve_tile_size(
+    values: np.ndarray, out: np.ndarray, tile_size: Optional[int]
+) -> int:
+    height = values.shape[0]
+    if tile_size is None:
+        tile_size = height
+        if isinstance(values, np.memmap) or isinstance(out, np.memmap):
+            tile_size = TILE_PIXELS // max(values.size // max(height, 1), 1)
+    return max(1, tile_size)
+
+
+def _apply_lut(
+    lut: np.ndarray,
+    indices: np.ndarray,
+    out: Optional[np.ndarray],
+    channel: Optional[int],
+    tile_size: Optional[int],
+) -> np.ndarray:
+    height = indices.shape[0]
+    if out is None:
+        out = np.empty(indices.shape + lut.shape[1:], dtype=np.uint8)
+    tile_size = _resolve_tile_size(indices, out, tile_size)
+    for row_start in range(0, height, tile_size):
+        rows = slice(row_start, row_start + tile_size)
+        colors = lut.take(_as_indices(indices[rows]), axis=0, mode="clip")
+        if channel is not None:
+            out[rows, :, channel] = colors
+        elif lut.ndim > 1:
+            out[rows, :, :3] = colors
+        else:
+            out[rows] = colors
+    return out
+
+
+def colorize_counts(
+    counts: np.ndarray,
+    max_value: int,
+    *,
+    palette: Palette = None,
+    gamma: float = 1.0,
+    reverse: bool = False,
+    out: Optional[np.ndarray] = None,
+    channel: Optional[int] = None,
+    tile_size: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Maps iteration counts to colors with a lookup table.
+
+    Args:
+        counts (:obj:`numpy.ndarray`):
+            Iteration counts of shape `(height, width)`. Counts outside of
+            `[0, max_value]` are clipped.
+        max_value (int):
+            Maximum iteration count.
+        palette (str | :obj:`numpy.ndarray` | None, optional):
+            Palette to use, see :py:func:`get_palette`. Without a palette the
+            counts are mapped to intensities of a single channel. Defaults to
+            `None`.
+        gamma (float, optional):
+            Gamma applied to the normalized counts. Defaults to 1.
+        reverse (bool, optional):
+            Flag to reverse the color mapping. Defaults to False.
+        out (Optional[:obj:`numpy.ndarray`], optional):
+            Screen to write the colors to. Defaults to a new array.
+        channel (Optional[int], optional):
+            Channel of `out` to write the intensities to when no palette is used.
+            Defaults to `None`, which writes to `out` directly.
+        tile_size (Optional[int], optional):
+            Number of rows mapped at once. Defaults to all rows, or to tiles of
+            about one megapixel for memory-mapped arrays.
+
+    Returns:
+        :obj:`numpy.ndarray`:
+            The colors, `(height, width)` without a palette and
+            `(height, width, 3)` with one, or `out` when given.
+    """
+    lut = build_lut(max_value, palette=palette, gamma=gamma, reverse=reverse)
+    return _apply_lut(lut, counts, out, channel, tile_size)
+
+
+def colorize_smooth(
+    smooth: np.ndarray,
+    max_value: int,
+    *,
+    palette: Palette = None,
+    gamma: float = 1.0,
+    reverse: bool = False,
+    out: Optional[np.ndarray] = None,
+    channel: Optional[int] = None,
+    tile_size: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Maps continuous (smooth) iteration counts to colors with a lookup table.
+
+    Args:
+        smooth (:obj:`numpy.ndarray`):
+            Smooth iteration counts of shape `(height, width)`.
+        max_value (int):
+            Maximum iteration count.
+        palette (str | :obj:`numpy.ndarray` | None, optional):
+            Palette to use, see :py:func:`get_palette`. Defaults to `None`.
+        gamma (float, optional):
+            Gamma applied to the normalized values. Defaults to 1.
+        reverse (bool, optional):
+            Flag to reverse the color mapping. Defaults to False.
+        out (Optional[:obj:`numpy.ndarray`], optional):
+            Screen to write the colors to. Defaults to a new array.
+        channel (Optional[int], optional):
+            Channel of `out` to write the intensities to when no palette is used.
+            Defaults to `None`.
+        tile_size (Optional[int], optional):
+            Number of rows mapped at once. Defaults to all rows, or to tiles of
+            about one megapixel for memory-mapped arrays.
+
+    Returns:
+        :obj:`numpy.ndarray`:
+            The colors, or `out` when given.
+    """
+    lut = build_lut(
+        max_value,
+        palette=palette,
+        gamma=gamma,
+        reverse=reverse,
+        size=SMOOTH_LUT_SIZE,
+    )
+    scale = (SMOOTH_LUT_SIZE - 1) / max_value
+    height = smooth.shape[0]
+    if out is None:
+        out = np.empty(smooth.shape + lut.shape[1:], dtype=np.uint8)
+    step = _resolve_tile_size(smooth, out, tile_size)
+    for row_start in range(0, height, step):
+        rows = slice(row_start, row_start + step)
+        indices = np.nan_to_num(np.rint(smooth[rows] * scale), nan=0.0)
+        _apply_lut(lut, indices, out[rows], channel, None)
+    return out
+
+
+def colorize_basins(
+    basins: np.ndarray,
+    counts: np.ndarray,
+    max_value: int,
+    *,
+    palette: Palette = "rainbow",
+    gamma: float = 1.0,
+    reverse: bool = True,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Colors each pixel by the root it converged to, shaded by its iteration count.
+
+    Args:
+        basins (:obj:`numpy.ndarray`):
+            Index of the root of each pixel, negative for pixels without a root.
+        counts (:obj:`numpy.ndarray`):
+            Iteration counts of the same shape.
+        max_value (int):
+            Maximum iteration count.
+        palette (str | :obj:`numpy.ndarray`, optional):
+            Palette whose control colors are used for the roots in order.
+            Defaults to `"rainbow"`.
+        gamma (float, optional):
+            Gamma applied to the shading. Defaults to 1.
+        reverse (bool, optional):
+            Flag to reverse the shading. By default pixels converging quickly are
+            the brightest. Defaults to True.
+        out (Optional[:obj:`numpy.ndarray`], optional):
+            Screen of shape `(height, width, 3)` to write the colors to. Defaults
+            to a new array.
+
+    Returns:
+        :obj:`numpy.ndarray`: The colors of shape `(height, width, 3)`.
+    """
+    colors = get_palette(palette)
+    assert colors is not None, "A palette is required for basins"
+    # last entry is black, used for pixels without a root
+    basin_lut = np.concatenate([colors, np.zeros((1, 3), colors.dtype)])
+    basin_indices = np.where(basins < 0, len(colors), basins % len(colors))
+    shade = build_lut(max_value, gamma=gamma, reverse=reverse)
+    shades = shade.take(_as_indices(counts), mode="clip")
+    result = basin_lut[basin_indices] * (shades[..., np.newaxis] / 255)
+    if out is None:
+        out = np.empty(basins.shape + (3,), dtype=np.uint8)
+    out[..., :3] = result
+    return out
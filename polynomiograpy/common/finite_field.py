@@ -1,3 +1,5 @@
+from typing import Iterator
+
 import numpy as np
 
 __all__ = ["FiniteField"]
@@ -29,35 +31,137 @@ class FiniteField:
             List[poly.Polynomial]: A list of polynomials over the finite field.
         """
         polynomials = []
-        coefs = self._generate_coeffs(degree, False)
-        for coef in coefs:
-            polynomials.append(np.polynomial.Polynomial(coef=coef))
+        for chunk in self.iter_coefficient_chunks(degree):
+            for coef in chunk:
+                polynomials.append(np.polynomial.Polynomial(coef=coef))
         return polynomials
 
-    def _generate_coeffs(self, degree, allow_zero):
+    def count_polynomials(self, degree) -> int:
+        """
+        Counts the polynomials of the specified degree over the finite field.
+
+        Args:
+            degree (int): The degree of the polynomials.
+
+        Returns:
+            int: The number of polynomials, whose leading coefficient is not zero.
         """
-        Generates the coefficients for polynomials of the specified degree.
+        nonzero = sum(1 for element in self.elements if element != 0)
+        return nonzero * len(self.elements) ** degree
+
+    def coefficients_at(self, degree, indices) -> np.ndarray:
+        """
+        Returns the coefficients of the polynomials of the specified degree at
+        given indices of the enumeration, without enumerating the others.
+
+        The index of a polynomial is a mixed radix number: its digits are the
+        positions of the coefficients in `elements`, the constant term being the
+        least significant digit, except that the most significant digit is the
+        position of the leading coefficient among the elements that are not zero.
 
         Args:
             degree (int): The degree of the polynomials.
-            allow_zero (bool): Flag indicating whether to allow zero coefficients.
+            indices (int | np.ndarray): Index or indices of the polynomials, from 0
+                to :py:meth:`count_polynomials` excluded.
 
         Returns:
-            List[List[int]]: A list of coefficient lists for the polynomials.
+            np.ndarray: The coefficients, from the constant term to the leading
+            coefficient, of shape `(degree + 1,)` for one index or
+            `(len(indices), degree + 1)` for an array of indices.
+
+        Raises:
+            AssertionError: If an index is out of range.
+        """
+        elements = np.asarray(self.elements)
+        nonzero = elements[elements != 0]
+        indices = np.asarray(indices, dtype=np.int64)
+        assert np.all(indices >= 0), "Index out of range"
+        assert np.all(indices < self.count_polynomials(degree)), "Index out of range"
+        coeffs = np.empty(indices.shape + (degree + 1,), dtype=elements.dtype)
+        rest = indices.copy()
+        for position in range(degree):
+            coeffs[..., position] = elements[rest % len(elements)]
+            rest //= len(elements)
+        coeffs[..., degree] = nonzero[rest]
+        return coeffs
+
+    def indices_of(self, coeffs) -> np.ndarray:
+        """
+        Returns the indices of polynomials in the enumeration of their degree, the
+        inverse of :py:meth:`coefficients_at`.
+
+        Args:
+            coeffs (np.ndarray): Coefficients of a polynomial per row, from the
+                constant term to the leading coefficient, which must not be zero.
+
+        Returns:
+            np.ndarray: The index of each polynomial, with the shape of `coeffs`
+            without its last axis.
+
+        Raises:
+            AssertionError: If a coefficient is not an element of the field.
         """
-        leading_coeffs = (
-            self.elements
-            if allow_zero
-            else list(filter(lambda x: x != 0, self.elements))
+        elements = np.asarray(self.elements)
+        nonzero = elements[elements != 0]
+        coeffs = np.asarray(coeffs)
+        indices = _positions(nonzero, coeffs[..., -1])
+        for position in reversed(range(coeffs.shape[-1] - 1)):
+            indices = indices * len(elements) + _positions(
+                elements, coeffs[..., position]
+            )
+        return indices
+
+    def iter_coefficient_chunks(
+        self, degree, chunk_size=4096, start=0, stop=None
+    ) -> Iterator[np.ndarray]:
+        """
+        Lazily generates the coefficients of the polynomials of the specified
+        degree, one chunk of rows at a time, so the memory used does not grow with
+        the number of polynomials.
+
+        Args:
+            degree (int): The degree of the polynomials to generate.
+            chunk_size (int): Maximum number of polynomials per chunk. Defaults to
+                4096.
+            start (int): Index of the first polynomial, see
+                :py:meth:`coefficients_at`. Defaults to 0.
+            stop (Optional[int]): Index after the last polynomial. Defaults to
+                :py:meth:`count_polynomials`. With `start`, the polynomials can be
+                split between workers.
+
+        Yields:
+            np.ndarray: Arrays of shape `(n, degree + 1)` with the coefficients of
+            a polynomial per row, from the constant term to the leading
+            coefficient, in the order of :py:meth:`generate_polynomials`.
+        """
+        count = self.count_polynomials(degree)
+        stop = count if stop is None else stop
+        assert 0 <= start <= stop <= count, "Index range out of range"
+        assert count <= np.iinfo(np.int64).max, "Too many polynomials to enumerate"
+        for chunk_start in range(start, stop, chunk_size):
+            chunk_stop = min(chunk_start + chunk_size, stop)
+            yield self.coefficients_at(degree, np.arange(chunk_start, chunk_stop))
+
+    def coefficient_matrix(self, degree) -> np.ndarray:
+        """
+        Generates the coefficients of the polynomials of the specified degree over
+        the finite field as one array.
+
+        Args:
+            degree (int): The degree of the polynomials to generate.
+
+        Returns:
+            np.ndarray: Array of shape `(count, degree + 1)` with the coefficients of
+            a polynomial per row, from the constant term to the leading
+            coefficient, in the order of :py:meth:`generate_polynomials`.
+
+        Note:
+            Use :py:meth:`iter_coefficient_chunks` for degrees with too many
+            polynomials to hold at once.
+        """
+        return self.coefficients_at(
+            degree, np.arange(self.count_polynomials(degree), dtype=np.int64)
         )
-        res = []
-        for leading_coef in leading_coeffs:
-            if degree == 0:
-                res.append([leading_coef])
-            else:
-                for coefs in self._generate_coeffs(degree - 1, True):
-                    res.append([*coefs, leading_coef])
-        return res
 
     def __str__(self):
         """
@@ -67,3 +171,11 @@ class FiniteField:
             str: A string representation of the finite field.
         """
         return str(self.elements)
+
+
+def _positions(values: np.ndarray, items: np.ndarray) -> np.ndarray:
+    order = np.argsort(values, kind="stable")
+    found = np.searchsorted(values, items, sorter=order)
+    positions = order[np.minimum(found, len(values) - 1)]
+    assert np.all(values[positions] == items), "Coefficient not in the field"
+    return positions.astype(np.int64)
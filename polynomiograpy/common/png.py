@@ -0,0 +1,183 @@
+import queue
+import struct
+import threading
+import zlib
+from typing import BinaryIO, Optional, Union
+
+import numpy as np
+
+__all__ = ["PNGWriter", "save_png"]
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_COLOR_TYPES = {
+    1: 0,  # grayscale
+    2: 4,  # grayscale with alpha
+    3: 2,  # RGB
+    4: 6,  # RGBA
+}
+
+
+class PNGWriter:
+    """
+    Writes a PNG image incrementally, a band of rows at a time.
+
+    Rows are compressed and written by a background thread, so compression of
+    finished rows overlaps with the computation of the next ones. Only a bounded
+    number of pending bands is kept in memory.
+    """
+
+    def __init__(
+        self,
+        file: Union[str, BinaryIO],
+        width: int,
+        height: int,
+        *,
+        channels: int = 3,
+        compress_level: int = 6,
+        max_pending: int = 2,
+    ):
+        """
+        Initialize the writer and write the PNG header.
+
+        Args:
+            file (str | BinaryIO):
+                Path of the output file or a binary file object.
+            width (int):
+                Width of the image.
+            height (int):
+                Height of the image.
+            channels (int, optional):
+                Number of channels: 1 (gray), 2 (gray and alpha), 3 (RGB) or
+                4 (RGBA). Defaults to 3.
+            compress_level (int, optional):
+                zlib compression level from 0 to 9. Defaults to 6.
+            max_pending (int, optional):
+                Maximum number of bands waiting for compression before
+                :py:meth:`write_rows` blocks. Defaults to 2.
+        """
+        assert channels in _COLOR_TYPES, "Unsupported channel count"
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.rows_written = 0
+        self._owns_file = isinstance(file, str)
+        self._file: BinaryIO = open(file, "wb") if isinstance(file, str) else file
+        self._compressor = zlib.compressobj(compress_level)
+        self._queue: queue.Queue[Optional[np.ndarray]] = queue.Queue(max_pending)
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._file.write(_PNG_SIGNATURE)
+        self._write_chunk(
+            b"IHDR",
+            struct.pack(">IIBBBBB", width, height, 8, _COLOR_TYPES[channels], 0, 0, 0),
+        )
+        self._thread = threading.Thread(target=self._compress_worker, daemon=True)
+        self._thread.start()
+
+    def write_rows(self, rows: np.ndarray):
+        """
+        Queues the next band of rows of the image.
+
+        Args:
+            rows (:obj:`numpy.ndarray`):
+                Array of shape `(n, width, channels)` (or `(n, width)` for
+                grayscale) with the next `n` rows of the image, top to bottom.
+                The values are converted to `numpy.uint8`.
+        """
+        assert not self._closed, "Writer is closed"
+        self._raise_worker_error()
+        rows = np.asarray(rows).reshape(rows.shape[0], self.width * self.channels)
+        assert self.rows_written + rows.shape[0] <= self.height, "Too many rows"
+        # each scanline starts with its filter type, 0 means no filtering
+        scanlines = np.zeros((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+        scanlines[:, 1:] = rows
+        self.rows_written += rows.shape[0]
+        self._queue.put(scanlines)
+
+    def close(self):
+        """
+        Waits for the pending rows to be written and finishes the PNG file.
+
+        Raises:
+            AssertionError: If fewer rows than `height` were written.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        try:
+            self._raise_worker_error()
+            assert self.rows_written == self.height, "Not all rows were written"
+            self._write_chunk(b"IDAT", self._compressor.flush())
+            self._write_chunk(b"IEND", b"")
+        finally:
+            if self._owns_file:
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+            if self._owns_file:
+                self._file.close()
+
+    def _compress_worker(self):
+        while True:
+            scanlines = self._queue.get()
+            if scanlines is None:
+                return
+            if self._error is not None:
+                continue
+            try:
+                data = self._compressor.compress(scanlines.tobytes())
+                if data:
+                    self._write_chunk(b"IDAT", data)
+            except BaseException as e:
+                self._error = e
+
+    def _raise_worker_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def _write_chunk(self, chunk_type: bytes, data: bytes):
+        self._file.write(struct.pack(">I", len(data)))
+        self._file.write(chunk_type)
+        self._file.write(data)
+        self._file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(chunk_type))))
+
+
+def save_png(
+    file: Union[str, BinaryIO],
+    screen: np.ndarray,
+    *,
+    tile_size: int = 256,
+    compress_level: int = 6,
+):
+    """
+    Saves a screen as a PNG image without making a full size copy of it.
+
+    Args:
+        file (str | BinaryIO):
+            Path of the output file or a binary file object.
+        screen (:obj:`numpy.ndarray`):
+            Screen of shape `(height, width, channels)`, for example the value
+            returned by the rendering functions. May be a :obj:`numpy.memmap`.
+        tile_size (int, optional):
+            Number of rows handed to the writer at once. Defaults to 256.
+        compress_level (int, optional):
+            zlib compression level from 0 to 9. Defaults to 6.
+    """
+    height, width = screen.shape[:2]
+    channels = screen.shape[2] if screen.ndim > 2 else 1
+    with PNGWriter(
+        file, width, height, channels=channels, compress_level=compress_level
+    ) as writer:
+        for row_start in range(0, height, tile_size):
+            writer.write_rows(screen[row_start : row_start + tile_size])
@@ -0,0 +1,198 @@
+from typing import Any, Literal, Optional
+
+import numpy as np
+
+from .colorize import Palette, colorize_basins, colorize_counts, colorize_smooth
+
+__all__ = ["RawRender"]
+
+
+class RawRender:
+    """
+    Represents the raw result of a render, before any color mapping.
+
+    A raw render can be colorized any number of times with different palettes,
+    gammas or reversal without computing it again.
+    """
+
+    def __init__(
+        self,
+        counts: np.ndarray,
+        max_value: int,
+        *,
+        basins: Optional[np.ndarray] = None,
+        smooth: Optional[np.ndarray] = None,
+        metadata: Optional[dict[str, Any]] = None,
+    ):
+        """
+        Initialize the raw render.
+
+        Args:
+            counts (:obj:`numpy.ndarray`):
+                Iteration counts of shape `(height, width)`, in screen row order.
+            max_value (int):
+                Maximum iteration count of the render.
+            basins (Optional[:obj:`numpy.ndarray`], optional):
+                Index of the root each pixel converged to, negative when unknown.
+                Defaults to `None`.
+            smooth (Optional[:obj:`numpy.ndarray`], optional):
+                Continuous iteration counts. Defaults to `None`.
+            metadata (Optional[dict[str, Any]], optional):
+                Parameters of the render, such as the method, the coefficients,
+                `delta` and the viewport. Defaults to an empty dict.
+        """
+        self.counts = counts
+        self.max_value = max_value
+        self.basins = basins
+        self.smooth = smooth
+        self.metadata = {} if metadata is None else metadata
+
+    @classmethod
+    def from_screen_buffer(
+        cls,
+        screen_buffer: np.ndarray,
+        max_value: int,
+        *,
+        channel: int = 0,
+        metadata: Optional[dict[str, Any]] = None,
+    ) -> "RawRender":
+        """
+        Wraps a channel of the `screen_buffer` of a finished render without copying
+        it.
+
+        Args:
+            screen_buffer (:obj:`numpy.ndarray`):
+                The `screen_buffer` passed to
+                :py:func:`polynomiograpy.compute_screen_for_single_poly` or
+                :py:func:`polynomiograpy.roots.helpers.compute_screen_for_roots`.
+            max_value (int):
+                Maximum iteration count of the render, or the largest root count.
+            channel (int, optional):
+                Channel of the render. Defaults to 0.
+            metadata (Optional[dict[str, Any]], optional):
+                Parameters of the render. Defaults to an empty dict.
+
+        Returns:
+            :obj:`RawRender`: The raw render.
+        """
+        return cls(screen_buffer[:, :, channel], max_value, metadata=metadata)
+
+    @property
+    def width(self) -> int:
+        """
+        Returns the width of the render.
+        """
+        return self.counts.shape[1]
+
+    @property
+    def height(self) -> int:
+        """
+        Returns the height of the render.
+        """
+        return self.counts.shape[0]
+
+    def crop(self, left: int, top: int, right: int, bottom: int) -> "RawRender":
+        """
+        Returns a rectangular part of the render without copying it.
+
+        Args:
+            left (int):
+                First column of the part.
+            top (int):
+                First row of the part, in screen row order.
+            right (int):
+                Column after the last column of the part.
+            bottom (int):
+                Row after the last row of the part.
+
+        Returns:
+            :obj:`RawRender`:
+                Raw render whose arrays are views of the arrays of this render.
+        """
+        rows = slice(top, bottom)
+        columns = slice(left, right)
+        return RawRender(
+            self.counts[rows, columns],
+            self.max_value,
+            basins=None if self.basins is None else self.basins[rows, columns],
+            smooth=None if self.smooth is None else self.smooth[rows, columns],
+            metadata={**self.metadata, "crop": [left, top, right, bottom]},
+        )
+
+    def colorize(
+        self,
+        *,
+        mode: Literal["counts", "smooth", "basins"] = "counts",
+        palette: Palette = None,
+        gamma: float = 1.0,
+        reverse: bool = False,
+        out: Optional[np.ndarray] = None,
+        channel: Optional[int] = None,
+        tile_size: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Maps the raw render to colors.
+
+        Args:
+            mode (Literal["counts", "smooth", "basins"], optional):
+                Values to colorize: the iteration counts, the smooth counts, or
+                the basins shaded by the counts. Defaults to `"counts"`.
+            palette (str | :obj:`numpy.ndarray` | None, optional):
+                Palette to use, see
+                :py:func:`polynomiograpy.common.colorize.get_palette`. Defaults
+                to `None`, or to `"rainbow"` for basins.
+            gamma (float, optional):
+                Gamma applied to the normalized values. Defaults to 1.
+            reverse (bool, optional):
+                Flag to reverse the color mapping. Defaults to False.
+            out (Optional[:obj:`numpy.ndarray`], optional):
+                Screen to write the colors to. Defaults to a new array.
+            channel (Optional[int], optional):
+                Channel of `out` to write the intensities to when no palette is
+                used. Defaults to `None`.
+            tile_size (Optional[int], optional):
+                Number of rows mapped at once. Defaults to all rows, or to tiles of
+                about one megapixel for memory-mapped arrays.
+
+        Returns:
+            :obj:`numpy.ndarray`: The colors, or `out` when given.
+
+        Raises:
+            AssertionError: If the values for the requested mode are not
+            available.
+        """
+        if mode == "counts":
+            return colorize_counts(
+                self.counts,
+                self.max_value,
+                palette=palette,
+                gamma=gamma,
+                reverse=reverse,
+                out=out,
+                channel=channel,
+                tile_size=tile_size,
+            )
+        elif mode == "smooth":
+            assert self.smooth is not None, "Render has no smooth values"
+            return colorize_smooth(
+                self.smooth,
+                self.max_value,
+                palette=palette,
+                gamma=gamma,
+                reverse=reverse,
+                out=out,
+                channel=channel,
+                tile_size=tile_size,
+            )
+        elif mode == "basins":
+            assert self.basins is not None, "Render has no basins"
+            return colorize_basins(
+                self.basins,
+                self.counts,
+                self.max_value,
+                palette="rainbow" if palette is None else palette,
+                gamma=gamma,
+                reverse=not reverse,
+                out=out,
+            )
+        raise AssertionError("Unknown mode")
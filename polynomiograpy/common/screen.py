@@ -0,0 +1,64 @@
+import numpy as np
+
+__all__ = ["create_memmap_screen", "open_memmap_screen"]
+
+
+def create_memmap_screen(
+    filename: str,
+    width: int,
+    height: int,
+    *,
+    channels: int = 3,
+    dtype=np.uint8,
+) -> np.memmap:
+    """
+    Creates a zero filled screen array backed by a `.npy` file on disk.
+
+    Args:
+        filename (str):
+            Path of the `.npy` file to create. An existing file is overwritten.
+        width (int):
+            Width of the screen.
+        height (int):
+            Height of the screen.
+        channels (int, optional):
+            Number of color channels. Defaults to 3.
+        dtype (optional):
+            Data type of the screen. Use `numpy.uint8` for screens and
+            `numpy.int64` or `numpy.complex128` for screen buffers. Defaults to
+            `numpy.uint8`.
+
+    Returns:
+        :obj:`numpy.memmap`:
+            Memory-mapped array of shape `(height, width, channels)`.
+
+    Note:
+        - The array can be passed as `screen` or `screen_buffer` to the rendering
+          functions, which then write to it tile by tile.
+        - The file is a regular `.npy` file, so a finished render can be reopened
+          with :py:func:`open_memmap_screen` or :py:func:`numpy.load`.
+    """
+    return np.lib.format.open_memmap(
+        filename,
+        mode="w+",
+        dtype=dtype,
+        shape=(height, width, channels),
+    )
+
+
+def open_memmap_screen(filename: str, *, mode: str = "r") -> np.memmap:
+    """
+    Opens a screen array previously created with :py:func:`create_memmap_screen`.
+
+    Args:
+        filename (str):
+            Path of the `.npy` file.
+        mode (str, optional):
+            Memory mapping mode, `"r"` for read-only or `"r+"` to modify the
+            screen in place. Defaults to `"r"`.
+
+    Returns:
+        :obj:`numpy.memmap`:
+            Memory-mapped array of shape `(height, width, channels)`.
+    """
+    return np.load(filename, mmap_mode=mode)
@@ -1,13 +1,31 @@
-from typing import Literal, Callable
+import asyncio
+import functools
+import time
+from concurrent.futures import Executor
+from typing import Literal, Callable, Optional
 import numpy as np
+from polynomiograpy.common.cancel import (
+    CancelToken,
+    DeadlineExceeded,
+    RenderProgress,
+)
 from polynomiograpy.common.polynomial import Polynomial
+from polynomiograpy.common.raw_render import RawRender
 from . import helpers
+from . import jit
 from . import methods
+from .jit import available_engines
 from .methods import available_methods
 
 __all__ = [
     "compute_screen_for_single_poly",
+    "compute_counts_for_single_poly",
+    "compute_counts_progressive",
+    "compute_screen_for_single_poly_async",
+    "compute_counts_for_single_poly_async",
+    "get_method_func",
     "available_methods",
+    "available_engines",
 ]
 
 
@@ -41,6 +59,13 @@ def compute_screen_for_single_poly(
     reverse_color=False,
     channel: int = 0,
     multithread: bool = False,
+    tile_size: Optional[int] = None,
+    rows: Optional[tuple[int, int]] = None,
+    engine: Literal["numpy", "jit"] = "numpy",
+    grid_cache: Optional[helpers.GridCache] = None,
+    dtype=np.complex128,
+    cancel_token: Optional[CancelToken] = None,
+    on_tile: Optional[Callable[[int, int], None]] = None,
 ):
     """
     Computes a screen representation for a single polynomial by evaluating
@@ -82,6 +107,34 @@ def compute_screen_for_single_poly(
             Color channel for color mapping. Defaults to 0.
         multithread (bool, optional):
             Flag indicating whether to use multithreading. Defaults to False.
+        tile_size (Optional[int], optional):
+            Number of rows computed at once. Defaults to the whole screen, or to
+            tiles of about one megapixel when `screen` or `screen_buffer` is a
+            :obj:`numpy.memmap`.
+        rows (Optional[tuple[int, int]], optional):
+            Band `(row_start, row_stop)` of the rows of the whole screen to
+            compute. `screen` and `screen_buffer` then only hold the
+            `row_stop - row_start` rows of the band. Defaults to the whole screen.
+        engine (Literal["numpy", "jit"], optional):
+            Engine computing the vectorized methods. `"jit"` runs a Numba compiled
+            loop per pixel, in parallel over rows, and gives exactly the same
+            results as `"numpy"`. Defaults to `"numpy"`.
+        grid_cache (Optional[:obj:`helpers.GridCache`], optional):
+            Cache of the grids of the complex plane, shared by renders of the
+            same viewport. Used by the vectorized methods. Defaults to `None`.
+        dtype (optional):
+            Complex dtype of the points computed by the vectorized methods with the
+            `"numpy"` engine. `numpy.complex64` halves their memory but is less
+            precise.
+            Defaults to `numpy.complex128`.
+        cancel_token (Optional[:obj:`polynomiograpy.common.CancelToken`], optional):
+            Token checked between tiles, or between rows and pixels for the `old_`
+            methods. Without a `tile_size`, the screen is then computed in tiles of
+            about `helpers.CANCEL_TILE_PIXELS` pixels. Defaults to `None`.
+        on_tile (Optional[Callable[[int, int], None]], optional):
+            Called by the vectorized methods after each tile with the number of
+            rows computed so far and the number of rows to compute. Defaults to
+            `None`.
 
     Returns:
         np.ndarray:
@@ -89,20 +142,613 @@ def compute_screen_for_single_poly(
 
     Raises:
         AssertionError: If the specified method is not supported.
+        RenderCancelled: If `cancel_token` was cancelled, which leaves the screen
+            partly computed.
 
     Note:
         - The `method` argument specifies the numerical method to use for computation.
         - The `poly` argument should be an instance of the Polynomial class.
         - The `delta` argument defines the tolerance value used for convergence.
         - The resulting screen representation is stored in the `screen` array.
-        - The color values are scaled to the range [0, 255].
+        - The color values are scaled to the range [0, 255]. Only `channel` of the
+          screen is updated, and `screen_buffer[:, :, channel]` holds the raw
+          iteration counts.
         - By default, the function uses vectorized computation if available,
           otherwise it falls back to individual computation for each point.
         - Set the `multithread` flag to True to enable multithreading for not vectorized
           computation.
+        - `screen` and `screen_buffer` may be :obj:`numpy.memmap` arrays (see
+          :py:func:`polynomiograpy.common.create_memmap_screen`). They are written
+          tile by tile, so images larger than memory can be rendered.
+        - With `rows`, an image can be computed band by band with band sized
+          arrays, for example to stream it to a
+          :py:class:`polynomiograpy.common.PNGWriter`.
+        - The `"jit"` engine falls back to `"numpy"` when Numba is not installed,
+          see :py:func:`polynomiograpy.iterations.jit.is_jit_available`.
 
     """
+    func = get_method_func(method, poly, delta, max_value, engine=engine)
+    if not method.startswith("old"):
+        return helpers.compute_np_screen_vectorized(
+            func,
+            width,
+            height,
+            screen,
+            screen_buffer,
+            scale_x=scale_x,
+            scale_y=scale_y,
+            shift_x=shift_x,
+            shift_y=shift_y,
+            max_value=max_value,
+            reverse_color=reverse_color,
+            channel=channel,
+            tile_size=tile_size,
+            rows=rows,
+            grid_cache=grid_cache,
+            dtype=dtype,
+            cancel_token=cancel_token,
+            on_tile=on_tile,
+        )
+    elif multithread:
+        return helpers.compute_np_screen_multithread(
+            func,
+            width,
+            height,
+            screen,
+            screen_buffer,
+            scale_x=scale_x,
+            scale_y=scale_y,
+            shift_x=shift_x,
+            shift_y=shift_y,
+            max_value=max_value,
+            reverse_color=reverse_color,
+            channel=channel,
+            thread_count=16,
+            tile_size=tile_size,
+            rows=rows,
+            cancel_token=cancel_token,
+        )
+    else:
+        return helpers.compute_np_screen(
+            func,
+            width,
+            height,
+            screen,
+            screen_buffer,
+            scale_x=scale_x,
+            scale_y=scale_y,
+            shift_x=shift_x,
+            shift_y=shift_y,
+            max_value=max_value,
+            reverse_color=reverse_color,
+            channel=channel,
+            tile_size=tile_size,
+            rows=rows,
+            cancel_token=cancel_token,
+        )
+
+
+def compute_counts_for_single_poly(
+    method: Literal[
+        "newton",
+        "halley",
+        "inverse_interpolation",
+        "mullers",
+        "secant",
+        "steffensen",
+    ],
+    poly: Polynomial,
+    delta: float,
+    width: int,
+    height: int,
+    *,
+    scale_x: float = 1,
+    scale_y: float = 1,
+    shift_x: float = 0,
+    shift_y: float = 0,
+    max_value: int = 16,
+    counts: Optional[np.ndarray] = None,
+    basins: Optional[np.ndarray] = None,
+    smooth: Optional[np.ndarray] = None,
+    with_basins: bool = False,
+    with_smooth: bool = False,
+    tile_size: Optional[int] = None,
+    rows: Optional[tuple[int, int]] = None,
+    engine: Literal["numpy", "jit"] = "numpy",
+    roots: Optional[np.ndarray] = None,
+    grid_cache: Optional[helpers.GridCache] = None,
+    dtype=np.complex128,
+    cancel_token: Optional[CancelToken] = None,
+    on_tile: Optional[Callable[[int, int], None]] = None,
+) -> RawRender:
+    """
+    Computes the raw iteration counts for a single polynomial, without any color
+    mapping.
+
+    Args:
+        method (Literal["newton", "halley", "inverse_interpolation", "mullers",
+                "secant", "steffensen"]):
+
+            The method to use for computation. Must be one of the vectorized
+            methods.
+        poly (Polynomial):
+            The polynomial for which to compute the iteration counts.
+        delta (float):
+            The tolerance value used by the method for convergence.
+        width (int):
+            Width of the screen.
+        height (int):
+            Height of the screen.
+        scale_x (float, optional):
+            Scaling factor for the x-axis. Defaults to 1.
+        scale_y (float, optional):
+            Scaling factor for the y-axis. Defaults to 1.
+        shift_x (float, optional):
+            Shift value for the x-axis. Defaults to 0.
+        shift_y (float, optional):
+            Shift value for the y-axis. Defaults to 0.
+        max_value (int, optional):
+            Maximum iteration count. Defaults to 16.
+        counts (Optional[:obj:`numpy.ndarray`], optional):
+            Integer array of shape `(height, width)` to store the iteration counts,
+            for example a :obj:`numpy.memmap`. Defaults to a new array.
+        basins (Optional[:obj:`numpy.ndarray`], optional):
+            Integer array to store the index of the root each pixel converged to.
+            Defaults to `None`.
+        smooth (Optional[:obj:`numpy.ndarray`], optional):
+            Float array to store the smooth iteration counts. Defaults to `None`.
+        with_basins (bool, optional):
+            Flag to compute the basins into a new array when `basins` is not
+            given. Defaults to False.
+        with_smooth (bool, optional):
+            Flag to compute the smooth counts into a new array when `smooth` is not
+            given. Defaults to False.
+        tile_size (Optional[int], optional):
+            Number of rows computed at once. Defaults to the whole screen, or to
+            tiles of about one megapixel for memory-mapped arrays.
+        rows (Optional[tuple[int, int]], optional):
+            Band `(row_start, row_stop)` of the rows of the whole screen to
+            compute. The arrays then only hold the rows of the band. Defaults to
+            the whole screen.
+        engine (Literal["numpy", "jit"], optional):
+            Engine computing the iteration counts, see
+            :py:func:`compute_screen_for_single_poly`. Defaults to `"numpy"`.
+        roots (Optional[:obj:`numpy.ndarray`], optional):
+            Roots of the polynomial used for the basins and smooth counts.
+            Defaults to `None`, which computes them when needed.
+        grid_cache (Optional[:obj:`helpers.GridCache`], optional):
+            Cache of the grids of the complex plane. Defaults to `None`.
+        dtype (optional):
+            Complex dtype of the computed points, see
+            :py:func:`compute_screen_for_single_poly`. Defaults to
+            `numpy.complex128`.
+        cancel_token (Optional[:obj:`polynomiograpy.common.CancelToken`], optional):
+            Token checked between tiles, see
+            :py:func:`compute_screen_for_single_poly`. Defaults to `None`.
+        on_tile (Optional[Callable[[int, int], None]], optional):
+            Called after each tile with the number of rows computed so far and the
+            number of rows to compute. Defaults to `None`.
+
+    Returns:
+        :obj:`polynomiograpy.common.RawRender`:
+            The raw render, with the parameters of the computation as metadata.
+
+    Raises:
+        AssertionError: If the specified method is not supported or not vectorized.
+        RenderCancelled: If `cancel_token` was cancelled.
+
+    Note:
+        - The counts are in screen row order, like `screen_buffer` of
+          :py:func:`compute_screen_for_single_poly`.
+        - Use :py:meth:`polynomiograpy.common.RawRender.colorize` to map the
+          result to colors, as many times as needed.
+    """
+    assert not method.startswith("old"), "Raw counts need a vectorized method"
+    func = get_method_func(method, poly, delta, max_value, engine=engine)
+    offset, band_height = helpers.resolve_rows(height, rows)
+    if counts is None:
+        counts = np.zeros((band_height, width), dtype=np.int64)
+    if basins is None and with_basins:
+        basins = np.zeros((band_height, width), dtype=np.int64)
+    if smooth is None and with_smooth:
+        smooth = np.zeros((band_height, width), dtype=np.float64)
+    if roots is None and (basins is not None or smooth is not None):
+        roots = np.polynomial.polynomial.polyroots(poly.coeffs)
+    helpers.compute_np_counts_vectorized(
+        func,
+        width,
+        height,
+        counts,
+        scale_x=scale_x,
+        scale_y=scale_y,
+        shift_x=shift_x,
+        shift_y=shift_y,
+        tile_size=tile_size,
+        rows=rows,
+        roots=roots,
+        delta=delta,
+        basins=basins,
+        smooth=smooth,
+        grid_cache=grid_cache,
+        dtype=dtype,
+        cancel_token=cancel_token,
+        on_tile=on_tile,
+    )
+    metadata = {
+        "kind": "iterations",
+        "method": method,
+        "coefficients": list(poly.coeffs),
+        "delta": delta,
+        "width": width,
+        "height": height,
+        "scale_x": scale_x,
+        "scale_y": scale_y,
+        "shift_x": shift_x,
+        "shift_y": shift_y,
+        "max_value": max_value,
+        "rows": [offset, offset + band_height],
+    }
+    return RawRender(
+        counts,
+        max_value,
+        basins=basins,
+        smooth=smooth,
+        metadata=metadata,
+    )
+
+
+def compute_counts_progressive(
+    method: Literal[
+        "newton",
+        "halley",
+        "inverse_interpolation",
+        "mullers",
+        "secant",
+        "steffensen",
+    ],
+    poly: Polynomial,
+    delta: float,
+    width: int,
+    height: int,
+    *,
+    time_budget: Optional[float] = None,
+    cancel_token: Optional[CancelToken] = None,
+    levels: tuple[int, ...] = (16, 4, 1),
+    scale_x: float = 1,
+    scale_y: float = 1,
+    shift_x: float = 0,
+    shift_y: float = 0,
+    max_value: int = 16,
+    engine: Literal["numpy", "jit"] = "numpy",
+    grid_cache: Optional[helpers.GridCache] = None,
+    dtype=np.complex128,
+) -> tuple[RawRender, RenderProgress]:
+    """
+    Computes the raw iteration counts of a single polynomial from coarse to fine
+    levels, and returns the best image computed when the time budget runs out.
+
+    Each level computes one pixel out of `stride` in both directions and fills
+    the `stride` by `stride` block of the pixel with its count, so a coarse image
+    is ready long before the full resolution one. The levels are computed tile by
+    tile, and the tiles of a level overwrite the blocks of the previous level as
+    they are computed.
+
+    Args:
+        method (Literal["newton", "halley", "inverse_interpolation", "mullers",
+                "secant", "steffensen"]):
+
+            The method to use for computation. Must be one of the vectorized
+            methods.
+        poly (Polynomial):
+            The polynomial for which to compute the iteration counts.
+        delta (float):
+            The tolerance value used by the method for convergence.
+        width (int):
+            Width of the screen.
+        height (int):
+            Height of the screen.
+        time_budget (Optional[float], optional):
+            Seconds after which the render stops. Defaults to `None`, which only
+            stops when `cancel_token` is cancelled or expires.
+        cancel_token (Optional[:obj:`polynomiograpy.common.CancelToken`], optional):
+            Token checked between tiles, instead of `time_budget`. Defaults to
+            `None`.
+        levels (tuple[int, ...], optional):
+            Decreasing pixel strides of the levels, ending with 1 for full
+            resolution. Defaults to `(16, 4, 1)`, which adds about 7% to the time
+            of a full render.
+        scale_x (float, optional):
+            Scaling factor for the x-axis. Defaults to 1.
+        scale_y (float, optional):
+            Scaling factor for the y-axis. Defaults to 1.
+        shift_x (float, optional):
+            Shift value for the x-axis. Defaults to 0.
+        shift_y (float, optional):
+            Shift value for the y-axis. Defaults to 0.
+        max_value (int, optional):
+            Maximum iteration count. Defaults to 16.
+        engine (Literal["numpy", "jit"], optional):
+            Engine computing the iteration counts, see
+            :py:func:`compute_screen_for_single_poly`. Defaults to `"numpy"`.
+        grid_cache (Optional[:obj:`helpers.GridCache`], optional):
+            Cache of the grids of the complex plane. Defaults to `None`.
+        dtype (optional):
+            Complex dtype of the computed points, see
+            :py:func:`compute_screen_for_single_poly`. Defaults to
+            `numpy.complex128`.
+
+    Returns:
+        tuple[RawRender, RenderProgress]:
+            The raw render, with zero counts where no level was computed yet, and
+            how complete it is.
+
+    Raises:
+        AssertionError: If the specified method is not supported or not
+            vectorized, or if `levels` do not end with 1.
+        RenderCancelled: If `cancel_token` was cancelled before its deadline.
+
+    Note:
+        - Without a budget or a token with a deadline, the result is the same as
+          the one of :py:func:`compute_counts_for_single_poly`.
+        - The time budget is checked between tiles. The first tile is one row
+          of the coarsest level, and the next ones are sized from the measured
+          time per pixel to take about `helpers.BUDGET_TILE_SHARE` of the
+          remaining budget, so the render overruns the budget by a fraction of it
+          (or by the time of one row when a single row takes longer).
+    """
+    start = time.perf_counter()
+    assert not method.startswith("old"), "Raw counts need a vectorized method"
+    assert levels and levels[-1] == 1, "The last level must be the full resolution"
+    assert list(levels) == sorted(set(levels), reverse=True), "Levels must decrease"
+    if cancel_token is None:
+        cancel_token = CancelToken(time_budget=time_budget)
+    else:
+        assert time_budget is None, "Give the time budget to the cancel token"
+    func = get_method_func(method, poly, delta, max_value, engine=engine)
+    viewport = {
+        "scale_x": scale_x,
+        "scale_y": scale_y,
+        "shift_x": shift_x,
+        "shift_y": shift_y,
+    }
+    counts = np.zeros((height, width), dtype=np.int64)
+    finished: Optional[int] = None
+    completed = 0.0
+    pixels_done, seconds_done = 0, 0.0
+    for stride in levels:
+        level_width, level_height, level_viewport = helpers.level_viewport(
+            width, height, stride, **viewport
+        )
+        level = counts
+        if stride > 1:
+            level = np.zeros((level_height, level_width), dtype=np.int64)
+        rows_done = 0
+        while rows_done < level_height:
+            try:
+                cancel_token.raise_if_cancelled()
+            except DeadlineExceeded:
+                break
+            # tiles sized from the measured time per pixel keep the overrun of
+            # the deadline to a fraction of the remaining budget
+            tile_rows = helpers.budget_tile_rows(
+                level_width, cancel_token, pixels_done, seconds_done
+            )
+            row_stop = min(rows_done + tile_rows, level_height)
+            tile_start = time.perf_counter()
+            helpers.compute_np_counts_vectorized(
+                func,
+                level_width,
+                level_height,
+                level[rows_done:row_stop],
+                **level_viewport,
+                tile_size=row_stop - rows_done,
+                rows=(rows_done, row_stop),
+                grid_cache=grid_cache,
+                dtype=dtype,
+            )
+            seconds_done += time.perf_counter() - tile_start
+            pixels_done += (row_stop - rows_done) * level_width
+            rows_done = row_stop
+        if stride > 1:
+            helpers.upsample_level(level[:rows_done], stride, counts)
+        else:
+            completed = rows_done / height if height else 1.0
+        if rows_done < level_height:
+            break
+        finished = stride
+    metadata = {
+        "kind": "iterations",
+        "method": method,
+        "coefficients": list(poly.coeffs),
+        "delta": delta,
+        "width": width,
+        "height": height,
+        **viewport,
+        "max_value": max_value,
+        "rows": [0, height],
+    }
+    progress = RenderProgress(finished, completed, time.perf_counter() - start)
+    return RawRender(counts, max_value, metadata=metadata), progress
+
+
+async def _run_cancellable(
+    func: Callable,
+    executor: Optional[Executor],
+    cancel_token: Optional[CancelToken],
+):
+    token = CancelToken() if cancel_token is None else cancel_token
+    future = asyncio.get_running_loop().run_in_executor(
+        executor, functools.partial(func, cancel_token=token)
+    )
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        token.cancel()
+        # the worker stops at its next check; waiting for it keeps the arrays of
+        # the render from being reused while it still writes to them
+        await asyncio.wait([future])
+        if not future.cancelled():
+            future.exception()
+        raise
+
+
+async def compute_screen_for_single_poly_async(
+    method: str,
+    poly: Polynomial,
+    delta: float,
+    width: int,
+    height: int,
+    screen: np.ndarray,
+    screen_buffer: np.ndarray,
+    *,
+    executor: Optional[Executor] = None,
+    cancel_token: Optional[CancelToken] = None,
+    **kwargs,
+):
+    """
+    Runs :py:func:`compute_screen_for_single_poly` in a thread, so an event loop
+    can await it without blocking.
+
+    Args:
+        method (str):
+            The method to use for computation.
+        poly (Polynomial):
+            The polynomial for which to compute the screen representation.
+        delta (float):
+            The tolerance value used by the method for convergence.
+        width (int):
+            Width of the screen.
+        height (int):
+            Height of the screen.
+        screen (np.ndarray):
+            Screen array to store the resulting representation.
+        screen_buffer (np.ndarray):
+            Temporary buffer array for intermediate calculations.
+        executor (Optional[:obj:`concurrent.futures.Executor`], optional):
+            Thread pool running the render. Defaults to `None`, the default
+            executor of the event loop.
+        cancel_token (Optional[:obj:`polynomiograpy.common.CancelToken`], optional):
+            Token to cancel the render from another thread. Defaults to `None`,
+            which creates one.
+        **kwargs:
+            Other keyword arguments of :py:func:`compute_screen_for_single_poly`.
+
+    Returns:
+        np.ndarray: The resulting screen representation.
+
+    Raises:
+        RenderCancelled: If `cancel_token` was cancelled.
+        asyncio.CancelledError: If the awaiting task was cancelled. The render is
+            cancelled too, and stopped once this is raised.
+
+    Note:
+        - `screen` and `screen_buffer` are written from the worker thread, so the
+          executor must be a thread pool.
+        - Cancelling the task stops the render at its next tile, see
+          :py:func:`compute_screen_for_single_poly`.
+    """
+    func = functools.partial(
+        compute_screen_for_single_poly,
+        method,
+        poly,
+        delta,
+        width,
+        height,
+        screen,
+        screen_buffer,
+        **kwargs,
+    )
+    return await _run_cancellable(func, executor, cancel_token)
+
+
+async def compute_counts_for_single_poly_async(
+    method: str,
+    poly: Polynomial,
+    delta: float,
+    width: int,
+    height: int,
+    *,
+    executor: Optional[Executor] = None,
+    cancel_token: Optional[CancelToken] = None,
+    **kwargs,
+) -> RawRender:
+    """
+    Runs :py:func:`compute_counts_for_single_poly` in a thread, so an event loop
+    can await it without blocking.
+
+    Args:
+        method (str):
+            The method to use for computation. Must be a vectorized method.
+        poly (Polynomial):
+            The polynomial for which to compute the iteration counts.
+        delta (float):
+            The tolerance value used by the method for convergence.
+        width (int):
+            Width of the screen.
+        height (int):
+            Height of the screen.
+        executor (Optional[:obj:`concurrent.futures.Executor`], optional):
+            Thread pool running the render. Defaults to `None`, the default
+            executor of the event loop.
+        cancel_token (Optional[:obj:`polynomiograpy.common.CancelToken`], optional):
+            Token to cancel the render from another thread. Defaults to `None`,
+            which creates one.
+        **kwargs:
+            Other keyword arguments of :py:func:`compute_counts_for_single_poly`.
+
+    Returns:
+        :obj:`polynomiograpy.common.RawRender`: The raw render.
+
+    Raises:
+        RenderCancelled: If `cancel_token` was cancelled.
+        asyncio.CancelledError: If the awaiting task was cancelled. The render is
+            cancelled too, and stopped once this is raised.
+    """
+    func = functools.partial(
+        compute_counts_for_single_poly, method, poly, delta, width, height, **kwargs
+    )
+    return await _run_cancellable(func, executor, cancel_token)
+
+
+def get_method_func(
+    method: str,
+    poly: Polynomial,
+    delta: float,
+    max_value: int,
+    *,
+    engine: Literal["numpy", "jit"] = "numpy",
+) -> Callable:
+    """
+    Returns the function computing the iteration counts of a method.
+
+    Args:
+        method (str):
+            The method to use for computation. Must be one of the available methods.
+        poly (Polynomial):
+            The polynomial to find the roots of.
+        delta (float):
+            The tolerance value used by the method for convergence.
+        max_value (int):
+            Maximum iteration count.
+        engine (Literal["numpy", "jit"], optional):
+            Engine of the vectorized methods. The `old_` methods are not
+            vectorized and ignore it. Defaults to `"numpy"`.
+
+    Returns:
+        Callable:
+            For vectorized methods a function mapping an ndarray of complex numbers
+            to an ndarray of iteration counts, for the `old_` methods a function
+            mapping a complex number to an iteration count.
+
+    Raises:
+        AssertionError: If the specified method or engine is not supported.
+    """
     assert method in available_methods, "Unknown method"
+    assert engine in available_engines, "Unknown engine"
+    if engine == "jit":
+        jit_func = jit.get_jit_method_func(method, poly, delta, max_value)
+        if jit_func is not None:
+            return jit_func
     func: Callable[[complex], int]
     if method == "old_newton":
 
@@ -249,49 +895,4 @@ def compute_screen_for_single_poly(
     else:
         # cannot happen
         raise Exception("wtf")
-    if not method.startswith("old"):
-        return helpers.compute_np_screen_vectorized(
-            func,
-            width,
-            height,
-            screen,
-            screen_buffer,
-            scale_x=scale_x,
-            scale_y=scale_y,
-            shift_x=shift_x,
-            shift_y=shift_y,
-            max_value=max_value,
-            reverse_color=reverse_color,
-            channel=channel,
-        )
-    elif multithread:
-        return helpers.compute_np_screen_multithread(
-            func,
-            width,
-            height,
-            screen,
-            screen_buffer,
-            scale_x=scale_x,
-            scale_y=scale_y,
-            shift_x=shift_x,
-            shift_y=shift_y,
-            max_value=max_value,
-            reverse_color=reverse_color,
-            channel=channel,
-            thread_count=16,
-        )
-    else:
-        return helpers.compute_np_screen(
-            func,
-            width,
-            height,
-            screen,
-            screen_buffer,
-            scale_x=scale_x,
-            scale_y=scale_y,
-            shift_x=shift_x,
-            shift_y=shift_y,
-            max_value=max_value,
-            reverse_color=reverse_color,
-            channel=channel,
-        )
+    return func
@@ -0,0 +1,539 @@
+import math
+
+import numba
+import numpy as np
+from llvmlite import ir
+from numba import types
+from numba.extending import intrinsic
+
+# Every primitive works on complex numbers split into their real and imaginary
+# parts, so the rounding of each operation is exactly the one of the NumPy loops
+# used by :py:mod:`polynomiograpy.iterations.methods`.
+_JIT_OPTIONS = {"error_model": "numpy", "nogil": True}
+
+# NumPy reuses temporary arrays of at least this size as outputs, which swaps the
+# operands of products like `a * (b - c)` and changes their rounding with fused
+# multiply-adds. The kernels of the methods with such products take a `swap` flag.
+MIN_ELIDE_BYTES = 256 * 1024
+
+# The fused kernels use integer powers computed by binary exponentiation, like
+# NumPy does for exponents smaller than this bound.
+MAX_DEGREE = 100
+
+
+@intrinsic
+def _fma(typingctx, x, y, z):
+    sig = types.float64(types.float64, types.float64, types.float64)
+
+    def codegen(context, builder, signature, args):
+        double = ir.DoubleType()
+        fn = builder.module.declare_intrinsic(
+            "llvm.fma", [double], ir.FunctionType(double, [double] * 3)
+        )
+        return builder.call(fn, args)
+
+    return sig, codegen
+
+
+@numba.njit(**_JIT_OPTIONS)
+def mul_fma(ar, ai, br, bi):
+    return _fma(ar, br, -(ai * bi)), _fma(ar, bi, ai * br)
+
+
+@numba.njit(**_JIT_OPTIONS)
+def mul_plain(ar, ai, br, bi):
+    return ar * br - ai * bi, ar * bi + ai * br
+
+
+@numba.njit(**_JIT_OPTIONS)
+def div(ar, ai, br, bi):
+    abs_br = abs(br)
+    abs_bi = abs(bi)
+    if abs_br >= abs_bi:
+        if abs_br == 0 and abs_bi == 0:
+            return ar / abs_br, ai / abs_bi
+        rat = bi / br
+        scl = 1.0 / (br + bi * rat)
+        return (ar + ai * rat) * scl, (ai - ar * rat) * scl
+    rat = br / bi
+    scl = 1.0 / (bi + br * rat)
+    return (ar * rat + ai) * scl, (ai * rat - ar) * scl
+
+
+@numba.njit(**_JIT_OPTIONS)
+def _abs_parts(r, i):
+    r = abs(r)
+    i = abs(i)
+    r_inf = r == np.inf
+    i_inf = i == np.inf
+    if r_inf:
+        i = np.inf
+    if i_inf:
+        r = np.inf
+    r_nan = math.isnan(r)
+    i_nan = math.isnan(i)
+    if r_nan:
+        i = np.nan
+    if i_nan:
+        r = np.nan
+    larger = max(r, i)
+    smaller = min(i, r)
+    ratio = 0.0
+    if not (larger == 0 or smaller == np.inf):
+        ratio = smaller / larger
+    return larger, ratio
+
+
+@numba.njit(**_JIT_OPTIONS)
+def abs_simd_fma(r, i):
+    larger, ratio = _abs_parts(r, i)
+    return math.sqrt(_fma(ratio, ratio, 1.0)) * larger
+
+
+@numba.njit(**_JIT_OPTIONS)
+def abs_simd_plain(r, i):
+    larger, ratio = _abs_parts(r, i)
+    return math.sqrt(ratio * ratio + 1.0) * larger
+
+
+@numba.njit(**_JIT_OPTIONS)
+def abs_hypot(r, i):
+    return math.hypot(r, i)
+
+
+_DBL_MIN = np.finfo(np.float64).tiny
+_DBL_MAX = np.finfo(np.float64).max
+
+
+@numba.njit(**_JIT_OPTIONS)
+def csqrt(r, i):
+    # same algorithm as the C library `csqrt` called by NumPy
+    if not math.isfinite(r) or not math.isfinite(i):
+        if math.isinf(i):
+            return np.inf, i
+        if math.isinf(r):
+            if r < 0:
+                return (np.nan if math.isnan(i) else 0.0), math.copysign(np.inf, i)
+            return r, (np.nan if math.isnan(i) else math.copysign(0.0, i))
+        return np.nan, np.nan
+    if i == 0:
+        if r < 0:
+            return 0.0, math.copysign(math.sqrt(-r), i)
+        return abs(math.sqrt(r)), math.copysign(0.0, i)
+    if r == 0:
+        if abs(i) >= 2 * _DBL_MIN:
+            t = math.sqrt(0.5 * abs(i))
+        else:
+            t = 0.5 * math.sqrt(2 * abs(i))
+        return t, math.copysign(t, i)
+    scale = 0
+    if abs(r) > _DBL_MAX / 4:
+        scale = 1
+        r = math.ldexp(r, -2)
+        i = math.ldexp(i, -2)
+    if abs(i) > _DBL_MAX / 4:
+        scale = 1
+        if abs(r) >= 4 * _DBL_MIN:
+            r = math.ldexp(r, -2)
+        else:
+            r = 0.0
+        i = math.ldexp(i, -2)
+    elif abs(r) < 2 * _DBL_MIN and abs(i) < 2 * _DBL_MIN:
+        scale = -27
+        r = math.ldexp(r, 54)
+        i = math.ldexp(i, 54)
+    d = math.hypot(r, i)
+    if r > 0:
+        re = math.sqrt(0.5 * (d + r))
+        if scale == 1 and abs(i) < 1:
+            im = i / re
+            re = math.ldexp(re, scale)
+            scale = 0
+        else:
+            im = 0.5 * (i / re)
+    else:
+        im = math.sqrt(0.5 * (d - r))
+        if scale == 1 and abs(i) < 1:
+            re = abs(i / im)
+            im = math.ldexp(im, scale)
+            scale = 0
+        else:
+            re = abs(0.5 * (i / im))
+    if scale:
+        re = math.ldexp(re, scale)
+        im = math.ldexp(im, scale)
+    return re, math.copysign(im, i)
+
+
+@numba.njit(**_JIT_OPTIONS)
+def map_binary(op, a, b):
+    out = np.empty_like(a)
+    for i in range(a.shape[0]):
+        rr, ri = op(a[i].real, a[i].imag, b[i].real, b[i].imag)
+        out[i] = complex(rr, ri)
+    return out
+
+
+@numba.njit(**_JIT_OPTIONS)
+def map_unary(op, a):
+    out = np.empty_like(a)
+    for i in range(a.shape[0]):
+        rr, ri = op(a[i].real, a[i].imag)
+        out[i] = complex(rr, ri)
+    return out
+
+
+@numba.njit(**_JIT_OPTIONS)
+def map_abs(op, a):
+    out = np.empty(a.shape, np.float64)
+    for i in range(a.shape[0]):
+        out[i] = op(a[i].real, a[i].imag)
+    return out
+
+
+def build_kernels(mul, prod, cabs) -> dict:
+    """
+    Builds the fused per-pixel kernels of the methods for a set of primitives.
+
+    Args:
+        mul (Dispatcher):
+            Complex product used by the NumPy `multiply` and `square` loops.
+        prod (Dispatcher):
+            Complex product used by NumPy for integer powers of 3 and more.
+        cabs (Dispatcher):
+            Complex absolute value used by NumPy.
+
+    Returns:
+        dict: The kernels by method name, plus an `eval` kernel evaluating a
+        polynomial over an array, used to check the primitives against NumPy.
+    """
+
+    @numba.njit(**_JIT_OPTIONS)
+    def power(xr, xi, n):
+        if n == 0:
+            return 1.0, 0.0
+        if n == 1:
+            return xr, xi
+        if n == 2:
+            return mul(xr, xi, xr, xi)
+        if xr == 0.0 and xi == 0.0:
+            return 0.0, 0.0
+        if n == 3:
+            rr, ri = prod(xr, xi, xr, xi)
+            return prod(xr, xi, rr, ri)
+        ar, ai = 1.0, 0.0
+        pr, pi = xr, xi
+        mask = 1
+        while True:
+            if n & mask:
+                ar, ai = prod(ar, ai, pr, pi)
+            mask <<= 1
+            if n < mask:
+                break
+            pr, pi = prod(pr, pi, pr, pi)
+        return ar, ai
+
+    @numba.njit(**_JIT_OPTIONS)
+    def poly_eval(coeffs, xr, xi):
+        rr, ri = 0.0, 0.0
+        for deg in range(coeffs.shape[0]):
+            pr, pi = power(xr, xi, deg)
+            tr, ti = mul(coeffs[deg].real, coeffs[deg].imag, pr, pi)
+            rr += tr
+            ri += ti
+        return rr, ri
+
+    @numba.njit(**_JIT_OPTIONS)
+    def same(ar, ai, br, bi):
+        # bitwise equality, so converged pixels can stop without changing results
+        return (
+            ar == br
+            and ai == bi
+            and math.copysign(1.0, ar) == math.copysign(1.0, br)
+            and math.copysign(1.0, ai) == math.copysign(1.0, bi)
+        )
+
+    @numba.njit(parallel=True, **_JIT_OPTIONS)
+    def newton(x, coeffs, deriv_coeffs, delta, max_iter):
+        counts = np.zeros(x.shape, np.int64)
+        for i in numba.prange(x.shape[0]):
+            for j in range(x.shape[1]):
+                xr, xi = x[i, j].real, x[i, j].imag
+                count = 0
+                for step in range(max_iter):
+                    rr, ri = poly_eval(coeffs, xr, xi)
+                    dr, di = poly_eval(deriv_coeffs, xr, xi)
+                    zero = dr == 0 and di == 0
+                    converging = False
+                    if not zero:
+                        qr, qi = div(rr, ri, dr, di)
+                        nr, ni = xr - qr, xi - qi
+                        qr, qi = div(-rr, -ri, dr, di)
+                        converging = cabs(qr, qi) >= delta
+                    else:
+                        nr, ni = xr, xi
+                    if zero:
+                        count = max_iter - 1
+                    elif converging:
+                        count += 1
+                    if same(nr, ni, xr, xi):
+                        # the remaining steps repeat this one
+                        if converging and not zero:
+                            count += max_iter - step - 1
+                        break
+                    xr, xi = nr, ni
+                x[i, j] = complex(xr, xi)
+                counts[i, j] = count
+        return counts
+
+    @numba.njit(parallel=True, **_JIT_OPTIONS)
+    def halley(x, coeffs, deriv_coeffs, deriv_deriv_coeffs, delta, max_iter):
+        counts = np.zeros(x.shape, np.int64)
+        for i in numba.prange(x.shape[0]):
+            for j in range(x.shape[1]):
+                xr, xi = x[i, j].real, x[i, j].imag
+                count = 0
+                for step in range(max_iter):
+                    rr, ri = poly_eval(coeffs, xr, xi)
+                    dr, di = poly_eval(deriv_coeffs, xr, xi)
+                    ddr, ddi = poly_eval(deriv_deriv_coeffs, xr, xi)
+                    tr, ti = mul(rr, ri, ddr, ddi)
+                    sr, si = mul(2.0, 0.0, dr, di)
+                    sr, si = mul(sr, si, dr, di)
+                    denr, deni = -tr + sr, -ti + si
+                    zero = denr == 0 and deni == 0
+                    converging = False
+                    if not zero:
+                        sr, si = mul(2.0, 0.0, dr, di)
+                        sr, si = mul(sr, si, rr, ri)
+                        qr, qi = div(sr, si, denr, deni)
+                        nr, ni = xr - qr, xi - qi
+                        sr, si = mul(-dr, -di, rr, ri)
+                        sr, si = mul(2.0, 0.0, sr, si)
+                        qr, qi = div(sr, si, denr, deni)
+                        converging = cabs(qr, qi) >= delta
+                    else:
+                        nr, ni = xr, xi
+                    if zero:
+                        count = max_iter - 1
+                    elif converging:
+                        count += 1
+                    if same(nr, ni, xr, xi):
+                        if converging and not zero:
+                            count += max_iter - step - 1
+                        break
+                    xr, xi = nr, ni
+                x[i, j] = complex(xr, xi)
+                counts[i, j] = count
+        return counts
+
+    @numba.njit(parallel=True, **_JIT_OPTIONS)
+    def inverse_interpolation(x, coeffs, delta, max_iter):
+        counts = np.zeros(x.shape, np.int64)
+        for i in numba.prange(x.shape[0]):
+            for j in range(x.shape[1]):
+                x0r, x0i = x[i, j].real, x[i, j].imag
+                x1r, x1i = x0r - 0.1, x0i - 0.0
+                x2r, x2i = x0r + 0.1, x0i + 0.0
+                count = 0
+                for _ in range(max_iter):
+                    f0r, f0i = poly_eval(coeffs, x0r, x0i)
+                    f1r, f1i = poly_eval(coeffs, x1r, x1i)
+                    f2r, f2i = poly_eval(coeffs, x2r, x2i)
+                    non_zero = (
+                        (f2r != f1r or f2i != f1i)
+                        and (f1r != f0r or f1i != f0i)
+                        and (f2r != f0r or f2i != f0i)
+                    )
+                    zero = (
+                        (f2r == f1r and f2i == f1i)
+                        or (f1r == f0r and f1i == f0i)
+                        or (f2r == f0r and f2i == f0i)
+                    )
+                    rr, ri = x2r, x2i
+                    if non_zero:
+                        nr, ni = mul(x0r, x0i, f1r, f1i)
+                        nr, ni = mul(nr, ni, f2r, f2i)
+                        dr, di = mul(f0r - f1r, f0i - f1i, f0r - f2r, f0i - f2i)
+                        t1r, t1i = div(nr, ni, dr, di)
+                        nr, ni = mul(x1r, x1i, f0r, f0i)
+                        nr, ni = mul(nr, ni, f2r, f2i)
+                        dr, di = mul(f1r - f0r, f1i - f0i, f1r - f2r, f1i - f2i)
+                        t2r, t2i = div(nr, ni, dr, di)
+                        nr, ni = mul(x2r, x2i, f0r, f0i)
+                        nr, ni = mul(nr, ni, f1r, f1i)
+                        dr, di = mul(f2r - f1r, f2i - f1i, f2r - f0r, f2i - f0i)
+                        t3r, t3i = div(nr, ni, dr, di)
+                        rr, ri = t1r + t2r + t3r, t1i + t2i + t3i
+                    if zero:
+                        count = max_iter - 1
+                    if not (non_zero and cabs(rr - x2r, ri - x2i) >= delta):
+                        # the state is unchanged, so are the remaining steps
+                        break
+                    count += 1
+                    x0r, x0i = x1r, x1i
+                    x1r, x1i = x2r, x2i
+                    x2r, x2i = rr, ri
+                x[i, j] = complex(x0r, x0i)
+                counts[i, j] = count
+        return counts
+
+    @numba.njit(parallel=True, **_JIT_OPTIONS)
+    def mullers(x, coeffs, deriv_coeffs, delta, max_iter, swap):
+        counts = np.zeros(x.shape, np.int64)
+        for i in numba.prange(x.shape[0]):
+            for j in range(x.shape[1]):
+                x0r, x0i = x[i, j].real, x[i, j].imag
+                fr, fi = poly_eval(coeffs, x0r, x0i)
+                dr, di = poly_eval(deriv_coeffs, x0r, x0i)
+                qr, qi = div(fr, fi, dr, di)
+                x1r, x1i = x0r - qr, x0i - qi
+                fr, fi = poly_eval(coeffs, x1r, x1i)
+                dr, di = poly_eval(deriv_coeffs, x1r, x1i)
+                qr, qi = div(fr, fi, dr, di)
+                x2r, x2i = x1r - qr, x1i - qi
+                count = 0
+                for _ in range(max_iter):
+                    f0r, f0i = poly_eval(coeffs, x0r, x0i)
+                    f1r, f1i = poly_eval(coeffs, x1r, x1i)
+                    f2r, f2i = poly_eval(coeffs, x2r, x2i)
+                    qr, qi = div(x2r - x1r, x2i - x1i, x1r - x0r, x1i - x0i)
+                    q1r, q1i = 1.0 + qr, 0.0 + qi
+                    qqr, qqi = mul(qr, qi, qr, qi)
+                    # a = q * fx_2 - q * (1 + q) * fx_1 + q**2 * fx_0
+                    tr, ti = mul(qr, qi, f2r, f2i)
+                    if swap:
+                        ur, ui = mul(q1r, q1i, qr, qi)
+                    else:
+                        ur, ui = mul(qr, qi, q1r, q1i)
+                    ur, ui = mul(ur, ui, f1r, f1i)
+                    vr, vi = mul(qqr, qqi, f0r, f0i)
+                    ar, ai = tr - ur + vr, ti - ui + vi
+                    # b = (2 * q + 1) * fx_2 - (1 + q) ** 2 * fx_1 + q**2 * fx_0
+                    tr, ti = mul(2.0, 0.0, qr, qi)
+                    tr, ti = mul(tr + 1.0, ti + 0.0, f2r, f2i)
+                    ur, ui = mul(q1r, q1i, q1r, q1i)
+                    ur, ui = mul(ur, ui, f1r, f1i)
+                    br, bi = tr - ur + vr, ti - ui + vi
+                    # c = (1 + q) * fx_2
+                    cr, ci = mul(q1r, q1i, f2r, f2i)
+                    tr, ti = mul(br, bi, br, bi)
+                    ur, ui = mul(4.0, 0.0, ar, ai)
+                    ur, ui = mul(ur, ui, cr, ci)
+                    sr, si = csqrt(tr - ur, ti - ui)
+                    d1r, d1i = br + sr, bi + si
+                    d2r, d2i = br - sr, bi - si
+                    # complex maximum, the first value wins ties and NaNs
+                    if (
+                        math.isnan(d1r)
+                        or math.isnan(d1i)
+                        or (d1r > d2r and not math.isnan(d1i) and not math.isnan(d2i))
+                        or (d1r == d2r and d1i >= d2i)
+                    ):
+                        denr, deni = d1r, d1i
+                    else:
+                        denr, deni = d2r, d2i
+                    non_zero = denr != 0 or deni != 0
+                    rr, ri = x2r, x2i
+                    if non_zero:
+                        tr, ti = mul(2.0, 0.0, cr, ci)
+                        tr, ti = mul(x2r - x1r, x2i - x1i, tr, ti)
+                        tr, ti = div(tr, ti, denr, deni)
+                        rr, ri = x2r - tr, x2i - ti
+                    else:
+                        count = max_iter - 1
+                    dr, di = x1r - x0r, x1i - x0i
+                    if not (
+                        (dr != 0 or di != 0)
+                        and (x1r != x2r or x1i != x2i)
+                        and non_zero
+                        and cabs(rr - x2r, ri - x2i) >= delta
+                    ):
+                        break
+                    count += 1
+                    x0r, x0i = x1r, x1i
+                    x1r, x1i = x2r, x2i
+                    x2r, x2i = rr, ri
+                x[i, j] = complex(x0r, x0i)
+                counts[i, j] = count
+        return counts
+
+    @numba.njit(parallel=True, **_JIT_OPTIONS)
+    def secant(x, coeffs, delta, max_iter, swap):
+        counts = np.zeros(x.shape, np.int64)
+        for i in numba.prange(x.shape[0]):
+            for j in range(x.shape[1]):
+                x0r, x0i = x[i, j].real, x[i, j].imag
+                x1r, x1i = x0r - 0.1, x0i - 0.0
+                count = 0
+                for _ in range(max_iter):
+                    f0r, f0i = poly_eval(coeffs, x0r, x0i)
+                    f1r, f1i = poly_eval(coeffs, x1r, x1i)
+                    denr, deni = f1r - f0r, f1i - f0i
+                    non_zero = denr != 0 or deni != 0
+                    rr, ri = x1r, x1i
+                    if non_zero:
+                        if swap:
+                            tr, ti = mul(x1r - x0r, x1i - x0i, f1r, f1i)
+                        else:
+                            tr, ti = mul(f1r, f1i, x1r - x0r, x1i - x0i)
+                        tr, ti = div(tr, ti, denr, deni)
+                        rr, ri = x1r - tr, x1i - ti
+                    else:
+                        count = max_iter - 1
+                    if not (non_zero and cabs(rr - x1r, ri - x1i) >= delta):
+                        break
+                    count += 1
+                    x0r, x0i = x1r, x1i
+                    x1r, x1i = rr, ri
+                x[i, j] = complex(x0r, x0i)
+                counts[i, j] = count
+        return counts
+
+    @numba.njit(parallel=True, **_JIT_OPTIONS)
+    def steffensen(x, coeffs, delta, max_iter):
+        counts = np.zeros(x.shape, np.int64)
+        for i in numba.prange(x.shape[0]):
+            for j in range(x.shape[1]):
+                xr, xi = x[i, j].real, x[i, j].imag
+                count = 0
+                for _ in range(max_iter):
+                    rr, ri = poly_eval(coeffs, xr, xi)
+                    fr, fi = poly_eval(coeffs, xr + rr, xi + ri)
+                    denr, deni = fr - rr, fi - ri
+                    res_non_zero = rr != 0 or ri != 0
+                    non_zero = denr != 0 or deni != 0
+                    sr, si = xr, xi
+                    if non_zero:
+                        tr, ti = mul(rr, ri, rr, ri)
+                        tr, ti = div(tr, ti, denr, deni)
+                        sr, si = xr - tr, xi - ti
+                    elif res_non_zero:
+                        count = max_iter - 1
+                    if not (
+                        res_non_zero and non_zero and cabs(xr - sr, xi - si) >= delta
+                    ):
+                        break
+                    count += 1
+                    xr, xi = sr, si
+                x[i, j] = complex(xr, xi)
+                counts[i, j] = count
+        return counts
+
+    @numba.njit(**_JIT_OPTIONS)
+    def eval_array(coeffs, x):
+        out = np.empty_like(x)
+        for i in range(x.shape[0]):
+            rr, ri = poly_eval(coeffs, x[i].real, x[i].imag)
+            out[i] = complex(rr, ri)
+        return out
+
+    return {
+        "newton": newton,
+        "halley": halley,
+        "inverse_interpolation": inverse_interpolation,
+        "mullers": mullers,
+        "secant": secant,
+        "steffensen": steffensen,
+        "eval": eval_array,
+    }
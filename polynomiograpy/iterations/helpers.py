@@ -1,8 +1,251 @@
-from typing import Callable
+import time
+from collections import OrderedDict
+from typing import Callable, Iterator, Optional
 import numpy as np
 
 from multiprocessing.pool import ThreadPool
 
+from polynomiograpy.common.cancel import CancelToken
+from polynomiograpy.common.colorize import colorize_counts
+
+# Number of pixels per tile used when rendering into memory-mapped arrays or
+# streaming without an explicit tile size.
+DEFAULT_TILE_PIXELS = 1 << 20
+
+# Number of pixels per tile used by cancellable renders without an explicit tile
+# size, so a cancelled render stops within a fraction of a second.
+CANCEL_TILE_PIXELS = 1 << 16
+
+# Fraction of the remaining time budget one tile of a render bounded in time may
+# take, from the time per pixel measured on the previous tiles.
+BUDGET_TILE_SHARE = 0.1
+
+
+def default_tile_size(width: int) -> int:
+    """
+    Returns the number of rows of a tile of about `DEFAULT_TILE_PIXELS` pixels.
+
+    Args:
+        width (int):
+            Width of the screen.
+
+    Returns:
+        int: Number of rows per tile, at least 1.
+    """
+    return max(1, DEFAULT_TILE_PIXELS // max(width, 1))
+
+
+def resolve_tile_size(
+    width: int,
+    height: int,
+    tile_size: Optional[int],
+    *arrays: np.ndarray,
+    cancellable: bool = False,
+) -> int:
+    """
+    Resolves the number of rows rendered per tile.
+
+    Args:
+        width (int):
+            Width of the screen.
+        height (int):
+            Height of the screen.
+        tile_size (Optional[int]):
+            Requested number of rows per tile. `None` renders the whole screen as
+            a single tile unless one of the `arrays` is memory-mapped.
+        *arrays (:obj:`numpy.ndarray`):
+            Output arrays of the render. If any of them is a :obj:`numpy.memmap`
+            and `tile_size` is `None`, tiles of about
+            `DEFAULT_TILE_PIXELS` pixels are used.
+        cancellable (bool, optional):
+            Flag for renders checking a cancel token between tiles. If
+            `tile_size` is `None`, tiles of about `CANCEL_TILE_PIXELS` pixels are
+            used. Defaults to False.
+
+    Returns:
+        int: Number of rows per tile, at least 1.
+    """
+    if tile_size is None:
+        if cancellable:
+            tile_size = max(1, CANCEL_TILE_PIXELS // max(width, 1))
+        elif any(isinstance(array, np.memmap) for array in arrays):
+            tile_size = default_tile_size(width)
+        else:
+            tile_size = height
+    return max(1, int(tile_size))
+
+
+def iter_row_tiles(height: int, tile_size: int) -> Iterator[tuple[int, int]]:
+    """
+    Iterates over row bands of a screen.
+
+    Args:
+        height (int):
+            Height of the screen.
+        tile_size (int):
+            Number of rows per band.
+
+    Yields:
+        tuple[int, int]: `(row_start, row_stop)` of each band, top to bottom.
+    """
+    for row_start in range(0, height, tile_size):
+        yield row_start, min(row_start + tile_size, height)
+
+
+def resolve_rows(height: int, rows: Optional[tuple[int, int]]) -> tuple[int, int]:
+    """
+    Resolves a band of rows of the screen.
+
+    Args:
+        height (int):
+            Height of the whole screen.
+        rows (Optional[tuple[int, int]]):
+            Band `(row_start, row_stop)` of the screen, `None` for the whole screen.
+
+    Returns:
+        tuple[int, int]: Index of the first row of the band and the height of the
+        band.
+    """
+    if rows is None:
+        return 0, height
+    row_start, row_stop = rows
+    assert 0 <= row_start <= row_stop <= height, "Rows out of range"
+    return row_start, row_stop - row_start
+
+
+def compute_grid(
+    width: int,
+    height: int,
+    *,
+    scale_x: float = 1,
+    scale_y: float = 1,
+    shift_x: float = 0,
+    shift_y: float = 0,
+    row_start: int = 0,
+    row_stop: Optional[int] = None,
+    dtype=np.complex128,
+) -> np.ndarray:
+    """
+    Computes the points of the complex plane for a band of rows of the screen.
+
+    Args:
+        width (int):
+            Width of the screen.
+        height (int):
+            Height of the screen.
+        scale_x (float, optional):
+            Scaling factor for the x-axis. Defaults to 1.
+        scale_y (float, optional):
+            Scaling factor for the y-axis. Defaults to 1.
+        shift_x (float, optional):
+            Shift value for the x-axis. Defaults to 0.
+        shift_y (float, optional):
+            Shift value for the y-axis. Defaults to 0.
+        row_start (int, optional):
+            First row of the band. Defaults to 0.
+        row_stop (Optional[int], optional):
+            Row after the last row of the band. Defaults to `height`.
+        dtype (optional):
+            Complex dtype of the grid. Defaults to `numpy.complex128`.
+
+    Returns:
+        :obj:`numpy.ndarray`:
+            Array of shape `(row_stop - row_start, width)` with the point of the
+            complex plane for each pixel of the band.
+    """
+    if row_stop is None:
+        row_stop = height
+    origin_x = width / 2
+    origin_y = height / 2
+    x = (np.arange(width) - origin_x) * scale_x + shift_x
+    y = -(np.arange(row_start, row_stop) - origin_y) * scale_y + shift_y
+    grid = np.empty((row_stop - row_start, width), dtype=dtype)
+    grid.real = x[np.newaxis, :]
+    grid.imag = y[:, np.newaxis]
+    return grid
+
+
+class GridCache:
+    """
+    Caches the grids computed by :py:func:`compute_grid`, so renders of the same
+    viewport share them.
+
+    The least recently used grids are dropped when the cache holds more than
+    `max_bytes` bytes.
+    """
+
+    def __init__(self, max_bytes: int = 256 << 20):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_bytes (int, optional):
+                Maximum total size of the cached grids. Defaults to 256 MiB.
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._grids: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self._bytes = 0
+
+    def get(
+        self,
+        width: int,
+        height: int,
+        *,
+        scale_x: float = 1,
+        scale_y: float = 1,
+        shift_x: float = 0,
+        shift_y: float = 0,
+        row_start: int = 0,
+        row_stop: Optional[int] = None,
+        dtype=np.complex128,
+    ) -> np.ndarray:
+        """
+        Returns a grid, see :py:func:`compute_grid` for the arguments.
+
+        Returns:
+            :obj:`numpy.ndarray`:
+                A new copy of the grid, which the methods may update in place.
+        """
+        if row_stop is None:
+            row_stop = height
+        key = (
+            width,
+            height,
+            scale_x,
+            scale_y,
+            shift_x,
+            shift_y,
+            row_start,
+            row_stop,
+            np.dtype(dtype).str,
+        )
+        grid = self._grids.get(key)
+        if grid is not None:
+            self.hits += 1
+            self._grids.move_to_end(key)
+            return grid.copy()
+        self.misses += 1
+        grid = compute_grid(
+            width,
+            height,
+            scale_x=scale_x,
+            scale_y=scale_y,
+            shift_x=shift_x,
+            shift_y=shift_y,
+            row_start=row_start,
+            row_stop=row_stop,
+            dtype=dtype,
+        )
+        if grid.nbytes <= self.max_bytes:
+            self._grids[key] = grid.copy()
+            self._bytes += grid.nbytes
+            while self._bytes > self.max_bytes:
+                _, dropped = self._grids.popitem(last=False)
+                self._bytes -= dropped.nbytes
+        return grid
+
 
 def compute_np_screen(
     func: Callable[[complex], int],
@@ -18,6 +261,9 @@ def compute_np_screen(
     max_value: int = 16,
     reverse_color: bool = False,
     channel: int = 0,
+    tile_size: Optional[int] = None,
+    rows: Optional[tuple[int, int]] = None,
+    cancel_token: Optional[CancelToken] = None,
 ):
     """
     Computes a screen representation of a function over a complex plane.
@@ -49,6 +295,15 @@ def compute_np_screen(
             Flag to reverse the color mapping. Defaults to False.
         channel (int, optional):
             Color channel for color mapping. Defaults to 0.
+        tile_size (Optional[int], optional):
+            Number of rows processed at once. Defaults to the whole screen, or to
+            tiles of about `DEFAULT_TILE_PIXELS` pixels when `screen` or
+            `screen_buffer` is a :obj:`numpy.memmap`.
+        rows (Optional[tuple[int, int]], optional):
+            Band `(row_start, row_stop)` of the rows of the whole screen that
+            `screen` and `screen_buffer` hold. Defaults to the whole screen.
+        cancel_token (Optional[:obj:`CancelToken`], optional):
+            Token checked before each row. Defaults to `None`.
 
     Returns:
         :obj:`numpy.ndarray`:
@@ -65,6 +320,9 @@ def compute_np_screen(
         - The function assumes that the input screen and screen_buffer arrays
           have the correct shape and dtype.
         - The color values are scaled to the range [0, 255].
+        - Only `channel` of the screen is updated. `screen_buffer[:, :, channel]`
+          holds the raw iteration counts, which can be colorized again with
+          :py:func:`polynomiograpy.common.colorize.colorize_counts`.
 
     """
     assert len(screen.shape) >= 3, "Wrong shape for screen"
@@ -72,18 +330,25 @@ def compute_np_screen(
     assert screen.shape == screen_buffer.shape, "screen shape != screen buffer shape"
     origin_x = width / 2
     origin_y = height / 2
-    for j in range(height):
+    offset, band_height = resolve_rows(height, rows)
+    for j_band in range(band_height):
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        j = offset + j_band
         for i in range(width):
             x = (i - origin_x) * scale_x + shift_x
             y = -(j - origin_y) * scale_y + shift_y
             val = complex(x, y)
             res = func(val)
-            screen_buffer[j, i, channel] = max_value - res if reverse_color else res
-    screen[:, :, 0] = screen_buffer[:, :, 0] / max_value * 255
-    screen[:, :, 1] = screen_buffer[:, :, 1] / max_value * 255
-    screen[:, :, 2] = screen_buffer[:, :, 2] / max_value * 255
-    if screen.shape[2] > 3:
-        screen[:, :, 3] = screen_buffer[:, :, 3] / max_value * 255
+            screen_buffer[j_band, i, channel] = res
+    colorize_counts(
+        screen_buffer[:, :, channel],
+        max_value,
+        reverse=reverse_color,
+        out=screen,
+        channel=channel,
+        tile_size=tile_size,
+    )
     return np.flipud(screen)
 
 
@@ -102,6 +367,9 @@ def compute_np_screen_multithread(
     reverse_color: bool = False,
     channel: int = 0,
     thread_count: int = 16,
+    tile_size: Optional[int] = None,
+    rows: Optional[tuple[int, int]] = None,
+    cancel_token: Optional[CancelToken] = None,
 ):
     """
     Computes a screen representation of a function over a complex plane using
@@ -135,6 +403,15 @@ def compute_np_screen_multithread(
             Color channel for color mapping. Defaults to 0.
         thread_count (int, optional):
             Number of threads to use for parallel computation. Defaults to 16.
+        tile_size (Optional[int], optional):
+            Number of rows processed at once. Defaults to the whole screen, or to
+            tiles of about `DEFAULT_TILE_PIXELS` pixels when `screen` or
+            `screen_buffer` is a :obj:`numpy.memmap`.
+        rows (Optional[tuple[int, int]], optional):
+            Band `(row_start, row_stop)` of the rows of the whole screen that
+            `screen` and `screen_buffer` hold. Defaults to the whole screen.
+        cancel_token (Optional[:obj:`CancelToken`], optional):
+            Token checked before each pixel. Defaults to `None`.
 
     Returns:
         :obj:`numpy.ndarray`:
@@ -151,6 +428,9 @@ def compute_np_screen_multithread(
         - The function assumes that the input screen and screen_buffer arrays
           have the correct shape and dtype.
         - The color values are scaled to the range [0, 255].
+        - Only `channel` of the screen is updated. `screen_buffer[:, :, channel]`
+          holds the raw iteration counts, which can be colorized again with
+          :py:func:`polynomiograpy.common.colorize.colorize_counts`.
         - The computation is performed using multiple threads to speed up the
           process. The `thread_count` parameter controls the number of threads
           to use.
@@ -161,27 +441,33 @@ def compute_np_screen_multithread(
     assert screen.shape == screen_buffer.shape, "screen shape != screen buffer shape"
     origin_x = width / 2
     origin_y = height / 2
+    offset, band_height = resolve_rows(height, rows)
 
     def set_pixel(val: complex):
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
         res = func(val)
-        screen_buffer[j, i, channel] = max_value - res if reverse_color else res
+        screen_buffer[j - offset, i, channel] = res
         return None
 
     with ThreadPool(thread_count) as pool:
         vals: list[complex] = []
         for i in range(width):
-            for j in range(height):
+            for j in range(offset, offset + band_height):
                 x = (i - origin_x) * scale_x + shift_x
                 y = -(j - origin_y) * scale_y + shift_y
                 val = complex(x, y)
                 vals.append(val)
         pool.map(set_pixel, vals)
 
-    screen[:, :, 0] = screen_buffer[:, :, 0] / max_value * 255
-    screen[:, :, 1] = screen_buffer[:, :, 1] / max_value * 255
-    screen[:, :, 2] = screen_buffer[:, :, 2] / max_value * 255
-    if screen.shape[2] > 3:
-        screen[:, :, 3] = screen_buffer[:, :, 3] / max_value * 255
+    colorize_counts(
+        screen_buffer[:, :, channel],
+        max_value,
+        reverse=reverse_color,
+        out=screen,
+        channel=channel,
+        tile_size=tile_size,
+    )
     return np.flipud(screen)
 
 
@@ -199,6 +485,12 @@ def compute_np_screen_vectorized(
     max_value: int = 16,
     reverse_color: bool = False,
     channel: int = 0,
+    tile_size: Optional[int] = None,
+    rows: Optional[tuple[int, int]] = None,
+    grid_cache: Optional[GridCache] = None,
+    dtype=np.complex128,
+    cancel_token: Optional[CancelToken] = None,
+    on_tile: Optional[Callable[[int, int], None]] = None,
 ):
     """
     Computes a screen representation of a function over a complex plane.
@@ -229,6 +521,24 @@ def compute_np_screen_vectorized(
             Flag to reverse the color mapping. Defaults to False.
         channel (int, optional):
             Color channel for color mapping. Defaults to 0.
+        tile_size (Optional[int], optional):
+            Number of rows processed at once. Defaults to the whole screen, or to
+            tiles of about `DEFAULT_TILE_PIXELS` pixels when `screen` or
+            `screen_buffer` is a :obj:`numpy.memmap`.
+        rows (Optional[tuple[int, int]], optional):
+            Band `(row_start, row_stop)` of the rows of the whole screen that
+            `screen` and `screen_buffer` hold. Defaults to the whole screen.
+        grid_cache (Optional[:obj:`GridCache`], optional):
+            Cache of the grids of the complex plane. Defaults to `None`, which
+            computes them every time.
+        dtype (optional):
+            Complex dtype of the grid the function is applied to. Defaults to
+            `numpy.complex128`.
+        cancel_token (Optional[:obj:`CancelToken`], optional):
+            Token checked before each tile. Defaults to `None`.
+        on_tile (Optional[:obj:`Callable[[int, int], None]`], optional):
+            Called after each tile with the number of rows computed so far and the
+            number of rows of the band. Defaults to `None`.
 
     Returns:
         :obj:`numpy.ndarray`:
@@ -246,27 +556,324 @@ def compute_np_screen_vectorized(
           have the correct shape and dtype.
         - The computation is vectorized for faster execution using NumPy
           operations.
+        - The screen is computed one band of `tile_size` rows at a time, so only
+          tile sized temporaries are allocated. `screen` and `screen_buffer` may
+          be :obj:`numpy.memmap` arrays for images larger than memory.
         - The resulting screen representation is stored in the `screen` array.
         - The color values are scaled to the range [0, 255].
+        - Only `channel` of the screen is updated. `screen_buffer[:, :, channel]`
+          holds the raw iteration counts, which can be colorized again with
+          :py:func:`polynomiograpy.common.colorize.colorize_counts`.
     """
     assert len(screen.shape) >= 3, "Wrong shape for screen"
     assert len(screen_buffer.shape) >= 3, "Wrong shape for screen buffer"
     assert screen.shape == screen_buffer.shape, "screen shape != screen buffer shape"
-    origin_x = width / 2
-    origin_y = height / 2
-    for j in range(height):
-        for i in range(width):
-            x = (i - origin_x) * scale_x + shift_x
-            y = -(j - origin_y) * scale_y + shift_y
-            val = complex(x, y)
-            screen_buffer[j, i, channel] = val
-    iter_counts = func(screen_buffer[:, :, channel])
-    screen_buffer[:, :, channel] = iter_counts
-    if reverse_color:
-        screen_buffer[:, :, channel] = max_value - screen_buffer[:, :, channel]
-    screen[:, :, 0] = (screen_buffer[:, :, 0] / max_value * 255).real
-    screen[:, :, 1] = (screen_buffer[:, :, 1] / max_value * 255).real
-    screen[:, :, 2] = (screen_buffer[:, :, 2] / max_value * 255).real
-    if screen.shape[2] > 3:
-        screen[:, :, 3] = (screen_buffer[:, :, 3] / max_value * 255).real
+    compute_np_counts_vectorized(
+        func,
+        width,
+        height,
+        screen_buffer[:, :, channel],
+        scale_x=scale_x,
+        scale_y=scale_y,
+        shift_x=shift_x,
+        shift_y=shift_y,
+        tile_size=tile_size,
+        rows=rows,
+        grid_cache=grid_cache,
+        dtype=dtype,
+        cancel_token=cancel_token,
+        on_tile=on_tile,
+    )
+    colorize_counts(
+        screen_buffer[:, :, channel],
+        max_value,
+        reverse=reverse_color,
+        out=screen,
+        channel=channel,
+        tile_size=tile_size,
+    )
     return np.flipud(screen)
+
+
+def compute_np_counts_vectorized(
+    func: Callable[[np.ndarray], np.ndarray],
+    width: int,
+    height: int,
+    counts: np.ndarray,
+    *,
+    scale_x: float = 1,
+    scale_y: float = 1,
+    shift_x: float = 0,
+    shift_y: float = 0,
+    tile_size: Optional[int] = None,
+    rows: Optional[tuple[int, int]] = None,
+    roots: Optional[np.ndarray] = None,
+    delta: float = 0.1,
+    basins: Optional[np.ndarray] = None,
+    smooth: Optional[np.ndarray] = None,
+    grid_cache: Optional[GridCache] = None,
+    dtype=np.complex128,
+    cancel_token: Optional[CancelToken] = None,
+    on_tile: Optional[Callable[[int, int], None]] = None,
+):
+    """
+    Computes the raw iteration counts of a function over a complex plane.
+
+    Args:
+        func (:obj:`Callable[[np.ndarray], np.ndarray]`):
+            A function that maps an ndarray of complex numbers to an ndarray of
+            iteration counts. The function may update the ndarray in place with the
+            last iterates, which are used for `basins` and `smooth`.
+        width (int):
+            Width of the screen.
+        height (int):
+            Height of the screen.
+        counts (:obj:`numpy.ndarray`):
+            Array of shape `(height, width)` (or the height of `rows`) to store the
+            iteration counts.
+        scale_x (float, optional):
+            Scaling factor for the x-axis. Defaults to 1.
+        scale_y (float, optional):
+            Scaling factor for the y-axis. Defaults to 1.
+        shift_x (float, optional):
+            Shift value for the x-axis. Defaults to 0.
+        shift_y (float, optional):
+            Shift value for the y-axis. Defaults to 0.
+        tile_size (Optional[int], optional):
+            Number of rows processed at once. Defaults to the whole screen, or to
+            tiles of about `DEFAULT_TILE_PIXELS` pixels when one of the output
+            arrays is a :obj:`numpy.memmap`.
+        rows (Optional[tuple[int, int]], optional):
+            Band `(row_start, row_stop)` of the rows of the whole screen that the
+            output arrays hold. Defaults to the whole screen.
+        roots (Optional[:obj:`numpy.ndarray`], optional):
+            Roots of the polynomial, required for `basins` and `smooth`. Defaults
+            to `None`.
+        delta (float, optional):
+            Convergence threshold of the method, used for `smooth`. Defaults to
+            0.1.
+        basins (Optional[:obj:`numpy.ndarray`], optional):
+            Array of the shape of `counts` to store the index of the root nearest
+            to the last iterate of each pixel, or -1 if it is not finite. Defaults
+            to `None`, which skips the basins.
+        smooth (Optional[:obj:`numpy.ndarray`], optional):
+            Float array of the shape of `counts` to store continuous iteration
+            counts. Defaults to `None`, which skips the smooth values.
+        grid_cache (Optional[:obj:`GridCache`], optional):
+            Cache of the grids of the complex plane. Defaults to `None`, which
+            computes them every time.
+        dtype (optional):
+            Complex dtype of the grid the function is applied to. `complex64`
+            halves the memory of the grids and iterates of the NumPy
+            engine at the cost of precision. Defaults to `numpy.complex128`.
+        cancel_token (Optional[:obj:`CancelToken`], optional):
+            Token checked before each tile. Defaults to `None`.
+        on_tile (Optional[:obj:`Callable[[int, int], None]`], optional):
+            Called after each tile with the number of rows computed so far and the
+            number of rows of the band, for example to report progress. Defaults
+            to `None`.
+
+    Returns:
+        :obj:`numpy.ndarray`: The `counts` array.
+
+    Note:
+        - The smooth value of a pixel is `count + 1 - f`, where `f` in [0, 1] tells
+          how far the last iterate got inside the convergence radius `delta` of
+          its nearest root: 0 at distance `delta` and 1 at distance `delta ** 2`
+          or closer.
+        - All output arrays may be :obj:`numpy.memmap` arrays; they are written
+          tile by tile.
+    """
+    assert counts.ndim == 2, "Wrong shape for counts"
+    assert (basins is None and smooth is None) or roots is not None, "Roots needed"
+    offset, band_height = resolve_rows(height, rows)
+    tile_size = resolve_tile_size(
+        width,
+        band_height,
+        tile_size,
+        *[a for a in (counts, basins, smooth) if a is not None],
+        cancellable=cancel_token is not None,
+    )
+    for row_start, row_stop in iter_row_tiles(band_height, tile_size):
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        grid = (compute_grid if grid_cache is None else grid_cache.get)(
+            width,
+            height,
+            scale_x=scale_x,
+            scale_y=scale_y,
+            shift_x=shift_x,
+            shift_y=shift_y,
+            row_start=offset + row_start,
+            row_stop=offset + row_stop,
+            dtype=dtype,
+        )
+        iter_counts = func(grid)
+        counts[row_start:row_stop] = iter_counts
+        if basins is not None or smooth is not None:
+            nearest, distance = nearest_roots(grid, roots)
+            if basins is not None:
+                basins[row_start:row_stop] = nearest
+            if smooth is not None:
+                smooth[row_start:row_stop] = smooth_counts(iter_counts, distance, delta)
+        if on_tile is not None:
+            on_tile(row_stop, band_height)
+    return counts
+
+
+def level_viewport(
+    width: int,
+    height: int,
+    stride: int,
+    *,
+    scale_x: float = 1,
+    scale_y: float = 1,
+    shift_x: float = 0,
+    shift_y: float = 0,
+) -> tuple[int, int, dict[str, float]]:
+    """
+    Computes the viewport of a coarse level of a screen, which samples one pixel
+    out of `stride` in both directions.
+
+    Pixel `(j, i)` of the level is exactly pixel `(j * stride, i * stride)` of
+    the screen.
+
+    Args:
+        width (int):
+            Width of the screen.
+        height (int):
+            Height of the screen.
+        stride (int):
+            Pixel stride of the level.
+        scale_x (float, optional):
+            Scaling factor for the x-axis of the screen. Defaults to 1.
+        scale_y (float, optional):
+            Scaling factor for the y-axis of the screen. Defaults to 1.
+        shift_x (float, optional):
+            Shift value for the x-axis of the screen. Defaults to 0.
+        shift_y (float, optional):
+            Shift value for the y-axis of the screen. Defaults to 0.
+
+    Returns:
+        tuple[int, int, dict[str, float]]: The width and height of the level, and
+        its `scale_x`, `scale_y`, `shift_x` and `shift_y`.
+    """
+    level_width = -(-width // stride)
+    level_height = -(-height // stride)
+    return (
+        level_width,
+        level_height,
+        {
+            "scale_x": scale_x * stride,
+            "scale_y": scale_y * stride,
+            "shift_x": shift_x + (level_width * stride - width) / 2 * scale_x,
+            "shift_y": shift_y - (level_height * stride - height) / 2 * scale_y,
+        },
+    )
+
+
+def budget_tile_rows(
+    width: int, cancel_token: CancelToken, pixels_done: int, seconds_done: float
+) -> int:
+    """
+    Returns the number of rows of the next tile of a render bounded in time, so
+    the tile takes about `BUDGET_TILE_SHARE` of the remaining time.
+
+    Args:
+        width (int):
+            Width of the tiles.
+        cancel_token (:obj:`CancelToken`):
+            Token of the render, whose deadline bounds it.
+        pixels_done (int):
+            Number of pixels computed so far.
+        seconds_done (float):
+            Time spent computing them.
+
+    Returns:
+        int: The number of rows, one row until a time per pixel was measured, and
+        tiles of about `CANCEL_TILE_PIXELS` pixels without a deadline.
+    """
+    if cancel_token.deadline is None:
+        return max(1, CANCEL_TILE_PIXELS // max(width, 1))
+    if pixels_done == 0 or seconds_done <= 0:
+        return 1
+    remaining = max(cancel_token.deadline - time.monotonic(), 0.0)
+    pixels = BUDGET_TILE_SHARE * remaining * pixels_done / seconds_done
+    return int(
+        np.clip(pixels // max(width, 1), 1, DEFAULT_TILE_PIXELS // max(width, 1))
+    )
+
+
+def upsample_level(level: np.ndarray, stride: int, out: np.ndarray) -> np.ndarray:
+    """
+    Fills a screen with the pixels of a coarse level, each repeated in a
+    `stride` by `stride` block.
+
+    Args:
+        level (:obj:`numpy.ndarray`):
+            The first rows of a level computed with :py:func:`level_viewport`.
+        stride (int):
+            Pixel stride of the level.
+        out (:obj:`numpy.ndarray`):
+            The screen. Only the rows covered by `level` are written.
+
+    Returns:
+        :obj:`numpy.ndarray`: The `out` array.
+    """
+    rows = min(len(level) * stride, len(out))
+    width = out.shape[1]
+    blocks = np.repeat(np.repeat(level, stride, axis=0), stride, axis=1)
+    out[:rows] = blocks[:rows, :width]
+    return out
+
+
+def nearest_roots(
+    values: np.ndarray, roots: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the nearest root of each value.
+
+    Args:
+        values (:obj:`numpy.ndarray`):
+            Complex values, usually the last iterates of a method.
+        roots (:obj:`numpy.ndarray`):
+            Roots of the polynomial.
+
+    Returns:
+        tuple[:obj:`numpy.ndarray`, :obj:`numpy.ndarray`]: Index of the nearest root
+        of each value, -1 for values that are not finite, and the distance to it.
+    """
+    if len(roots) == 0:
+        return (
+            np.full(values.shape, -1, dtype=np.int64),
+            np.full(values.shape, np.inf),
+        )
+    distances = np.abs(values[..., np.newaxis] - roots)
+    nearest = np.argmin(distances, axis=-1)
+    distance = np.take_along_axis(distances, nearest[..., np.newaxis], -1)[..., 0]
+    nearest[~np.isfinite(distance)] = -1
+    return nearest, distance
+
+
+def smooth_counts(counts: np.ndarray, distance: np.ndarray, delta: float) -> np.ndarray:
+    """
+    Computes continuous iteration counts from the distance of the last iterates to
+    their nearest roots.
+
+    Args:
+        counts (:obj:`numpy.ndarray`):
+            Iteration counts.
+        distance (:obj:`numpy.ndarray`):
+            Distance of the last iterate of each pixel to its nearest root.
+        delta (float):
+            Convergence threshold of the method.
+
+    Returns:
+        :obj:`numpy.ndarray`: The smooth counts, in `[count, count + 1]`.
+    """
+    if not 0 < delta < 1:
+        return counts.astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        depth = np.log(distance) / np.log(delta) - 1
+    fraction = np.clip(np.nan_to_num(depth, nan=0.0, posinf=1.0, neginf=0.0), 0, 1)
+    return counts + 1 - fraction
@@ -0,0 +1,218 @@
+import functools
+from typing import Callable, Optional
+
+import numpy as np
+
+from polynomiograpy.common.polynomial import Polynomial
+
+try:
+    from . import _jit_kernels
+except ImportError:
+    _jit_kernels = None
+
+__all__ = [
+    "available_engines",
+    "jit_methods",
+    "is_jit_available",
+    "get_jit_method_func",
+]
+
+available_engines = ["numpy", "jit"]
+
+jit_methods = [
+    "newton",
+    "halley",
+    "inverse_interpolation",
+    "mullers",
+    "secant",
+    "steffensen",
+]
+
+
+def _probe_values(count: int = 4096) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    values = rng.standard_normal(count) * 2.0 ** rng.integers(-20, 20, count)
+    values = values + 1j * rng.standard_normal(count) * 2.0 ** rng.integers(
+        -20, 20, count
+    )
+    specials = [0.0, -0.0, 1.0, np.inf, -np.inf, np.nan]
+    edge = [complex(r, i) for r in specials for i in specials]
+    values[: len(edge)] = edge
+    return values
+
+
+def _same(a: np.ndarray, b: np.ndarray) -> bool:
+    a = np.stack([a.real, a.imag]) if np.iscomplexobj(a) else a
+    b = np.stack([b.real, b.imag]) if np.iscomplexobj(b) else b
+    equal = a.view(np.int64) == b.view(np.int64)
+    return bool(np.all(equal | (np.isnan(a) & np.isnan(b))))
+
+
+def _select(candidates: tuple, check: Callable) -> Optional[Callable]:
+    for candidate in candidates:
+        if check(candidate):
+            return candidate
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _load_kernels() -> Optional[dict]:
+    """
+    Builds the kernels with the primitives matching the NumPy loops of this
+    machine, which may or may not use fused multiply-adds, or returns `None` when
+    no primitive matches them exactly.
+    """
+    if _jit_kernels is None:
+        return None
+    k = _jit_kernels
+    values = _probe_values()
+    others = values[::-1].copy()
+    # every degree has a non zero coefficient, so all powers are checked
+    poly = Polynomial(coeffs=[3, -1, 2, 2, 1, -5, 7, 1, 1])
+    coeffs = np.asarray(poly.coeffs, dtype=np.complex128)
+    with np.errstate(all="ignore"):
+        mul = _select(
+            (k.mul_fma, k.mul_plain),
+            lambda op: _same(k.map_binary(op, values, others), values * others)
+            and _same(k.map_binary(op, values, values), values**2),
+        )
+        cabs = _select(
+            (k.abs_simd_fma, k.abs_simd_plain, k.abs_hypot),
+            lambda op: _same(k.map_abs(op, values), np.abs(values)),
+        )
+        if (
+            mul is None
+            or cabs is None
+            or not _same(k.map_binary(k.div, values, others), values / others)
+        ):
+            return None
+        kernels = None
+        for prod in (k.mul_plain, k.mul_fma):
+            candidate = k.build_kernels(mul, prod, cabs)
+            if _same(candidate["eval"](coeffs, values), poly.eval(values)):
+                kernels = candidate
+                break
+        if kernels is None:
+            return None
+        kernels["exact_sqrt"] = _same(k.map_unary(k.csqrt, values), np.sqrt(values))
+        kernels["elide_bytes"] = _probe_elision(mul)
+    if kernels["elide_bytes"] == -1:
+        return None
+    return kernels
+
+
+def _product_with_temporary(a: np.ndarray, b: np.ndarray, c: np.ndarray):
+    return a * (b - c)
+
+
+def _probe_elision(mul) -> Optional[int]:
+    """
+    Returns the size in bytes from which NumPy computes `a * (b - c)` as
+    `(b - c) * a` in place, `None` if it never does, or -1 if neither matches.
+    """
+    k = _jit_kernels
+    size = k.MIN_ELIDE_BYTES // np.dtype(np.complex128).itemsize
+    rng = np.random.default_rng(1)
+    a, b, c = (
+        rng.standard_normal(size) + 1j * rng.standard_normal(size) for _ in range(3)
+    )
+    result = _product_with_temporary(a, b, c)
+    small_result = _product_with_temporary(a[1:], b[1:], c[1:])
+    if not _same(small_result, k.map_binary(mul, a[1:], b[1:] - c[1:])):
+        return -1
+    if _same(result, k.map_binary(mul, b - c, a)):
+        return k.MIN_ELIDE_BYTES
+    if _same(result, k.map_binary(mul, a, b - c)):
+        return None
+    return -1
+
+
+def is_jit_available(method: Optional[str] = None) -> bool:
+    """
+    Checks whether the JIT engine can be used.
+
+    Args:
+        method (Optional[str], optional):
+            Method to check. Defaults to `None`, which checks the engine only.
+
+    Returns:
+        bool:
+            True if Numba is installed, its arithmetic matches the NumPy loops of
+            this machine exactly, and the method is supported.
+
+    Note:
+        - The first call compiles the kernels, which takes a few seconds.
+    """
+    kernels = _load_kernels()
+    if kernels is None:
+        return False
+    if method is None:
+        return True
+    if method == "mullers":
+        return kernels["exact_sqrt"]
+    return method in jit_methods
+
+
+def get_jit_method_func(
+    method: str,
+    poly: Polynomial,
+    delta: float,
+    max_value: int,
+) -> Optional[Callable[[np.ndarray], np.ndarray]]:
+    """
+    Returns a JIT compiled function computing the iteration counts of a method.
+
+    The function runs a fused loop for each pixel, in parallel over rows, instead
+    of one masked NumPy operation per step, and gives exactly the same counts and
+    last iterates as the NumPy function of the method.
+
+    Args:
+        method (str):
+            The method to use for computation. Must be one of `jit_methods`.
+        poly (Polynomial):
+            The polynomial to find the roots of.
+        delta (float):
+            The tolerance value used by the method for convergence.
+        max_value (int):
+            Maximum iteration count.
+
+    Returns:
+        Optional[Callable[[np.ndarray], np.ndarray]]:
+            A function mapping an ndarray of complex numbers to an ndarray of
+            iteration counts, updating the ndarray in place with the last
+            iterates. `None` if the JIT engine cannot be used for this method or
+            polynomial, in which case the NumPy function should be used.
+    """
+    if method not in jit_methods or not is_jit_available(method):
+        return None
+    coeffs = np.asarray(poly.coeffs, dtype=np.complex128)
+    if len(coeffs) == 0 or len(coeffs) > _jit_kernels.MAX_DEGREE:
+        return None
+    kernel = _load_kernels()[method]
+    deriv = poly.deriv()
+    args: tuple
+    if method in ("newton", "mullers"):
+        args = (coeffs, np.asarray(deriv.coeffs, dtype=np.complex128))
+    elif method == "halley":
+        args = (
+            coeffs,
+            np.asarray(deriv.coeffs, dtype=np.complex128),
+            np.asarray(deriv.deriv().coeffs, dtype=np.complex128),
+        )
+    else:
+        args = (coeffs,)
+    elide_bytes = _load_kernels()["elide_bytes"]
+
+    def func(val: np.ndarray) -> np.ndarray:
+        values = np.ascontiguousarray(val, dtype=np.complex128)
+        values_2d = values.reshape(-1, values.shape[-1] if values.ndim else 1)
+        extra: tuple = ()
+        if method in ("mullers", "secant"):
+            # the NumPy function computes on arrays of the size of `val`
+            extra = (elide_bytes is not None and values.nbytes >= elide_bytes,)
+        iter_counts = kernel(values_2d, *args, float(delta), int(max_value), *extra)
+        if values is not val:
+            val[...] = values
+        return iter_counts.reshape(values.shape)
+
+    return func
@@ -1,7 +1,115 @@
+from typing import Optional
+
 import numpy as np
 
 from polynomiograpy.common.finite_field import FiniteField
+from polynomiograpy.iterations.helpers import default_tile_size, iter_row_tiles
 from . import helpers
+from . import solvers
+from . import symmetries
+from . import tone_mapping as tone_mappers
+from .helpers import RootCache
+from .spatial_index import RootIndex
+
+__all__ = [
+    "compute_hits_for_finite_field_poly",
+    "compute_screen_for_finite_field_poly",
+    "compute_screen_for_finite_field_poly_multi_color",
+    "RootCache",
+    "RootIndex",
+]
+
+
+def compute_hits_for_finite_field_poly(
+    ff: FiniteField,
+    min_degree: int,
+    max_degree: int,
+    width: int,
+    height: int,
+    counts: Optional[np.ndarray] = None,
+    *,
+    scale_x: float = 0.01,
+    scale_y: float = 0.01,
+    shift_x: float = 0,
+    shift_y: float = 0,
+    chunk_size: int = solvers.DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = 1,
+    symmetry: str = "exact",
+    root_cache: Optional[helpers.RootCache] = None,
+    solver: str = "eig",
+) -> np.ndarray:
+    """
+    Counts the roots of polynomials over a finite field in each pixel of a screen.
+
+    The raw counts do not depend on the shades of the image, so they can be
+    turned into images with any of the tone mappers of
+    :py:mod:`polynomiograpy.roots.tone_mapping` without solving the polynomials
+    again.
+
+    Args:
+        ff (:obj:`FiniteField`):
+            FiniteField object representing the finite field to generate
+            polynomials from.
+        min_degree (int):
+            Minimum degree of the polynomials to consider.
+        max_degree (int):
+            Maximum degree of the polynomials to consider.
+        width (int):
+            Width of the screen.
+        height (int):
+            Height of the screen.
+        counts (Optional[:obj:`numpy.ndarray`], optional):
+            Integer buffer of shape `(height, width)` the counts are added to.
+            Defaults to a new `numpy.int64` array.
+        scale_x (float, optional):
+            Scaling factor for the x-axis. Defaults to 0.01.
+        scale_y (float, optional):
+            Scaling factor for the y-axis. Defaults to 0.01.
+        shift_x (float, optional):
+            Shift value for the x-axis. Defaults to 0.
+        shift_y (float, optional):
+            Shift value for the y-axis. Defaults to 0.
+        chunk_size (int, optional):
+            Number of polynomials whose roots are computed and counted at once.
+            Defaults to `solvers.DEFAULT_CHUNK_SIZE`.
+        workers (Optional[int], optional):
+            Number of processes computing the roots, `None` for all CPUs.
+            Defaults to 1, which computes them in this process.
+        symmetry (str, optional):
+            Symmetries of the polynomials used to solve fewer of them, see
+            :py:func:`compute_screen_for_finite_field_poly`. Defaults to "exact".
+        root_cache (Optional[:obj:`helpers.RootCache`], optional):
+            Cache of the roots on disk. Defaults to no cache.
+        solver (str, optional):
+            Root solver, see :py:func:`compute_screen_for_finite_field_poly`.
+            Defaults to "eig".
+
+    Returns:
+        :obj:`numpy.ndarray`:
+            The `counts` array, in rows of increasing imaginary part like the
+            `screen_buffer` of :py:func:`compute_screen_for_finite_field_poly`;
+            :py:func:`numpy.flipud` gives the orientation of the images.
+    """
+    if counts is None:
+        counts = np.zeros((height, width), dtype=np.int64)
+    for _, pixels, hits in helpers.iter_field_hits(
+        ff,
+        min_degree,
+        max_degree,
+        width,
+        height,
+        scale_x=scale_x,
+        scale_y=scale_y,
+        shift_x=shift_x,
+        shift_y=shift_y,
+        chunk_size=chunk_size,
+        symmetries=symmetries.resolve_symmetries(ff, symmetry),
+        workers=workers,
+        root_cache=root_cache,
+        solver=solver,
+    ):
+        helpers.add_hit_counts(counts, pixels, hits, width)
+    return counts
 
 
 def compute_screen_for_finite_field_poly(
@@ -19,6 +127,12 @@ def compute_screen_for_finite_field_poly(
     shift_y: float = 0,
     color_range: int = 8,
     channel: int = 0,
+    chunk_size: int = solvers.DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = 1,
+    symmetry: str = "exact",
+    root_cache: Optional[helpers.RootCache] = None,
+    tone_mapping: str = "linear",
+    solver: str = "eig",
 ):
     """
     Computes a screen representation of roots of polynomials over a finite field.
@@ -51,6 +165,31 @@ def compute_screen_for_finite_field_poly(
             Number of color shades to represent the roots. Defaults to 8.
         channel (int, optional):
             Color channel to store the computed representation. Defaults to 0.
+        chunk_size (int, optional):
+            Number of polynomials whose roots are computed and plotted at once.
+            Defaults to `solvers.DEFAULT_CHUNK_SIZE`.
+        workers (Optional[int], optional):
+            Number of processes computing the roots, `None` for all CPUs.
+            Defaults to 1, which computes them in this process.
+        symmetry (str, optional):
+            Symmetries of the polynomials used to solve fewer of them, a key of
+            `symmetries.SYMMETRY_MODES`: "none", "exact", which solves half of
+            the polynomials of a field whose elements have their opposite, or
+            "all", which solves a quarter of them but may move a few roots to a
+            neighbouring pixel. Defaults to "exact".
+        root_cache (Optional[:obj:`helpers.RootCache`], optional):
+            Cache of the roots on disk, so renders of the same field and degrees
+            with another viewport or colors only plot the cached roots. Defaults
+            to no cache.
+        tone_mapping (str, optional):
+            Name of the tone mapper turning the root counts into intensities, a
+            key of `tone_mapping.TONE_MAPPERS`. Defaults to "linear", where each
+            root adds `256 // color_range` to the intensity of its pixel.
+        solver (str, optional):
+            Root solver, a key of `solvers.SOLVERS`: "eig", the eigenvalues of
+            the companion matrices, or "aberth", the Aberth-Ehrlich method, which
+            gets faster than "eig" for high degrees (above about 60), and whose
+            roots may differ in the last bits. Defaults to "eig".
 
     Returns:
         :obj:`numpy.ndarray`:
@@ -60,31 +199,42 @@ def compute_screen_for_finite_field_poly(
     Note:
         - The function internally generates polynomials over the given finite field
           with degrees ranging from `min_degree` to `max_degree`.
-        - The function then computes the roots of these polynomials and uses the
-          `compute_screen_for_roots` helper function to generate the screen
-          representation.
+        - The function then computes the roots of these polynomials, in chunks of
+          same-degree polynomials with :py:func:`solvers.batched_roots`, and
+          counts the roots of each chunk in each pixel before computing the next
+          one, so the memory used does not grow with the number of polynomials.
+        - With several `workers`, the polynomials are split into shards whose
+          roots are counted per pixel by a pool of processes, see
+          :py:func:`helpers.iter_field_hits`.
+        - The raw counts are kept in the `channel` of `screen_buffer`, see
+          :py:func:`compute_hits_for_finite_field_poly`, so they can be tone
+          mapped again with :py:func:`tone_mapping.tone_map`.
         - The input screen and screen_buffer arrays are modified in-place.
         - The function assumes that the input screen and screen_buffer arrays
           have the correct shape and dtype.
 
     """
-    roots: list[int] = []
-    for deg in range(min_degree, max_degree + 1):
-        for poly in ff.generate_polynomials(deg):
-            roots.extend(poly.roots())
-    return helpers.compute_screen_for_roots(
-        roots,
+    screen_buffer.fill(0)
+    counts = compute_hits_for_finite_field_poly(
+        ff,
+        min_degree,
+        max_degree,
         width,
         height,
-        screen,
-        screen_buffer,
+        screen_buffer[:, :, channel],
         scale_x=scale_x,
         scale_y=scale_y,
         shift_x=shift_x,
         shift_y=shift_y,
-        color_range=color_range,
-        channel=channel,
+        chunk_size=chunk_size,
+        workers=workers,
+        symmetry=symmetry,
+        root_cache=root_cache,
+        solver=solver,
     )
+    options = {"color_range": color_range} if tone_mapping == "linear" else {}
+    tone_mappers.tone_map(counts, tone_mapping, out=screen, channel=channel, **options)
+    return np.flipud(screen)
 
 
 def compute_screen_for_finite_field_poly_multi_color(
@@ -101,18 +251,14 @@ def compute_screen_for_finite_field_poly_multi_color(
     shift_x: float = 0,
     shift_y: float = 0,
     color_range: int = 8,
-    colors: list[np.ndarray] = [
-        np.array([255, 0, 0]),
-        np.array([204, 0, 51]),
-        np.array([153, 0, 102]),
-        np.array([102, 0, 153]),
-        np.array([51, 0, 204]),
-        np.array([0, 0, 255]),
-        np.array([0, 51, 204]),
-        np.array([0, 102, 153]),
-        np.array([0, 153, 102]),
-        np.array([0, 204, 51]),
-    ],
+    colors: list[np.ndarray] = helpers.default_colors,
+    chunk_size: int = solvers.DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = 1,
+    symmetry: str = "exact",
+    root_cache: Optional[helpers.RootCache] = None,
+    radius: int = 1,
+    kernel: str = "disk",
+    solver: str = "eig",
 ):
     """
     Computes a multi-color screen representation of roots of polynomials over a
@@ -147,6 +293,31 @@ def compute_screen_for_finite_field_poly_multi_color(
         colors (list[:obj:`numpy.ndarray`], optional):
             List of color arrays corresponding to each degree of roots.
             Defaults to a pre-defined list of colors.
+        chunk_size (int, optional):
+            Number of polynomials whose roots are computed and plotted at once.
+            Defaults to `solvers.DEFAULT_CHUNK_SIZE`.
+        workers (Optional[int], optional):
+            Number of processes computing the roots, `None` for all CPUs.
+            Defaults to 1, which computes them in this process.
+        symmetry (str, optional):
+            Symmetries of the polynomials used to solve fewer of them, a key of
+            `symmetries.SYMMETRY_MODES`: "none", "exact", which solves half of
+            the polynomials of a field whose elements have their opposite, or
+            "all", which solves a quarter of them but may move a few roots to a
+            neighbouring pixel. Defaults to "exact".
+        root_cache (Optional[:obj:`helpers.RootCache`], optional):
+            Cache of the roots on disk, so renders of the same field and degrees
+            with another viewport or colors only plot the cached roots. Defaults
+            to no cache.
+        radius (int, optional):
+            Radius of the stamp of each root, see :py:func:`helpers.stamp_offsets`.
+            Defaults to 1, a single pixel.
+        kernel (str, optional):
+            Kernel of the stamp, a name of `helpers.STAMP_KERNELS`. Defaults to
+            "disk".
+        solver (str, optional):
+            Root solver, see :py:func:`compute_screen_for_finite_field_poly`.
+            Defaults to "eig".
 
     Returns:
         :obj:`numpy.ndarray`:
@@ -156,9 +327,19 @@ def compute_screen_for_finite_field_poly_multi_color(
     Note:
         - The function internally generates polynomials over the given finite
           field with degrees ranging from `min_degree` to `max_degree`.
-        - The function then computes the roots of these polynomials and uses
-          the `compute_screen_for_roots_multi_color` helper function to generate
-          the screen representation.
+        - The function then computes the roots of these polynomials, in chunks of
+          same-degree polynomials with :py:func:`solvers.batched_roots`, and
+          splats the stamps of the roots of each chunk in the color of their
+          degree with :py:func:`helpers.add_root_hits_multi_color` before
+          computing the next one, so the memory used does not grow with the
+          number of polynomials.
+        - With several `workers`, the polynomials are split into shards whose
+          roots are counted per pixel by a pool of processes, see
+          :py:func:`helpers.iter_field_hits`. The colors are added, so the screen
+          is the same as with one worker.
+        - The colors of the degrees are added in `screen_buffer` and clamped to
+          255 in `screen` one band of rows at a time, so both can be
+          memory-mapped arrays larger than memory.
         - The input screen and screen_buffer arrays are modified in-place.
         - The function assumes that the input screen and screen_buffer arrays
           have the correct shape and dtype.
@@ -166,22 +347,35 @@ def compute_screen_for_finite_field_poly_multi_color(
           is used.
 
     """
-    roots: list[list[int]] = []
-    for deg in range(min_degree, max_degree + 1):
-        roots_: list[int] = []
-        for poly in ff.generate_polynomials(deg):
-            roots_.extend(poly.roots())
-        roots.append(roots_)
-    return helpers.compute_screen_for_roots_multi_color(
-        roots,
+    screen_buffer.fill(0)
+    for deg, pixels, hits in helpers.iter_field_hits(
+        ff,
+        min_degree,
+        max_degree,
         width,
         height,
-        screen,
-        screen_buffer,
         scale_x=scale_x,
         scale_y=scale_y,
         shift_x=shift_x,
         shift_y=shift_y,
-        color_range=color_range,
-        colors=colors,
-    )
+        chunk_size=chunk_size,
+        symmetries=symmetries.resolve_symmetries(ff, symmetry),
+        workers=workers,
+        root_cache=root_cache,
+        solver=solver,
+    ):
+        helpers.add_root_hits_multi_color(
+            screen_buffer,
+            pixels,
+            hits,
+            colors[deg - min_degree],
+            width,
+            height,
+            color_range=color_range,
+            radius=radius,
+            kernel=kernel,
+        )
+    for row_start, row_stop in iter_row_tiles(height, default_tile_size(width)):
+        rows = slice(row_start, row_stop)
+        np.minimum(screen_buffer[rows], 255, out=screen[rows], casting="unsafe")
+    return np.flipud(screen)
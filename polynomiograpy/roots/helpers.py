@@ -1,5 +1,30 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
 import numpy as np
 
+from polynomiograpy.common.finite_field import FiniteField
+from . import solvers, symmetries as field_symmetries
+
+# Kernels of the stamps of the roots of a multi-color render.
+STAMP_KERNELS = ("disk", "square", "gaussian")
+
+# Colors of the degrees of a multi-color render.
+default_colors = [
+    np.array([255, 0, 0]),
+    np.array([204, 0, 51]),
+    np.array([153, 0, 102]),
+    np.array([102, 0, 153]),
+    np.array([51, 0, 204]),
+    np.array([0, 0, 255]),
+    np.array([0, 51, 204]),
+    np.array([0, 102, 153]),
+    np.array([0, 153, 102]),
+    np.array([0, 204, 51]),
+]
+
 
 def compute_screen_for_roots(
     roots: list[int],
@@ -50,21 +75,26 @@ def compute_screen_for_roots(
         - The function modifies the input screen and screen_buffer arrays in-place.
         - The function assumes that the input screen and screen_buffer arrays have
           the correct shape and dtype.
+        - `screen` and `screen_buffer` may be :obj:`numpy.memmap` arrays; only
+          the pixels hit and whole channels are written, and the roots are counted
+          with temporary arrays that scale with the number of roots, see
+          :py:func:`count_root_hits`.
+        - Intensities are clamped to 255 once all the roots are counted.
 
     """
     screen_buffer.fill(0)
-    origin_x = width / 2
-    origin_y = height / 2
-    color_intensity_per_root = 256 // color_range
-    for root in roots:
-        i = int((root.real - shift_x) / scale_x + origin_x)
-        j = int(((root.imag - shift_y) / scale_y + origin_y))
-        if i < 0 or j < 0 or i >= width or j >= height:
-            pass
-        else:
-            screen_buffer[j, i, channel] += color_intensity_per_root
-            if screen_buffer[j, i, channel] > 255:
-                screen_buffer[j, i, channel] = 255
+    accumulate_roots(
+        roots,
+        width,
+        height,
+        screen_buffer,
+        scale_x=scale_x,
+        scale_y=scale_y,
+        shift_x=shift_x,
+        shift_y=shift_y,
+        color_range=color_range,
+        channel=channel,
+    )
     screen[:, :, channel] = screen_buffer[:, :, channel]
     return np.flipud(screen)
 
@@ -82,6 +112,8 @@ def compute_screen_for_roots_multi_color(
     shift_y: float = 0,
     color_range: int = 8,
     colors: list[np.ndarray],
+    radius: int = 1,
+    kernel: str = "disk",
 ):
     """
     Computes a multi-color screen representation of roots on a complex plane.
@@ -110,6 +142,11 @@ def compute_screen_for_roots_multi_color(
             Number of color shades to represent the roots. Defaults to 8.
         colors (list[:obj:`numpy.ndarray`]):
             List of color arrays corresponding to each degree of roots.
+        radius (int, optional):
+            Radius of the stamp of each root, see :py:func:`stamp_offsets`.
+            Defaults to 1, a single pixel.
+        kernel (str, optional):
+            Kernel of the stamp, see :py:func:`stamp_offsets`. Defaults to "disk".
 
     Returns:
         :obj:`numpy.ndarray`:
@@ -122,37 +159,720 @@ def compute_screen_for_roots_multi_color(
           correct shape and dtype.
         - Each sublist of `roots` corresponds to a different degree of roots,
           and the color for each degree is specified by the corresponding array in the
-          `colors` list.
+          `colors` list. The colors of the degrees are added, see
+          :py:func:`add_root_hits_multi_color`, and clamped to 255.
 
     """
-    # screen_buffer.fill(255)
     screen_buffer.fill(0)
-    origin_x = width / 2
-    origin_y = height / 2
-    # for deg, roots_ in reversed(list(enumerate(roots))):
     for deg, roots_ in enumerate(roots):
-        color = colors[deg]
-        color_resolved = color // color_range
-        for root in roots_:
-            i = int((root.real - shift_x) / scale_x + origin_x)
-            j = int(((root.imag - shift_y) / scale_y + origin_y))
-            radius = 1
-            for i_delta in range(-(radius - 1), radius):
-                for j_delta in range(-(radius - 1), radius):
-                    if i_delta**2 + j_delta**2 < ((radius - 1) ** 2):
-                        i_d = i + i_delta
-                        j_d = j + j_delta
-                        if i_d < 0 or j_d < 0 or i_d >= width or j_d >= height:
-                            pass
-                        else:
-                            if (
-                                screen_buffer[j_d, i_d, 0] == 255
-                                and screen_buffer[j_d, i_d, 1] == 255
-                                and screen_buffer[j_d, i_d, 2] == 255
-                            ):
-                                screen_buffer[j_d, i_d, :] = color_resolved
-                                for c in range(3):
-                                    if screen_buffer[j_d, i_d, c] > 255:
-                                        screen_buffer[j_d, i_d, c] = 255
-    screen[:, :, :] = screen_buffer[:, :, :]
+        accumulate_roots_multi_color(
+            roots_,
+            colors[deg],
+            width,
+            height,
+            screen_buffer,
+            scale_x=scale_x,
+            scale_y=scale_y,
+            shift_x=shift_x,
+            shift_y=shift_y,
+            color_range=color_range,
+            radius=radius,
+            kernel=kernel,
+        )
+    screen[:, :, :] = np.minimum(screen_buffer, 255)
     return np.flipud(screen)
+
+
+def accumulate_roots(
+    roots: np.ndarray,
+    width: int,
+    height: int,
+    screen_buffer: np.ndarray,
+    *,
+    scale_x: float = 1,
+    scale_y: float = 1,
+    shift_x: float = 0,
+    shift_y: float = 0,
+    color_range: int = 8,
+    channel: int = 0,
+):
+    """
+    Adds roots to the intensities of a screen buffer, without clearing it first,
+    so roots can be plotted one chunk at a time.
+
+    Args:
+        roots (:obj:`numpy.ndarray`):
+            Complex numbers (roots) to be plotted on the screen.
+        width (int):
+            Width of the screen.
+        height (int):
+            Height of the screen.
+        screen_buffer (:obj:`numpy.ndarray`):
+            Buffer accumulating the intensities, in rows of increasing imaginary
+            part.
+        scale_x (float, optional):
+            Scaling factor for the x-axis. Defaults to 1.
+        scale_y (float, optional):
+            Scaling factor for the y-axis. Defaults to 1.
+        shift_x (float, optional):
+            Shift value for the x-axis. Defaults to 0.
+        shift_y (float, optional):
+            Shift value for the y-axis. Defaults to 0.
+        color_range (int, optional):
+            Number of color shades to represent the roots. Defaults to 8.
+        channel (int, optional):
+            Color channel index to accumulate in. Defaults to 0.
+
+    Returns:
+        :obj:`numpy.ndarray`: The `screen_buffer` array.
+
+    Note:
+        The roots are projected and counted in bulk, see
+        :py:func:`count_root_hits`. Intensities are clamped to 255 once per call,
+        which gives the same buffer as adding and clamping them one by one, so
+        plotting the roots in chunks gives the same buffer as plotting them at
+        once.
+    """
+    pixels, hits = count_root_hits(
+        roots,
+        width,
+        height,
+        scale_x=scale_x,
+        scale_y=scale_y,
+        shift_x=shift_x,
+        shift_y=shift_y,
+    )
+    return add_root_hits(
+        screen_buffer, pixels, hits, width, color_range=color_range, channel=channel
+    )
+
+
+def add_root_hits(
+    screen_buffer: np.ndarray,
+    pixels: np.ndarray,
+    hits: np.ndarray,
+    width: int,
+    *,
+    color_range: int = 8,
+    channel: int = 0,
+) -> np.ndarray:
+    """
+    Adds counted roots to the intensities of a screen buffer.
+
+    Args:
+        screen_buffer (:obj:`numpy.ndarray`):
+            Buffer accumulating the intensities, in rows of increasing imaginary
+            part.
+        pixels (:obj:`numpy.ndarray`):
+            Flat indices of the pixels hit, see :py:func:`count_root_hits`.
+        hits (:obj:`numpy.ndarray`):
+            Number of roots in each pixel.
+        width (int):
+            Width of the screen.
+        color_range (int, optional):
+            Number of color shades to represent the roots. Defaults to 8.
+        channel (int, optional):
+            Color channel index to accumulate in. Defaults to 0.
+
+    Returns:
+        :obj:`numpy.ndarray`: The `screen_buffer` array.
+
+    Note:
+        Intensities are clamped to 255. Since they only grow, adding the hits of
+        several parts of the roots in any order gives the same buffer as adding
+        them at once.
+    """
+    rows, cols = np.divmod(pixels, width)
+    intensities = screen_buffer[rows, cols, channel] + hits * (256 // color_range)
+    screen_buffer[rows, cols, channel] = np.minimum(intensities, 255)
+    return screen_buffer
+
+
+def add_hit_counts(
+    counts: np.ndarray, pixels: np.ndarray, hits: np.ndarray, width: int
+) -> np.ndarray:
+    """
+    Adds counted roots to a buffer of raw root counts, without clamping.
+
+    Args:
+        counts (:obj:`numpy.ndarray`):
+            Buffer of shape `(height, width)` accumulating the number of roots in
+            each pixel, in rows of increasing imaginary part.
+        pixels (:obj:`numpy.ndarray`):
+            Distinct flat indices of the pixels hit, see
+            :py:func:`count_root_hits`.
+        hits (:obj:`numpy.ndarray`):
+            Number of roots in each pixel.
+        width (int):
+            Width of the screen.
+
+    Returns:
+        :obj:`numpy.ndarray`: The `counts` array.
+    """
+    rows, cols = np.divmod(pixels, width)
+    counts[rows, cols] += hits
+    return counts
+
+
+def count_root_hits(
+    roots: np.ndarray,
+    width: int,
+    height: int,
+    *,
+    scale_x: float = 1,
+    scale_y: float = 1,
+    shift_x: float = 0,
+    shift_y: float = 0,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Counts the roots falling in each pixel of a screen.
+
+    Args:
+        roots (:obj:`numpy.ndarray`):
+            Complex numbers (roots) to be plotted on the screen.
+        width (int):
+            Width of the screen.
+        height (int):
+            Height of the screen.
+        scale_x (float, optional):
+            Scaling factor for the x-axis. Defaults to 1.
+        scale_y (float, optional):
+            Scaling factor for the y-axis. Defaults to 1.
+        shift_x (float, optional):
+            Shift value for the x-axis. Defaults to 0.
+        shift_y (float, optional):
+            Shift value for the y-axis. Defaults to 0.
+
+    Returns:
+        tuple[:obj:`numpy.ndarray`, :obj:`numpy.ndarray`]: The flat indices
+        `row * width + column` of the pixels hit by at least one root, in rows of
+        increasing imaginary part, and the number of roots in each of them.
+
+    Note:
+        - Coordinates are truncated toward zero like `int`, so roots less than a
+          pixel left of or below the screen land in its first column or row.
+          Roots that are not finite are ignored.
+        - Roots are counted with :py:func:`numpy.bincount` when they are many
+          compared to the pixels, and with :py:func:`numpy.unique` otherwise, so
+          the temporary arrays stay small when plotting a chunk of roots on a
+          large screen.
+    """
+    roots = np.asarray(roots, dtype=np.complex128).ravel()
+    x = (roots.real - shift_x) / scale_x + width / 2
+    y = (roots.imag - shift_y) / scale_y + height / 2
+    inside = (x > -1) & (x < width) & (y > -1) & (y < height)
+    flat = y[inside].astype(np.int64) * width + x[inside].astype(np.int64)
+    if len(flat) * 8 < width * height:
+        return np.unique(flat, return_counts=True)
+    hits = np.bincount(flat, minlength=width * height)
+    pixels = np.flatnonzero(hits)
+    return pixels, hits[pixels]
+
+
+def accumulate_roots_multi_color(
+    roots: np.ndarray,
+    color: np.ndarray,
+    width: int,
+    height: int,
+    screen_buffer: np.ndarray,
+    *,
+    scale_x: float = 1,
+    scale_y: float = 1,
+    shift_x: float = 0,
+    shift_y: float = 0,
+    color_range: int = 8,
+    radius: int = 1,
+    kernel: str = "disk",
+):
+    """
+    Adds roots of one degree to a multi-color screen buffer, without clearing it
+    first, so roots can be plotted one chunk at a time.
+
+    Args:
+        roots (:obj:`numpy.ndarray`):
+            Complex numbers (roots) to be plotted on the screen.
+        color (:obj:`numpy.ndarray`):
+            Color of the degree of the roots.
+        width (int):
+            Width of the screen.
+        height (int):
+            Height of the screen.
+        screen_buffer (:obj:`numpy.ndarray`):
+            Buffer accumulating the colors, in rows of increasing imaginary part.
+        scale_x (float, optional):
+            Scaling factor for the x-axis. Defaults to 1.
+        scale_y (float, optional):
+            Scaling factor for the y-axis. Defaults to 1.
+        shift_x (float, optional):
+            Shift value for the x-axis. Defaults to 0.
+        shift_y (float, optional):
+            Shift value for the y-axis. Defaults to 0.
+        color_range (int, optional):
+            Number of color shades to represent the roots. Defaults to 8.
+        radius (int, optional):
+            Radius of the stamp of each root, see :py:func:`stamp_offsets`.
+            Defaults to 1, a single pixel.
+        kernel (str, optional):
+            Kernel of the stamp, see :py:func:`stamp_offsets`. Defaults to "disk".
+
+    Returns:
+        :obj:`numpy.ndarray`: The `screen_buffer` array.
+    """
+    pixels, hits = count_root_hits(
+        roots,
+        width,
+        height,
+        scale_x=scale_x,
+        scale_y=scale_y,
+        shift_x=shift_x,
+        shift_y=shift_y,
+    )
+    return add_root_hits_multi_color(
+        screen_buffer,
+        pixels,
+        hits,
+        color,
+        width,
+        height,
+        color_range=color_range,
+        radius=radius,
+        kernel=kernel,
+    )
+
+
+def stamp_offsets(
+    radius: int = 1, kernel: str = "disk"
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the stamp drawn around each root of a multi-color plot.
+
+    Args:
+        radius (int, optional):
+            Radius of the stamp: the pixels at a distance below `radius` of the
+            root are covered, so 1 covers the pixel of the root only. Defaults
+            to 1.
+        kernel (str, optional):
+            One of `STAMP_KERNELS`: "disk" covers the pixels of the disk evenly,
+            "square" the pixels of the square around the disk, and "gaussian" the
+            pixels of the disk with a weight fading from 1 at the center.
+            Defaults to "disk".
+
+    Returns:
+        tuple[:obj:`numpy.ndarray`, :obj:`numpy.ndarray`]: The `(row, column)`
+        offsets of the covered pixels, of shape `(n, 2)`, and their weights in
+        (0, 1], of shape `(n,)`.
+
+    Raises:
+        AssertionError: If the radius is not positive or the kernel is unknown.
+    """
+    assert radius >= 1, "radius must be positive"
+    assert kernel in STAMP_KERNELS, f"Unknown kernel: {kernel}"
+    steps = np.arange(-(radius - 1), radius)
+    rows, cols = (a.ravel() for a in np.meshgrid(steps, steps, indexing="ij"))
+    distances = rows**2 + cols**2
+    covered = np.ones_like(distances, dtype=bool)
+    if kernel != "square":
+        covered = distances <= (radius - 1) ** 2
+    weights = np.ones(covered.sum())
+    if kernel == "gaussian":
+        sigma = radius / 2
+        weights = np.exp(-distances[covered] / (2 * sigma**2))
+    return np.stack([rows[covered], cols[covered]], axis=1), weights
+
+
+def add_root_hits_multi_color(
+    screen_buffer: np.ndarray,
+    pixels: np.ndarray,
+    hits: np.ndarray,
+    color: np.ndarray,
+    width: int,
+    height: int,
+    *,
+    color_range: int = 8,
+    radius: int = 1,
+    kernel: str = "disk",
+) -> np.ndarray:
+    """
+    Splats the stamps of the roots of one degree, in its color, on a multi-color
+    screen buffer.
+
+    Each root adds its color divided by `color_range`, times the weight of the
+    kernel, to each pixel of its stamp, so the colors of the degrees blend
+    additively. All the roots and the offsets of the stamp are added at once.
+
+    Args:
+        screen_buffer (:obj:`numpy.ndarray`):
+            Integer buffer accumulating the colors, in rows of increasing
+            imaginary part. The colors are not clamped, so they must be clamped to
+            255 when they are copied to a screen.
+        pixels (:obj:`numpy.ndarray`):
+            Flat indices of the pixels hit, see :py:func:`count_root_hits`.
+        hits (:obj:`numpy.ndarray`):
+            Number of roots in each pixel.
+        color (:obj:`numpy.ndarray`):
+            Color of the degree of the roots.
+        width (int):
+            Width of the screen.
+        height (int):
+            Height of the screen.
+        color_range (int, optional):
+            Number of color shades to represent the roots. Defaults to 8.
+        radius (int, optional):
+            Radius of the stamp, see :py:func:`stamp_offsets`. Defaults to 1.
+        kernel (str, optional):
+            Kernel of the stamp, see :py:func:`stamp_offsets`. Defaults to "disk".
+
+    Returns:
+        :obj:`numpy.ndarray`: The `screen_buffer` array.
+
+    Note:
+        The color added by each offset of the stamp is rounded down to an
+        integer before it is multiplied by the hits, so plotting the roots in
+        chunks gives the same buffer as plotting them at once.
+    """
+    offsets, weights = stamp_offsets(radius, kernel)
+    levels = (weights[:, None] * (np.asarray(color) // color_range)).astype(np.int64)
+    rows, cols = np.divmod(pixels, width)
+    stamp_rows = rows + offsets[:, :1]
+    stamp_cols = cols + offsets[:, 1:]
+    inside = (
+        (stamp_rows >= 0)
+        & (stamp_rows < height)
+        & (stamp_cols >= 0)
+        & (stamp_cols < width)
+    )
+    targets, inverse = np.unique(
+        (stamp_rows * width + stamp_cols)[inside], return_inverse=True
+    )
+    stamp = np.broadcast_to(np.arange(len(offsets))[:, None], inside.shape)[inside]
+    amounts = np.broadcast_to(hits, inside.shape)[inside]
+    target_rows, target_cols = np.divmod(targets, width)
+    for channel in range(levels.shape[1]):
+        sums = np.bincount(
+            inverse, weights=amounts * levels[stamp, channel], minlength=len(targets)
+        )
+        screen_buffer[target_rows, target_cols, channel] += sums.astype(np.int64)
+    return screen_buffer
+
+
+def merge_root_hits(
+    pixels: list[np.ndarray], hits: list[np.ndarray]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Merges root counts of several parts of the roots of a screen.
+
+    Args:
+        pixels (list[:obj:`numpy.ndarray`]):
+            Flat indices of the pixels hit by each part.
+        hits (list[:obj:`numpy.ndarray`]):
+            Number of roots in each pixel for each part.
+
+    Returns:
+        tuple[:obj:`numpy.ndarray`, :obj:`numpy.ndarray`]: The sorted flat indices
+        of the pixels hit by any part, and the total number of roots in each.
+    """
+    if not pixels:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    merged, inverse = np.unique(np.concatenate(pixels), return_inverse=True)
+    totals = np.bincount(inverse, weights=np.concatenate(hits), minlength=len(merged))
+    return merged, totals.astype(np.int64)
+
+
+def count_field_hits(
+    ff: FiniteField,
+    degree: int,
+    start: int,
+    stop: int,
+    width: int,
+    height: int,
+    *,
+    scale_x: float = 1,
+    scale_y: float = 1,
+    shift_x: float = 0,
+    shift_y: float = 0,
+    chunk_size: int = solvers.DEFAULT_CHUNK_SIZE,
+    symmetries: tuple[str, ...] = (),
+    solver: str = "eig",
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Counts the roots of a range of the polynomials of a degree over a finite field
+    in each pixel of a screen, one chunk of polynomials at a time. Used by the
+    workers of :py:func:`iter_field_hits`.
+
+    Args:
+        ff (:obj:`FiniteField`):
+            The finite field.
+        degree (int):
+            Degree of the polynomials.
+        start (int):
+            Index of the first polynomial.
+        stop (int):
+            Index after the last polynomial.
+        width (int):
+            Width of the screen.
+        height (int):
+            Height of the screen.
+        scale_x (float, optional):
+            Scaling factor for the x-axis. Defaults to 1.
+        scale_y (float, optional):
+            Scaling factor for the y-axis. Defaults to 1.
+        shift_x (float, optional):
+            Shift value for the x-axis. Defaults to 0.
+        shift_y (float, optional):
+            Shift value for the y-axis. Defaults to 0.
+        chunk_size (int, optional):
+            Number of polynomials solved at once. Defaults to
+            `solvers.DEFAULT_CHUNK_SIZE`.
+        symmetries (tuple[str, ...], optional):
+            Symmetries used to solve only the canonical polynomials, see
+            :py:func:`symmetries.iter_canonical_roots`. Defaults to none.
+        solver (str, optional):
+            Name of the root solver, see :py:func:`solvers.solve_roots`. Defaults
+            to "eig".
+
+    Returns:
+        tuple[:obj:`numpy.ndarray`, :obj:`numpy.ndarray`]: The pixels hit and
+        their number of roots, see :py:func:`count_root_hits`.
+    """
+    pixels: list[np.ndarray] = []
+    hits: list[np.ndarray] = []
+    for roots, weight in field_symmetries.iter_canonical_roots(
+        ff,
+        degree,
+        start,
+        stop,
+        symmetries=symmetries,
+        chunk_size=chunk_size,
+        solver=solver,
+    ):
+        chunk_pixels, chunk_hits = count_root_hits(
+            roots,
+            width,
+            height,
+            scale_x=scale_x,
+            scale_y=scale_y,
+            shift_x=shift_x,
+            shift_y=shift_y,
+        )
+        pixels.append(chunk_pixels)
+        hits.append(chunk_hits * weight)
+    return merge_root_hits(pixels, hits)
+
+
+def iter_field_hits(
+    ff: FiniteField,
+    min_degree: int,
+    max_degree: int,
+    width: int,
+    height: int,
+    *,
+    scale_x: float = 1,
+    scale_y: float = 1,
+    shift_x: float = 0,
+    shift_y: float = 0,
+    chunk_size: int = solvers.DEFAULT_CHUNK_SIZE,
+    symmetries: tuple[str, ...] = (),
+    workers: Optional[int] = 1,
+    root_cache: Optional["RootCache"] = None,
+    solver: str = "eig",
+) -> Iterator[tuple[int, np.ndarray, np.ndarray]]:
+    """
+    Counts the roots of the polynomials over a finite field in each pixel of a
+    screen, streaming the counts of parts of the polynomials.
+
+    With one worker, each chunk of polynomials is solved and counted in this
+    process. With several, the indices of the polynomials of each degree are
+    split into shards counted by a pool of processes, largest shards first, and
+    only the counts of the shards are sent back.
+
+    Args:
+        ff (:obj:`FiniteField`):
+            The finite field.
+        min_degree (int):
+            Minimum degree of the polynomials.
+        max_degree (int):
+            Maximum degree of the polynomials.
+        width (int):
+            Width of the screen.
+        height (int):
+            Height of the screen.
+        scale_x (float, optional):
+            Scaling factor for the x-axis. Defaults to 1.
+        scale_y (float, optional):
+            Scaling factor for the y-axis. Defaults to 1.
+        shift_x (float, optional):
+            Shift value for the x-axis. Defaults to 0.
+        shift_y (float, optional):
+            Shift value for the y-axis. Defaults to 0.
+        chunk_size (int, optional):
+            Number of polynomials solved at once. Defaults to
+            `solvers.DEFAULT_CHUNK_SIZE`.
+        symmetries (tuple[str, ...], optional):
+            Symmetries used to solve only the canonical polynomials, see
+            :py:func:`symmetries.canonical_ranges`. Defaults to none.
+        workers (Optional[int], optional):
+            Number of processes. `None` uses all CPUs. Defaults to 1.
+        root_cache (Optional[:obj:`RootCache`], optional):
+            Cache of the roots on disk. When given, the roots of each degree are
+            read from the cache, computing them first if they are missing, and
+            plotted one chunk at a time in this process; `symmetries`,
+            `workers` and `solver` are not used. Defaults to no cache.
+        solver (str, optional):
+            Name of the root solver, see :py:func:`solvers.solve_roots`. Defaults
+            to "eig".
+
+    Yields:
+        tuple[int, :obj:`numpy.ndarray`, :obj:`numpy.ndarray`]: The degree of a
+        part of the polynomials, the pixels hit by their roots and the number of
+        roots in each, in increasing degrees.
+    """
+    viewport = {
+        "scale_x": scale_x,
+        "scale_y": scale_y,
+        "shift_x": shift_x,
+        "shift_y": shift_y,
+    }
+    if root_cache is not None:
+        for degree in range(min_degree, max_degree + 1):
+            roots = root_cache.get(ff, degree, chunk_size=chunk_size)
+            step = chunk_size * max(degree, 1)
+            for start in range(0, len(roots), step):
+                chunk = np.asarray(roots[start : start + step])
+                yield degree, *count_root_hits(chunk, width, height, **viewport)
+        return
+    ranges = [
+        (degree, start, stop)
+        for degree in range(min_degree, max_degree + 1)
+        for start, stop in field_symmetries.canonical_ranges(ff, degree, symmetries)
+    ]
+    if workers == 1:
+        for degree, start, stop in ranges:
+            for roots, weight in field_symmetries.iter_canonical_roots(
+                ff,
+                degree,
+                start,
+                stop,
+                symmetries=symmetries,
+                chunk_size=chunk_size,
+                solver=solver,
+            ):
+                pixels, hits = count_root_hits(roots, width, height, **viewport)
+                yield degree, pixels, hits * weight
+        return
+    workers = workers or os.cpu_count() or 1
+    # a few shards per worker balance the load
+    total = sum(stop - start for _, start, stop in ranges)
+    shard_size = max(chunk_size, -(-total // (4 * workers)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        shards = [
+            (degree, shard_start, min(shard_start + shard_size, stop))
+            for degree, start, stop in ranges
+            for shard_start in range(start, stop, shard_size)
+        ]
+        futures = {}
+        for shard in sorted(shards, key=lambda shard: shard[1] - shard[2]):
+            futures[shard] = executor.submit(
+                count_field_hits,
+                ff,
+                *shard,
+                width,
+                height,
+                **viewport,
+                chunk_size=chunk_size,
+                symmetries=symmetries,
+                solver=solver,
+            )
+        for shard in shards:
+            yield shard[0], *futures.pop(shard).result()
+
+
+class RootCache:
+    """
+    Caches the roots of the polynomials over finite fields on disk, so renders of
+    the same field with other viewports, color ranges or colors only plot them.
+
+    The roots of each field and degree are stored in a `.npy` file named after a
+    hash of the elements and the degree, in the order of
+    :py:meth:`polynomiograpy.common.FiniteField.generate_polynomials`, and loaded
+    as a read-only memory map.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Initialize a cache, creating its directory if needed.
+
+        Args:
+            directory (str):
+                Directory of the cached roots, which may be shared by processes.
+        """
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, ff: FiniteField, degree: int) -> str:
+        """
+        Returns the path of the file of the roots of a field and degree.
+        """
+        elements = repr(np.asarray(ff.elements).tolist()).encode()
+        digest = hashlib.sha1(elements).hexdigest()[:16]
+        return os.path.join(self.directory, f"roots-{digest}-{degree}.npy")
+
+    def get(
+        self,
+        ff: FiniteField,
+        degree: int,
+        *,
+        chunk_size: int = solvers.DEFAULT_CHUNK_SIZE,
+    ) -> np.ndarray:
+        """
+        Returns the roots of the polynomials of a degree over a finite field,
+        computing and storing them first if they are not cached.
+
+        Args:
+            ff (:obj:`FiniteField`):
+                The finite field.
+            degree (int):
+                Degree of the polynomials.
+            chunk_size (int, optional):
+                Number of polynomials solved at once when the roots are computed.
+                Defaults to `solvers.DEFAULT_CHUNK_SIZE`.
+
+        Returns:
+            :obj:`numpy.memmap`: The roots, a read-only memory map.
+
+        Raises:
+            ValueError: If the cached file does not hold the expected roots.
+        """
+        path = self.path(ff, degree)
+        if os.path.exists(path):
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._write(path, ff, degree, chunk_size)
+        roots = np.load(path, mmap_mode="r")
+        expected = (ff.count_polynomials(degree) * degree,)
+        if roots.dtype != np.complex128 or roots.shape != expected:
+            raise ValueError(f"{path} does not hold the roots of degree {degree}")
+        return roots
+
+    def _write(self, path: str, ff: FiniteField, degree: int, chunk_size: int):
+        count = ff.count_polynomials(degree)
+        # written under a temporary name, so readers never see a partial file
+        temporary = f"{path}.{os.getpid()}.tmp"
+        try:
+            roots = np.lib.format.open_memmap(
+                temporary, mode="w+", dtype=np.complex128, shape=(count * degree,)
+            )
+            for start in range(0, count, chunk_size):
+                stop = min(start + chunk_size, count)
+                roots[start * degree : stop * degree] = solvers.finite_field_roots(
+                    ff, degree, start=start, stop=stop, chunk_size=chunk_size
+                )
+            roots.flush()
+            del roots
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
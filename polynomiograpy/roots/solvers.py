@@ -0,0 +1,283 @@
+from typing import Optional
+
+import numpy as np
+
+from polynomiograpy.common.finite_field import FiniteField
+
+__all__ = [
+    "DEFAULT_CHUNK_SIZE",
+    "companion_matrices",
+    "batched_roots",
+    "aberth_roots",
+    "SOLVERS",
+    "solve_roots",
+    "finite_field_roots",
+]
+
+# Number of polynomials solved by one eigenvalue call. Bounds the memory of the
+# stacked companion matrices to `DEFAULT_CHUNK_SIZE * degree ** 2` doubles.
+DEFAULT_CHUNK_SIZE = 4096
+
+# Iterations of the Aberth-Ehrlich method after which the polynomials whose roots
+# did not converge are solved with their companion matrices, and relative size of
+# the last correction of the roots below which they converged.
+ABERTH_MAX_ITERATIONS = 50
+ABERTH_TOLERANCE = 1e-14
+
+
+def companion_matrices(coeffs: np.ndarray) -> np.ndarray:
+    """
+    Builds the companion matrices of polynomials of the same degree.
+
+    Args:
+        coeffs (:obj:`numpy.ndarray`):
+            Array of shape `(n, degree + 1)` with the coefficients of a polynomial
+            per row, from the constant term to the leading coefficient.
+
+    Returns:
+        :obj:`numpy.ndarray`:
+            Array of shape `(n, degree, degree)` with the companion matrix of each
+            polynomial, the same as
+            :py:func:`numpy.polynomial.polynomial.polycompanion`.
+    """
+    coeffs = np.asarray(coeffs, dtype=np.float64)
+    count, degree = coeffs.shape[0], coeffs.shape[1] - 1
+    matrices = np.zeros((count, degree, degree), dtype=np.float64)
+    # ones below the diagonal
+    matrices.reshape(count, -1)[:, degree :: degree + 1] = 1
+    matrices[:, :, -1] -= coeffs[:, :-1] / coeffs[:, -1:]
+    return matrices
+
+
+def batched_roots(
+    coeffs: np.ndarray, *, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> np.ndarray:
+    """
+    Computes the roots of many polynomials of the same degree, with one eigenvalue
+    solve per chunk of stacked companion matrices.
+
+    Args:
+        coeffs (:obj:`numpy.ndarray`):
+            Array of shape `(n, degree + 1)` with the coefficients of a polynomial
+            per row, from the constant term to the leading coefficient, which must
+            not be zero.
+        chunk_size (int, optional):
+            Number of polynomials solved at once. Defaults to
+            `DEFAULT_CHUNK_SIZE`.
+
+    Returns:
+        :obj:`numpy.ndarray`:
+            Complex array of shape `(n, degree)` with the sorted roots of each
+            polynomial, the same as the ones of
+            :py:meth:`numpy.polynomial.Polynomial.roots`.
+
+    Raises:
+        AssertionError: If `coeffs` is not a 2D array or a leading coefficient is
+            zero.
+    """
+    coeffs = np.asarray(coeffs)
+    assert coeffs.ndim == 2 and coeffs.shape[1] >= 1, "Wrong shape for coeffs"
+    assert np.all(coeffs[:, -1] != 0), "Leading coefficients must not be zero"
+    count, degree = coeffs.shape[0], coeffs.shape[1] - 1
+    roots = np.empty((count, degree), dtype=np.complex128)
+    if degree == 0:
+        return roots
+    for start in range(0, count, chunk_size):
+        stop = min(start + chunk_size, count)
+        roots[start:stop] = np.linalg.eigvals(companion_matrices(coeffs[start:stop]))
+    roots.sort(axis=1)
+    return roots
+
+
+def aberth_roots(
+    coeffs: np.ndarray,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_iterations: int = ABERTH_MAX_ITERATIONS,
+    tolerance: float = ABERTH_TOLERANCE,
+) -> np.ndarray:
+    """
+    Computes the roots of many polynomials of the same degree with the
+    Aberth-Ehrlich method, which refines all the roots of a chunk of polynomials
+    at once.
+
+    Each iteration costs `O(degree ** 2)` per polynomial, against `O(degree ** 3)`
+    for the eigenvalues of :py:func:`batched_roots`, so it is faster for high
+    degrees. The roots of a polynomial are final once their last corrections are
+    below `tolerance` relative to the roots. The polynomials whose roots did not
+    converge, like the ones with multiple roots, where the method slows down, are
+    solved by :py:func:`batched_roots`.
+
+    Args:
+        coeffs (:obj:`numpy.ndarray`):
+            Array of shape `(n, degree + 1)` with the coefficients of a polynomial
+            per row, from the constant term to the leading coefficient, which must
+            not be zero.
+        chunk_size (int, optional):
+            Number of polynomials solved at once. Defaults to
+            `DEFAULT_CHUNK_SIZE`.
+        max_iterations (int, optional):
+            Maximum number of iterations. Defaults to `ABERTH_MAX_ITERATIONS`.
+        tolerance (float, optional):
+            Relative size of the corrections of converged roots. Defaults to
+            `ABERTH_TOLERANCE`.
+
+    Returns:
+        :obj:`numpy.ndarray`:
+            Complex array of shape `(n, degree)` with the sorted roots of each
+            polynomial, which agree with the ones of :py:func:`batched_roots` up
+            to rounding errors.
+
+    Raises:
+        AssertionError: If `coeffs` is not a 2D array or a leading coefficient is
+            zero.
+    """
+    coeffs = np.asarray(coeffs)
+    assert coeffs.ndim == 2 and coeffs.shape[1] >= 1, "Wrong shape for coeffs"
+    assert np.all(coeffs[:, -1] != 0), "Leading coefficients must not be zero"
+    count, degree = coeffs.shape[0], coeffs.shape[1] - 1
+    roots = np.zeros((count, degree), dtype=np.complex128)
+    # the roots 0 of the polynomials whose lowest coefficients are zero are
+    # exact, and the method would only converge slowly to them
+    zeros = np.argmax(np.append(coeffs, np.ones((count, 1)), axis=1) != 0, axis=1)
+    for zero_count in np.unique(zeros[zeros < degree]):
+        rows = np.flatnonzero(zeros == zero_count)
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start : start + chunk_size]
+            roots[chunk, zero_count:] = _aberth_chunk(
+                coeffs[chunk, zero_count:], max_iterations, tolerance
+            )
+    stragglers = np.flatnonzero(np.any(np.isnan(roots), axis=1))
+    if len(stragglers):
+        roots[stragglers] = batched_roots(coeffs[stragglers], chunk_size=chunk_size)
+    roots.sort(axis=1)
+    return roots
+
+
+def _aberth_chunk(
+    coeffs: np.ndarray, max_iterations: int, tolerance: float
+) -> np.ndarray:
+    coeffs = np.asarray(coeffs, dtype=np.float64)
+    monic = coeffs[:, :-1] / coeffs[:, -1:]
+    count, degree = monic.shape
+    diagonal = np.arange(degree)
+    # start on a circle around the mean of the roots, whose radius is the
+    # geometric mean of their moduli, with an angle breaking the symmetry of real
+    # polynomials
+    center = -monic[:, -1] / degree
+    radius = np.abs(monic[:, 0]) ** (1 / degree)
+    angles = 2 * np.pi * diagonal / degree + 0.4
+    z = center[:, None] + radius[:, None] * np.exp(1j * angles)
+    roots = np.full((count, degree), np.nan, dtype=np.complex128)
+    active = np.arange(count)
+    with np.errstate(all="ignore"):
+        for _ in range(max_iterations):
+            values, derivatives = np.ones_like(z), np.zeros_like(z)
+            for position in range(degree - 1, -1, -1):
+                derivatives = derivatives * z + values
+                values = values * z + monic[active, position, None]
+            ratios = values / derivatives
+            # sums of 1 / (z_k - z_j) for j != k, in real arithmetic
+            real = z.real[:, :, None] - z.real[:, None, :]
+            imag = z.imag[:, :, None] - z.imag[:, None, :]
+            inverse_norms = real * real + imag * imag
+            inverse_norms[:, diagonal, diagonal] = np.inf
+            np.reciprocal(inverse_norms, out=inverse_norms)
+            repulsions = np.einsum("nkj,nkj->nk", real, inverse_norms) - 1j * (
+                np.einsum("nkj,nkj->nk", imag, inverse_norms)
+            )
+            corrections = ratios / (1 - ratios * repulsions)
+            # exact roots have no correction
+            corrections[values == 0] = 0
+            z = z - corrections
+            converged = np.all(np.abs(corrections) <= tolerance * np.abs(z), axis=1)
+            failed = ~np.all(np.isfinite(z), axis=1)
+            roots[active[converged & ~failed]] = z[converged & ~failed]
+            remaining = ~(converged | failed)
+            active, z = active[remaining], z[remaining]
+            if not len(active):
+                break
+    return roots
+
+
+# Root solvers by name.
+SOLVERS = {
+    "eig": batched_roots,
+    "aberth": aberth_roots,
+}
+
+
+def solve_roots(
+    coeffs: np.ndarray,
+    *,
+    solver: str = "eig",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> np.ndarray:
+    """
+    Computes the roots of many polynomials of the same degree with one of the
+    `SOLVERS`.
+
+    Args:
+        coeffs (:obj:`numpy.ndarray`):
+            Array of shape `(n, degree + 1)` with the coefficients of a polynomial
+            per row, from the constant term to the leading coefficient.
+        solver (str, optional):
+            "eig" for :py:func:`batched_roots`, or "aberth" for
+            :py:func:`aberth_roots`, which is slower up to degree 60 or so and
+            about twice as fast at degree 80. Defaults to "eig".
+        chunk_size (int, optional):
+            Number of polynomials solved at once. Defaults to
+            `DEFAULT_CHUNK_SIZE`.
+
+    Returns:
+        :obj:`numpy.ndarray`: Complex array of shape `(n, degree)` with the
+        sorted roots of each polynomial.
+
+    Raises:
+        AssertionError: If the solver is unknown.
+    """
+    assert solver in SOLVERS, f"Unknown solver: {solver}"
+    return SOLVERS[solver](coeffs, chunk_size=chunk_size)
+
+
+def finite_field_roots(
+    ff: FiniteField,
+    degree: int,
+    *,
+    start: int = 0,
+    stop: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    solver: str = "eig",
+) -> np.ndarray:
+    """
+    Computes the roots of the polynomials of a degree over a finite field, one
+    chunk of coefficients at a time, so only the roots are held in memory.
+
+    Args:
+        ff (:obj:`FiniteField`):
+            The finite field.
+        degree (int):
+            Degree of the polynomials.
+        start (int, optional):
+            Index of the first polynomial, see
+            :py:meth:`polynomiograpy.common.FiniteField.coefficients_at`. Defaults
+            to 0.
+        stop (Optional[int], optional):
+            Index after the last polynomial. Defaults to all polynomials.
+        chunk_size (int, optional):
+            Number of polynomials solved at once. Defaults to
+            `DEFAULT_CHUNK_SIZE`.
+        solver (str, optional):
+            Name of the root solver, see :py:func:`solve_roots`. Defaults to
+            "eig".
+
+    Returns:
+        :obj:`numpy.ndarray`: The roots, in the order of
+        :py:meth:`polynomiograpy.common.FiniteField.generate_polynomials`.
+    """
+    roots = np.empty(0, dtype=np.complex128)
+    chunks = [
+        solve_roots(coeffs, solver=solver, chunk_size=chunk_size).ravel()
+        for coeffs in ff.iter_coefficient_chunks(degree, chunk_size, start, stop)
+    ]
+    return np.concatenate([roots, *chunks])
@@ -0,0 +1,292 @@
+import os
+from typing import Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+from . import helpers
+
+__all__ = ["RootIndex"]
+
+# Number of roots read at once when building an index.
+BUILD_CHUNK_SIZE = 1 << 20
+
+# Average number of roots per cell of the grid of an index, and maximum number
+# of cells along each axis.
+ROOTS_PER_CELL = 64
+MAX_CELLS = 2048
+
+ROOTS_FILENAME = "roots.npy"
+CELLS_FILENAME = "cells.npz"
+
+
+def _iter_chunks(parts: list[np.ndarray], chunk_size: int) -> Iterator[np.ndarray]:
+    for part in parts:
+        for start in range(0, len(part), chunk_size):
+            chunk = np.asarray(part[start : start + chunk_size], dtype=np.complex128)
+            yield chunk[np.isfinite(chunk)]
+
+
+class RootIndex:
+    """
+    Uniform grid of buckets over a set of roots, so the roots in a viewport can
+    be found without reading the others.
+
+    The roots are sorted by cell, the cells in rows of increasing imaginary part,
+    so the roots of the cells of a row of the grid are contiguous. A query reads
+    one slice of roots per row of cells overlapping the viewport, which only
+    touches the roots around the viewport when zooming into a large root set.
+    """
+
+    def __init__(
+        self,
+        roots: np.ndarray,
+        offsets: np.ndarray,
+        bounds: tuple[float, float, float, float],
+        cells: tuple[int, int],
+    ):
+        """
+        Initialize an index from its arrays, see :py:meth:`build`.
+
+        Args:
+            roots (:obj:`numpy.ndarray`):
+                Finite roots sorted by cell, possibly a memory map.
+            offsets (:obj:`numpy.ndarray`):
+                Index of the first root of each cell in `roots`, plus the number
+                of roots, of shape `(rows * columns + 1,)`.
+            bounds (tuple[float, float, float, float]):
+                `(min_real, max_real, min_imag, max_imag)` of the grid.
+            cells (tuple[int, int]):
+                Number of `(columns, rows)` of the grid.
+        """
+        self.roots = roots
+        self.offsets = offsets
+        self.bounds = tuple(float(b) for b in bounds)
+        self.cells = (int(cells[0]), int(cells[1]))
+
+    @classmethod
+    def build(
+        cls,
+        roots: Union[np.ndarray, Sequence[np.ndarray]],
+        *,
+        bounds: Optional[tuple[float, float, float, float]] = None,
+        cells: Optional[tuple[int, int]] = None,
+        path: Optional[str] = None,
+        chunk_size: int = BUILD_CHUNK_SIZE,
+    ) -> "RootIndex":
+        """
+        Builds an index over roots, reading them one chunk at a time.
+
+        Args:
+            roots (:obj:`numpy.ndarray` | Sequence[:obj:`numpy.ndarray`]):
+                The roots, or several arrays of roots like the ones of each degree
+                of a finite field, possibly memory maps of a
+                :obj:`helpers.RootCache`. Roots that are not finite are left out.
+            bounds (Optional[tuple[float, float, float, float]], optional):
+                `(min_real, max_real, min_imag, max_imag)` of the grid, which must
+                hold all the roots. Defaults to the bounds of the roots, which
+                takes one more pass over them.
+            cells (Optional[tuple[int, int]], optional):
+                Number of `(columns, rows)` of the grid. Defaults to a square grid
+                with about `ROOTS_PER_CELL` roots per cell.
+            path (Optional[str], optional):
+                Directory where the index is saved, its sorted roots being written
+                through a memory map, see :py:meth:`load`. Defaults to an index in
+                memory.
+            chunk_size (int, optional):
+                Number of roots read at once. Defaults to `BUILD_CHUNK_SIZE`.
+
+        Returns:
+            :obj:`RootIndex`: The index.
+        """
+        parts = [roots] if isinstance(roots, np.ndarray) else list(roots)
+        if bounds is None:
+            lows, highs = [], []
+            for chunk in _iter_chunks(parts, chunk_size):
+                if len(chunk):
+                    lows.append([chunk.real.min(), chunk.imag.min()])
+                    highs.append([chunk.real.max(), chunk.imag.max()])
+            low = np.min(lows, axis=0) if lows else np.zeros(2)
+            high = np.max(highs, axis=0) if highs else np.zeros(2)
+            bounds = (low[0], high[0], low[1], high[1])
+        count = sum(len(chunk) for chunk in _iter_chunks(parts, chunk_size))
+        if cells is None:
+            side = int(np.clip(np.ceil(np.sqrt(count / ROOTS_PER_CELL)), 1, MAX_CELLS))
+            cells = (side, side)
+        index = cls(np.empty(0, dtype=np.complex128), np.empty(0), bounds, cells)
+        columns, rows = index.cells
+
+        counts = np.zeros(columns * rows, dtype=np.int64)
+        for chunk in _iter_chunks(parts, chunk_size):
+            counts += np.bincount(index._cell_ids(chunk), minlength=len(counts))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        if path is None:
+            sorted_roots = np.empty(offsets[-1], dtype=np.complex128)
+        else:
+            os.makedirs(path, exist_ok=True)
+            sorted_roots = np.lib.format.open_memmap(
+                os.path.join(path, ROOTS_FILENAME),
+                mode="w+",
+                dtype=np.complex128,
+                shape=(int(offsets[-1]),),
+            )
+        # next free position of each cell
+        cursors = offsets[:-1].copy()
+        for chunk in _iter_chunks(parts, chunk_size):
+            ids = index._cell_ids(chunk)
+            order = np.argsort(ids, kind="stable")
+            ids = ids[order]
+            cell_ids, firsts, cell_counts = np.unique(
+                ids, return_index=True, return_counts=True
+            )
+            ranks = np.arange(len(ids)) - np.repeat(firsts, cell_counts)
+            sorted_roots[cursors[ids] + ranks] = chunk[order]
+            cursors[cell_ids] += cell_counts
+        index.roots = sorted_roots
+        index.offsets = offsets
+        if path is not None:
+            sorted_roots.flush()
+            np.savez(
+                os.path.join(path, CELLS_FILENAME),
+                offsets=offsets,
+                bounds=np.array(index.bounds),
+                cells=np.array(index.cells),
+            )
+        return index
+
+    @classmethod
+    def load(cls, path: str, *, mmap_mode: Optional[str] = "r") -> "RootIndex":
+        """
+        Loads an index saved by :py:meth:`build`.
+
+        Args:
+            path (str):
+                Directory of the index.
+            mmap_mode (Optional[str], optional):
+                Memory mapping mode of the roots, or `None` to read them into
+                memory. Defaults to `"r"`, which opens indices of any size
+                instantly.
+
+        Returns:
+            :obj:`RootIndex`: The index.
+
+        Raises:
+            ValueError: If the files of the index do not match.
+        """
+        roots = np.load(os.path.join(path, ROOTS_FILENAME), mmap_mode=mmap_mode)
+        with np.load(os.path.join(path, CELLS_FILENAME)) as cells:
+            offsets, bounds, shape = cells["offsets"], cells["bounds"], cells["cells"]
+        if len(offsets) != shape[0] * shape[1] + 1 or offsets[-1] != len(roots):
+            raise ValueError(f"{path} is not a root index")
+        return cls(roots, offsets, tuple(bounds), tuple(shape))
+
+    def __len__(self) -> int:
+        return len(self.roots)
+
+    def _cell_ids(self, roots: np.ndarray) -> np.ndarray:
+        min_real, max_real, min_imag, max_imag = self.bounds
+        columns, rows = self.cells
+        column = self._positions(roots.real, min_real, max_real, columns)
+        row = self._positions(roots.imag, min_imag, max_imag, rows)
+        return row * columns + column
+
+    @staticmethod
+    def _positions(values, low: float, high: float, count: int) -> np.ndarray:
+        span = (high - low) or 1.0
+        positions = np.floor((np.asarray(values) - low) * (count / span))
+        return np.clip(positions, 0, count - 1).astype(np.int64)
+
+    def query(
+        self, min_real: float, max_real: float, min_imag: float, max_imag: float
+    ) -> np.ndarray:
+        """
+        Returns the roots in a rectangle, reading only the cells it overlaps.
+
+        Args:
+            min_real (float):
+                Minimum real part.
+            max_real (float):
+                Maximum real part.
+            min_imag (float):
+                Minimum imaginary part.
+            max_imag (float):
+                Maximum imaginary part.
+
+        Returns:
+            :obj:`numpy.ndarray`: The roots whose parts are within the bounds,
+            included.
+        """
+        columns, rows = self.cells
+        first_column, last_column = self._positions(
+            [min_real, max_real], *self.bounds[:2], columns
+        )
+        first_row, last_row = self._positions(
+            [min_imag, max_imag], *self.bounds[2:], rows
+        )
+        starts = self.offsets[
+            np.arange(first_row, last_row + 1) * columns + first_column
+        ]
+        stops = self.offsets[
+            np.arange(first_row, last_row + 1) * columns + last_column + 1
+        ]
+        roots = np.concatenate(
+            [np.empty(0, dtype=np.complex128)]
+            + [self.roots[start:stop] for start, stop in zip(starts, stops)]
+        )
+        inside = (
+            (roots.real >= min_real)
+            & (roots.real <= max_real)
+            & (roots.imag >= min_imag)
+            & (roots.imag <= max_imag)
+        )
+        return roots[inside]
+
+    def count_hits(
+        self,
+        width: int,
+        height: int,
+        *,
+        scale_x: float = 1,
+        scale_y: float = 1,
+        shift_x: float = 0,
+        shift_y: float = 0,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Counts the roots in each pixel of a screen, reading only the roots around
+        its viewport.
+
+        Args:
+            width (int):
+                Width of the screen.
+            height (int):
+                Height of the screen.
+            scale_x (float, optional):
+                Scaling factor for the x-axis. Defaults to 1.
+            scale_y (float, optional):
+                Scaling factor for the y-axis. Defaults to 1.
+            shift_x (float, optional):
+                Shift value for the x-axis. Defaults to 0.
+            shift_y (float, optional):
+                Shift value for the y-axis. Defaults to 0.
+
+        Returns:
+            tuple[:obj:`numpy.ndarray`, :obj:`numpy.ndarray`]: The pixels hit and
+            their number of roots, the same as
+            :py:func:`helpers.count_root_hits` of all the roots.
+        """
+        # roots up to a pixel left of or below the screen land in it, and a pixel
+        # more around the screen covers the rounding of the bounds
+        roots = self.query(
+            shift_x - (width / 2 + 2) * scale_x,
+            shift_x + (width / 2 + 1) * scale_x,
+            shift_y - (height / 2 + 2) * scale_y,
+            shift_y + (height / 2 + 1) * scale_y,
+        )
+        return helpers.count_root_hits(
+            roots,
+            width,
+            height,
+            scale_x=scale_x,
+            scale_y=scale_y,
+            shift_x=shift_x,
+            shift_y=shift_y,
+        )
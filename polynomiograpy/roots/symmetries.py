@@ -0,0 +1,182 @@
+from typing import Iterator
+
+import numpy as np
+
+from polynomiograpy.common.finite_field import FiniteField
+from . import solvers
+
+__all__ = [
+    "SYMMETRY_MODES",
+    "detect_symmetries",
+    "resolve_symmetries",
+    "canonical_ranges",
+    "iter_canonical_roots",
+]
+
+# Symmetries used by each mode. Negation, p -> -p, keeps the roots bit for bit.
+# Reflection, p(x) -> p(-x), maps the roots z -> -z, which are mirrored from the
+# roots of the canonical polynomial instead of solved, so they can differ in the
+# last bits and, rarely, fall in a neighbouring pixel.
+SYMMETRY_MODES = {
+    "none": (),
+    "exact": ("negation",),
+    "all": ("negation", "reflection"),
+}
+
+
+def detect_symmetries(ff: FiniteField) -> tuple[str, ...]:
+    """
+    Detects the symmetries of the polynomials over a finite field.
+
+    Both symmetries need the opposite of each element to be an element, so that
+    -p and p(-x) are polynomials over the field whenever p is. They hold for every
+    degree. They also need the elements to be distinct, since the polynomials are
+    enumerated by the positions of their coefficients in the elements, so a
+    repeated element makes some polynomials appear several times, which the
+    canonical ranges would not count.
+
+    Conjugation, z -> conj(z), always holds for the real elements but does not
+    save any solve, since the conjugate roots come from the same polynomial, and
+    z -> 1/z, from reversing the coefficients, is not used since
+    it changes the degree of the polynomials whose constant term is zero.
+
+    Args:
+        ff (:obj:`FiniteField`):
+            The finite field.
+
+    Returns:
+        tuple[str, ...]: The symmetries, "negation" and "reflection", or none.
+    """
+    elements = set(ff.elements)
+    if len(elements) != len(ff.elements):
+        return ()
+    if all(-element in elements for element in elements):
+        return ("negation", "reflection")
+    return ()
+
+
+def resolve_symmetries(ff: FiniteField, mode: str) -> tuple[str, ...]:
+    """
+    Returns the symmetries of a mode that hold for a finite field.
+
+    Args:
+        ff (:obj:`FiniteField`):
+            The finite field.
+        mode (str):
+            A key of `SYMMETRY_MODES`.
+
+    Returns:
+        tuple[str, ...]: The symmetries to use.
+
+    Raises:
+        AssertionError: If the mode is unknown.
+    """
+    assert mode in SYMMETRY_MODES, f"Unknown symmetry mode: {mode}"
+    detected = detect_symmetries(ff)
+    return tuple(s for s in SYMMETRY_MODES[mode] if s in detected)
+
+
+def canonical_ranges(
+    ff: FiniteField, degree: int, symmetries: tuple[str, ...] = ()
+) -> list[tuple[int, int]]:
+    """
+    Returns the ranges of indices of the polynomials of a degree that are solved
+    with some symmetries: with negation, the polynomials whose leading coefficient
+    is positive.
+
+    Args:
+        ff (:obj:`FiniteField`):
+            The finite field.
+        degree (int):
+            Degree of the polynomials.
+        symmetries (tuple[str, ...], optional):
+            Symmetries of the field, see :py:func:`resolve_symmetries`. Defaults
+            to none.
+
+    Returns:
+        list[tuple[int, int]]: The `(start, stop)` ranges of indices, see
+        :py:meth:`polynomiograpy.common.FiniteField.coefficients_at`.
+    """
+    count = ff.count_polynomials(degree)
+    if "negation" not in symmetries:
+        return [(0, count)]
+    elements = np.asarray(ff.elements)
+    nonzero = elements[elements != 0]
+    # the leading coefficient is the most significant digit of the indices
+    block = count // len(nonzero)
+    ranges: list[tuple[int, int]] = []
+    for position in np.flatnonzero(nonzero > 0):
+        start = int(position) * block
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], start + block)
+        else:
+            ranges.append((start, start + block))
+    return ranges
+
+
+def iter_canonical_roots(
+    ff: FiniteField,
+    degree: int,
+    start: int,
+    stop: int,
+    *,
+    symmetries: tuple[str, ...] = (),
+    chunk_size: int = solvers.DEFAULT_CHUNK_SIZE,
+    solver: str = "eig",
+) -> Iterator[tuple[np.ndarray, int]]:
+    """
+    Computes the roots of the polynomials of a degree over a finite field from a
+    range of canonical polynomials, one chunk at a time.
+
+    With negation, each canonical polynomial p stands for p and -p, which have the
+    same roots, so its roots are counted twice. With reflection, of p and p(-x)
+    only the one with the lowest index is solved, and its roots z also give the
+    roots -z of the other, unless both are the same polynomial.
+
+    Args:
+        ff (:obj:`FiniteField`):
+            The finite field.
+        degree (int):
+            Degree of the polynomials.
+        start (int):
+            Index of the first polynomial, in a range of
+            :py:func:`canonical_ranges`.
+        stop (int):
+            Index after the last polynomial.
+        symmetries (tuple[str, ...], optional):
+            Symmetries of the field, see :py:func:`resolve_symmetries`. Reflection
+            needs negation. Defaults to none.
+        chunk_size (int, optional):
+            Number of polynomials solved at once. Defaults to
+            `solvers.DEFAULT_CHUNK_SIZE`.
+        solver (str, optional):
+            Name of the root solver, see :py:func:`solvers.solve_roots`. Defaults
+            to "eig".
+
+    Yields:
+        tuple[:obj:`numpy.ndarray`, int]: Roots, and the number of polynomials
+        each of them stands for.
+
+    Raises:
+        AssertionError: If reflection is used without negation.
+    """
+    reflection = "reflection" in symmetries
+    assert not reflection or "negation" in symmetries, "Reflection needs negation"
+    weight = 2 if "negation" in symmetries else 1
+    signs = (-1) ** np.arange(degree + 1)
+    first = start
+    for coeffs in ff.iter_coefficient_chunks(degree, chunk_size, start, stop):
+        if not reflection:
+            roots = solvers.solve_roots(coeffs, solver=solver, chunk_size=chunk_size)
+            yield roots.ravel(), weight
+            continue
+        indices = np.arange(first, first + len(coeffs))
+        first += len(coeffs)
+        # p(-x), with a positive leading coefficient
+        partners = coeffs * signs * np.sign(coeffs[:, -1:] * signs[-1])
+        partner_indices = ff.indices_of(partners)
+        kept = indices <= partner_indices
+        roots = solvers.solve_roots(coeffs[kept], solver=solver, chunk_size=chunk_size)
+        yield roots.ravel(), weight
+        mirrored = partner_indices[kept] != indices[kept]
+        yield -roots[mirrored].ravel(), weight
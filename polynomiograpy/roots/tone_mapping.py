@@ -0,0 +1,232 @@
+from typing import Iterator, Optional
+
+import numpy as np
+
+from polynomiograpy.iterations.helpers import default_tile_size, iter_row_tiles
+
+__all__ = [
+    "TONE_MAPPERS",
+    "tone_map_linear",
+    "tone_map_log",
+    "equalization_levels",
+    "tone_map_equalized",
+    "tone_map_options",
+    "tone_map",
+]
+
+
+def _iter_bands(counts: np.ndarray, tile_size: Optional[int]) -> Iterator[slice]:
+    height, width = counts.shape[:2]
+    for row_start, row_stop in iter_row_tiles(
+        height, tile_size or default_tile_size(width)
+    ):
+        yield slice(row_start, row_stop)
+
+
+def tone_map_linear(counts: np.ndarray, *, color_range: int = 8) -> np.ndarray:
+    """
+    Maps root counts to intensities proportionally, saturating at 255.
+
+    Args:
+        counts (:obj:`numpy.ndarray`):
+            Number of roots in each pixel.
+        color_range (int, optional):
+            Number of color shades to represent the roots, each root adding
+            `256 // color_range` to the intensity. Defaults to 8.
+
+    Returns:
+        :obj:`numpy.ndarray`: The `numpy.uint8` intensities, the same as the ones
+        of :py:func:`polynomiograpy.roots.helpers.compute_screen_for_roots`.
+    """
+    return np.minimum(counts * (256 // color_range), 255).astype(np.uint8)
+
+
+def tone_map_log(
+    counts: np.ndarray, *, max_count: Optional[float] = None
+) -> np.ndarray:
+    """
+    Maps root counts to intensities logarithmically, so the sparse roots stay
+    visible next to the dense ones.
+
+    Args:
+        counts (:obj:`numpy.ndarray`):
+            Number of roots in each pixel.
+        max_count (Optional[float], optional):
+            Count mapped to 255, larger counts saturating. Defaults to the largest
+            count.
+
+    Returns:
+        :obj:`numpy.ndarray`: The `numpy.uint8` intensities.
+    """
+    if max_count is None:
+        max_count = counts.max(initial=0)
+    if max_count <= 0:
+        return np.zeros(counts.shape, dtype=np.uint8)
+    levels = np.log1p(counts) * (255 / np.log1p(max_count))
+    return np.minimum(levels, 255).astype(np.uint8)
+
+
+def equalization_levels(
+    counts: np.ndarray, *, tile_size: Optional[int] = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the histogram equalization of root counts, one band of rows at a
+    time, so the counts can be memory-mapped arrays larger than memory.
+
+    Args:
+        counts (:obj:`numpy.ndarray`):
+            Number of roots in each pixel.
+        tile_size (Optional[int], optional):
+            Number of rows read at once. Defaults to bands of about one
+            megapixel.
+
+    Returns:
+        tuple[:obj:`numpy.ndarray`, :obj:`numpy.ndarray`]: The sorted distinct
+        counts, and the `numpy.uint8` intensity of each of them.
+    """
+    values = np.zeros(0, dtype=counts.dtype)
+    frequencies = np.zeros(0, dtype=np.int64)
+    for rows in _iter_bands(counts, tile_size):
+        band_values, band_frequencies = np.unique(counts[rows], return_counts=True)
+        values, inverse = np.unique(
+            np.concatenate([values, band_values]), return_inverse=True
+        )
+        frequencies = np.bincount(
+            inverse,
+            weights=np.concatenate([frequencies, band_frequencies]),
+            minlength=len(values),
+        ).astype(np.int64)
+    frequencies[values <= 0] = 0
+    cdf = np.cumsum(frequencies)
+    if len(cdf) == 0 or cdf[-1] == 0:
+        return values, np.zeros(len(values), dtype=np.uint8)
+    return values, (cdf * (255 / cdf[-1])).astype(np.uint8)
+
+
+def tone_map_equalized(
+    counts: np.ndarray,
+    *,
+    levels: Optional[tuple[np.ndarray, np.ndarray]] = None,
+) -> np.ndarray:
+    """
+    Maps root counts to intensities by histogram equalization: a pixel with roots
+    gets an intensity proportional to the fraction of the pixels with roots whose
+    count is at most its own.
+
+    Args:
+        counts (:obj:`numpy.ndarray`):
+            Number of roots in each pixel.
+        levels (Optional[tuple[:obj:`numpy.ndarray`, :obj:`numpy.ndarray`]], optional):
+            Equalization of the whole render `counts` are part of, see
+            :py:func:`equalization_levels`. Defaults to the equalization of
+            `counts`.
+
+    Returns:
+        :obj:`numpy.ndarray`: The `numpy.uint8` intensities, 0 for the pixels
+        without roots.
+    """
+    values, intensities = equalization_levels(counts) if levels is None else levels
+    if len(values) == 0:
+        return np.zeros(counts.shape, dtype=np.uint8)
+    positions = np.searchsorted(values, counts).clip(max=len(values) - 1)
+    return intensities[positions]
+
+
+# Tone mappers by name.
+TONE_MAPPERS = {
+    "linear": tone_map_linear,
+    "log": tone_map_log,
+    "equalized": tone_map_equalized,
+}
+
+
+def tone_map_options(
+    counts: np.ndarray,
+    mode: str = "linear",
+    *,
+    tile_size: Optional[int] = None,
+    **kwargs,
+) -> dict:
+    """
+    Completes the options of a tone mapper with the statistics of the whole
+    counts it needs, the largest count for "log" and the equalization for
+    "equalized", computed one band of rows at a time. Bands of the counts tone
+    mapped with these options give the same intensities as the whole counts.
+
+    Args:
+        counts (:obj:`numpy.ndarray`):
+            Number of roots in each pixel, of shape `(height, width)`.
+        mode (str, optional):
+            Name of the tone mapper. Defaults to "linear".
+        tile_size (Optional[int], optional):
+            Number of rows read at once. Defaults to bands of about one
+            megapixel.
+        **kwargs:
+            Options of the tone mapper, which are kept.
+
+    Returns:
+        dict: The options.
+
+    Raises:
+        AssertionError: If the mode is unknown.
+    """
+    assert mode in TONE_MAPPERS, f"Unknown tone mapping: {mode}"
+    options = dict(kwargs)
+    if mode == "log" and options.get("max_count") is None:
+        options["max_count"] = max(
+            (counts[rows].max(initial=0) for rows in _iter_bands(counts, tile_size)),
+            default=0,
+        )
+    elif mode == "equalized" and options.get("levels") is None:
+        options["levels"] = equalization_levels(counts, tile_size=tile_size)
+    return options
+
+
+def tone_map(
+    counts: np.ndarray,
+    mode: str = "linear",
+    *,
+    out: Optional[np.ndarray] = None,
+    channel: Optional[int] = None,
+    tile_size: Optional[int] = None,
+    **kwargs,
+) -> np.ndarray:
+    """
+    Maps root counts to intensities with one of the `TONE_MAPPERS`, one band of
+    rows at a time, so the counts and `out` can be memory-mapped arrays larger
+    than memory.
+
+    Args:
+        counts (:obj:`numpy.ndarray`):
+            Number of roots in each pixel, of shape `(height, width)`, see
+            :py:func:`polynomiograpy.roots.compute_hits_for_finite_field_poly`.
+        mode (str, optional):
+            Name of the tone mapper. Defaults to "linear".
+        out (Optional[:obj:`numpy.ndarray`], optional):
+            Screen to write the intensities to. Defaults to a new array.
+        channel (Optional[int], optional):
+            Channel of `out` to write the intensities to. Defaults to `None`,
+            which writes to `out` directly.
+        tile_size (Optional[int], optional):
+            Number of rows mapped at once. Defaults to bands of about one
+            megapixel.
+        **kwargs:
+            Options of the tone mapper, like `color_range` for "linear" or
+            `max_count` for "log", see :py:func:`tone_map_options`.
+
+    Returns:
+        :obj:`numpy.ndarray`: The intensities, or `out` when given.
+
+    Raises:
+        AssertionError: If the mode is unknown.
+    """
+    options = tone_map_options(counts, mode, tile_size=tile_size, **kwargs)
+    if out is None:
+        out = np.empty(counts.shape, dtype=np.uint8)
+    for rows in _iter_bands(counts, tile_size):
+        intensities = TONE_MAPPERS[mode](counts[rows], **options)
+        if channel is None:
+            out[rows] = intensities
+        else:
+            out[rows, :, channel] = intensities
+    return out
@@ -0,0 +1,345 @@
+import asyncio
+import json
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from polynomiograpy.common.colorize import palettes
+from polynomiograpy.common.polynomial import Polynomial
+from polynomiograpy.iterations.jit import available_engines
+from polynomiograpy.iterations.methods import available_methods
+from . import helpers
+
+__all__ = ["TileServer", "serve"]
+
+
+class TileServer:
+    """
+    Serves the tiles of a polynomiograph over HTTP for web map viewers.
+
+    Tiles are requested as `/{z}/{x}/{y}.png`. The whole viewport is one tile at
+    zoom level 0, and each zoom level splits the tiles of the previous one in
+    four. Tiles are rendered by a pool of workers. Concurrent requests for the
+    same tile share one render, and rendered tiles are kept in a least recently
+    used cache. `/stats` returns the counters of the server as JSON.
+    """
+
+    def __init__(
+        self,
+        poly: Polynomial,
+        method: str = "newton",
+        *,
+        delta: float = 0.1,
+        max_value: int = 16,
+        reverse_color: bool = False,
+        palette: Optional[str] = None,
+        engine: str = "numpy",
+        dtype=np.complex128,
+        viewport: tuple[float, float, float, float] = (-3, 3, -3, 3),
+        tile_size: int = 256,
+        max_zoom: int = 40,
+        cache_bytes: int = 64 << 20,
+        workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        Initialize the server.
+
+        Args:
+            poly (Polynomial):
+                The polynomial to render.
+            method (str, optional):
+                The method to use for computation. Must be a vectorized method.
+                Defaults to `"newton"`.
+            delta (float, optional):
+                The tolerance value used by the method for convergence. Defaults to
+                0.1.
+            max_value (int, optional):
+                Maximum iteration count. Defaults to 16.
+            reverse_color (bool, optional):
+                Flag to reverse the color mapping. Defaults to False.
+            palette (Optional[str], optional):
+                Palette of the tiles, see
+                :py:func:`polynomiograpy.common.colorize.get_palette`. Defaults to
+                `None`, which renders red intensities.
+            engine (str, optional):
+                Engine computing the iteration counts. Defaults to `"numpy"`.
+            dtype (optional):
+                Complex dtype of the computed points. Defaults to
+                `numpy.complex128`.
+            viewport (tuple[float, float, float, float], optional):
+                `(min_real, max_real, min_imag, max_imag)` of zoom level 0.
+                Defaults to `(-3, 3, -3, 3)`.
+            tile_size (int, optional):
+                Width and height of a tile in pixels. Defaults to 256.
+            max_zoom (int, optional):
+                Maximum zoom level served. Defaults to 40, beyond which double
+                precision runs out.
+            cache_bytes (int, optional):
+                Maximum total size of the cached PNG tiles. Defaults to 64 MiB.
+            workers (Optional[int], optional):
+                Number of worker processes. Defaults to the number of CPUs.
+            executor (Optional[:obj:`concurrent.futures.Executor`], optional):
+                Pool to render the tiles with instead of a new process pool, for
+                example a thread pool with the `"jit"` engine. The server does not
+                shut it down. Defaults to `None`.
+        """
+        assert method in available_methods, "Unknown method"
+        assert not method.startswith("old"), "Tiles need a vectorized method"
+        assert engine in available_engines, "Unknown engine"
+        assert palette is None or palette in palettes, "Unknown palette"
+        self.settings: dict[str, Any] = {
+            "coefficients": list(poly.coeffs),
+            "method": method,
+            "delta": delta,
+            "max_value": max_value,
+            "reverse_color": reverse_color,
+            "palette": palette,
+            "engine": engine,
+            "dtype": np.dtype(dtype),
+            "viewport": tuple(viewport),
+            "tile_size": tile_size,
+        }
+        self.max_zoom = max_zoom
+        self.cache = helpers.TileCache(cache_bytes)
+        self.stats = {
+            "requests": 0,
+            "hits": 0,
+            "renders": 0,
+            "deduplicated": 0,
+            "errors": 0,
+        }
+        self._workers = workers
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._pending: dict[tuple[int, int, int], asyncio.Future] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    async def get_tile(self, z: int, x: int, y: int) -> bytes:
+        """
+        Returns the PNG image of a tile, from the cache, from a render of the same
+        tile in progress, or from a new render in the pool.
+
+        Args:
+            z (int):
+                Zoom level.
+            x (int):
+                Column of the tile.
+            y (int):
+                Row of the tile.
+
+        Returns:
+            bytes: The PNG image.
+
+        Raises:
+            AssertionError: If the tile is outside of the grid of its zoom level.
+        """
+        assert 0 <= z <= self.max_zoom, "Zoom level out of range"
+        assert 0 <= x < 2**z and 0 <= y < 2**z, "Tile out of range"
+        key = (z, x, y)
+        tile = self.cache.get(key)
+        if tile is not None:
+            self.stats["hits"] += 1
+            return tile
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.stats["deduplicated"] += 1
+            # shielded, so a client disconnecting does not cancel the render for
+            # the other clients waiting for it
+            return await asyncio.shield(pending)
+        self.stats["renders"] += 1
+        future = asyncio.get_running_loop().run_in_executor(
+            self._start_executor(), helpers.render_tile, self.settings, z, x, y
+        )
+        self._pending[key] = future
+        # cached when the render finishes, even if all its requests were cancelled
+        future.add_done_callback(lambda _: self._finish_render(key, future))
+        return await asyncio.shield(future)
+
+    def _finish_render(self, key: tuple[int, int, int], future: asyncio.Future):
+        self._pending.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+
+    def _start_executor(self) -> Executor:
+        if self._executor is None:
+            # workers started by a fork server do not inherit the sockets of the
+            # connections open at that moment, which would stay open after the
+            # server closes them
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context(
+                "forkserver" if "forkserver" in methods else "spawn"
+            )
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers, mp_context=context
+            )
+        return self._executor
+
+    async def _respond(self, method: str, target: str) -> tuple[int, bytes, str]:
+        path = urlsplit(target).path
+        if method not in ("GET", "HEAD"):
+            return 405, b"Method not allowed\n", "text/plain; charset=utf-8"
+        if path == "/stats":
+            stats = {
+                **self.stats,
+                "cached_tiles": len(self.cache),
+                "cached_bytes": self.cache.nbytes,
+                "pending": len(self._pending),
+            }
+            return 200, json.dumps(stats).encode(), "application/json"
+        tile = helpers.parse_tile_path(path)
+        if tile is None:
+            return 404, b"Not found\n", "text/plain; charset=utf-8"
+        z, x, y = tile
+        if z > self.max_zoom or x >= 2**z or y >= 2**z:
+            return 404, b"Tile out of range\n", "text/plain; charset=utf-8"
+        try:
+            return 200, await self.get_tile(z, x, y), "image/png"
+        except Exception as e:
+            self.stats["errors"] += 1
+            return 500, f"{type(e).__name__}: {e}\n".encode(), "text/plain"
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """
+        Serves the HTTP/1.1 requests of a connection, keeping it alive between
+        requests unless the client asks to close it.
+        """
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers: dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                parts = request_line.decode("latin-1").split()
+                if len(parts) != 3:
+                    writer.write(
+                        helpers.http_response(400, b"Bad request\n", keep_alive=False)
+                    )
+                    break
+                method, target, version = parts
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" and (
+                    version == "HTTP/1.1" or connection == "keep-alive"
+                )
+                self.stats["requests"] += 1
+                status, body, content_type = await self._respond(method, target)
+                writer.write(
+                    helpers.http_response(
+                        status,
+                        body,
+                        content_type=content_type,
+                        keep_alive=keep_alive,
+                        head=method == "HEAD",
+                        headers=(
+                            {"Cache-Control": "max-age=86400"}
+                            if status == 200 and content_type == "image/png"
+                            else None
+                        ),
+                    )
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000):
+        """
+        Starts the worker pool and listening for connections.
+
+        Args:
+            host (str, optional):
+                Address to listen on. Defaults to `"127.0.0.1"`, so the server is
+                only reachable from this machine.
+            port (int, optional):
+                Port to listen on, 0 for any free port. Defaults to 8000.
+
+        Returns:
+            :obj:`asyncio.Server`: The listening server.
+        """
+        self._start_executor()
+        self._server = await asyncio.start_server(self.handle_connection, host, port)
+        return self._server
+
+    @property
+    def port(self) -> Optional[int]:
+        """
+        Returns the port the server listens on, once started.
+        """
+        if self._server is None or not self._server.sockets:
+            return None
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """
+        Stops listening, closes the open connections and shuts down the worker pool
+        created by the server.
+        """
+        if self._server is not None:
+            self._server.close()
+        # closing the transports ends the requests loops, which see the end of
+        # their streams
+        for writer in list(self._connections.values()):
+            writer.close()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+def serve(
+    poly: Polynomial,
+    method: str = "newton",
+    *,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    **kwargs,
+):
+    """
+    Runs a :obj:`TileServer` until interrupted.
+
+    Args:
+        poly (Polynomial):
+            The polynomial to render.
+        method (str, optional):
+            The method to use for computation. Defaults to `"newton"`.
+        host (str, optional):
+            Address to listen on. Defaults to `"127.0.0.1"`.
+        port (int, optional):
+            Port to listen on. Defaults to 8000.
+        **kwargs:
+            Other arguments of :py:class:`TileServer`.
+    """
+
+    async def main():
+        server = TileServer(poly, method, **kwargs)
+        listening = await server.start(host, port)
+        print(f"Serving tiles on http://{host}:{server.port}/{{z}}/{{x}}/{{y}}.png")
+        try:
+            await listening.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
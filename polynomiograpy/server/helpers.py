@@ -0,0 +1,214 @@
+import io
+import re
+from collections import OrderedDict
+from typing import Any, Optional
+
+import numpy as np
+
+from polynomiograpy.common.png import save_png
+from polynomiograpy.common.polynomial import Polynomial
+from polynomiograpy.iterations import (
+    compute_counts_for_single_poly,
+    compute_screen_for_single_poly,
+)
+
+_TILE_PATH = re.compile(r"^/(\d+)/(\d+)/(\d+)\.png$")
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+def parse_tile_path(path: str) -> Optional[tuple[int, int, int]]:
+    """
+    Parses a tile path `/{z}/{x}/{y}.png`.
+
+    Args:
+        path (str):
+            Path of the request, without the query string.
+
+    Returns:
+        Optional[tuple[int, int, int]]: The zoom level and the column and row of
+        the tile, or `None` if the path is not a tile path.
+    """
+    match = _TILE_PATH.match(path)
+    if match is None:
+        return None
+    z, x, y = (int(g) for g in match.groups())
+    return z, x, y
+
+
+def tile_viewport(
+    viewport: tuple[float, float, float, float],
+    tile_size: int,
+    z: int,
+    x: int,
+    y: int,
+) -> dict[str, float]:
+    """
+    Computes the scales and shifts of a tile.
+
+    The whole `viewport` is covered by one tile at zoom level 0 and by a grid of
+    `2 ** z` by `2 ** z` tiles at zoom level `z`. Rows of tiles are numbered from
+    the top, the largest imaginary part, like in web maps.
+
+    Args:
+        viewport (tuple[float, float, float, float]):
+            `(min_real, max_real, min_imag, max_imag)` of zoom level 0.
+        tile_size (int):
+            Width and height of a tile in pixels.
+        z (int):
+            Zoom level.
+        x (int):
+            Column of the tile.
+        y (int):
+            Row of the tile.
+
+    Returns:
+        dict[str, float]: `scale_x`, `scale_y`, `shift_x` and `shift_y` of the tile.
+    """
+    min_real, max_real, min_imag, max_imag = viewport
+    tiles = 2**z
+    tile_width = (max_real - min_real) / tiles
+    tile_height = (max_imag - min_imag) / tiles
+    return {
+        "scale_x": tile_width / tile_size,
+        "scale_y": tile_height / tile_size,
+        "shift_x": min_real + (x + 0.5) * tile_width,
+        "shift_y": max_imag - (y + 0.5) * tile_height,
+    }
+
+
+def render_tile(settings: dict[str, Any], z: int, x: int, y: int) -> bytes:
+    """
+    Renders a tile to PNG, in a worker of the pool of the server.
+
+    Args:
+        settings (dict[str, Any]):
+            The render settings of the server: `coefficients`, `method`, `delta`,
+            `max_value`, `reverse_color`, `palette`, `engine`, `dtype`, `viewport`
+            and `tile_size`.
+        z (int):
+            Zoom level.
+        x (int):
+            Column of the tile.
+        y (int):
+            Row of the tile.
+
+    Returns:
+        bytes: The PNG image.
+    """
+    size = settings["tile_size"]
+    poly = Polynomial(coeffs=settings["coefficients"])
+    viewport = tile_viewport(settings["viewport"], size, z, x, y)
+    with np.errstate(all="ignore"):
+        if settings["palette"] is None:
+            screen = np.zeros([size, size, 3], dtype=np.uint8)
+            screen_buffer = np.zeros([size, size, 3], dtype=np.int64)
+            compute_screen_for_single_poly(
+                settings["method"],
+                poly,
+                settings["delta"],
+                size,
+                size,
+                screen,
+                screen_buffer,
+                **viewport,
+                max_value=settings["max_value"],
+                reverse_color=settings["reverse_color"],
+                engine=settings["engine"],
+                dtype=settings["dtype"],
+            )
+        else:
+            screen = compute_counts_for_single_poly(
+                settings["method"],
+                poly,
+                settings["delta"],
+                size,
+                size,
+                **viewport,
+                max_value=settings["max_value"],
+                engine=settings["engine"],
+                dtype=settings["dtype"],
+            ).colorize(palette=settings["palette"], reverse=settings["reverse_color"])
+    buffer = io.BytesIO()
+    save_png(buffer, screen, compress_level=1)
+    return buffer.getvalue()
+
+
+class TileCache:
+    """
+    Least recently used cache of encoded tiles, bounded in bytes.
+    """
+
+    def __init__(self, max_bytes: int = 64 << 20):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_bytes (int, optional):
+                Maximum total size of the cached tiles. Defaults to 64 MiB.
+        """
+        self.max_bytes = max_bytes
+        self._tiles: OrderedDict[tuple, bytes] = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Returns the total size of the cached tiles.
+        """
+        return self._bytes
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        """
+        Returns a cached tile and marks it as recently used, or `None`.
+        """
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+        return tile
+
+    def put(self, key: tuple, tile: bytes):
+        """
+        Caches a tile, dropping the least recently used tiles when the cache is
+        full.
+        """
+        if len(tile) > self.max_bytes:
+            return
+        if key in self._tiles:
+            self._bytes -= len(self._tiles.pop(key))
+        self._tiles[key] = tile
+        self._bytes += len(tile)
+        while self._bytes > self.max_bytes:
+            _, dropped = self._tiles.popitem(last=False)
+            self._bytes -= len(dropped)
+
+
+def http_response(
+    status: int,
+    body: bytes = b"",
+    *,
+    content_type: str = "text/plain; charset=utf-8",
+    keep_alive: bool = True,
+    head: bool = False,
+    headers: Optional[dict[str, str]] = None,
+) -> bytes:
+    """
+    Builds an HTTP/1.1 response.
+    """
+    lines = [
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+        f"Content-Type: {content_type}",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        *(f"{name}: {value}" for name, value in (headers or {}).items()),
+    ]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (b"" if head else body)